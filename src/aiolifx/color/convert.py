@@ -0,0 +1,154 @@
+import colorsys
+import math
+
+import numpy as np
+import numpy.typing as npt
+
+DEFAULT_KELVIN = 3500
+# kelvin / 100 where the black body fit changes branch
+FIT_KNEE = 66
+FIT_BLUE_CUTOFF = 19
+
+FloatArray = npt.NDArray[np.float64]
+HsbkArray = npt.NDArray[np.uint16]
+RgbArray = npt.NDArray[np.uint8]
+
+
+def _unit_rgb(rgb: npt.ArrayLike) -> FloatArray:
+    # 8 bit integer channels, or floats already in 0..1
+    array = np.asarray(rgb)
+    if np.issubdtype(array.dtype, np.integer):
+        return array.astype(np.float64) / 255
+    return np.clip(array.astype(np.float64), 0, 1)
+
+
+def kelvin_to_rgb(kelvin: npt.ArrayLike) -> FloatArray:
+    # Tanner Helland's fit of the black body curve, 0..1 per channel
+    t = np.asarray(kelvin, dtype=np.float64) / 100
+    warm = t <= FIT_KNEE
+    hot = np.maximum(t - 60, 1.0)
+    red = np.where(warm, 255.0, 329.698727446 * hot**-0.1332047592)
+    green = np.where(
+        warm,
+        99.4708025861 * np.log(np.maximum(t, 1.0)) - 161.1195681661,
+        288.1221695283 * hot**-0.0755148492,
+    )
+    blue = np.where(
+        t >= FIT_KNEE,
+        255.0,
+        np.where(
+            t <= FIT_BLUE_CUTOFF,
+            0.0,
+            138.5177312231 * np.log(np.maximum(t - 10, 1.0)) - 305.0447927307,
+        ),
+    )
+    return np.clip(np.stack([red, green, blue], axis=-1), 0, 255) / 255
+
+
+def rgb_to_hsbk(rgb: npt.ArrayLike, kelvin: int = DEFAULT_KELVIN) -> HsbkArray:
+    rgb = _unit_rgb(rgb)
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    high = rgb.max(axis=-1)
+    delta = high - rgb.min(axis=-1)
+    safe_delta = np.where(delta > 0, delta, 1)
+    hue = np.where(
+        red == high,
+        (green - blue) / safe_delta,
+        np.where(
+            green == high, 2 + (blue - red) / safe_delta, 4 + (red - green) / safe_delta
+        ),
+    )
+    hue = np.where(delta > 0, (hue / 6) % 1, 0)
+    saturation = np.where(high > 0, delta / np.where(high > 0, high, 1), 0)
+    hsbk = np.empty((*rgb.shape[:-1], 4), dtype=np.uint16)
+    hsbk[..., 0] = np.rint(hue * 65535)
+    hsbk[..., 1] = np.rint(saturation * 65535)
+    hsbk[..., 2] = np.rint(high * 65535)
+    hsbk[..., 3] = kelvin
+    return hsbk
+
+
+def hsbk_to_rgb(hsbk: npt.ArrayLike) -> RgbArray:
+    return np.rint(hsbk_to_unit_rgb(hsbk) * 255).astype(np.uint8)
+
+
+def hsbk_to_unit_rgb(hsbk: npt.ArrayLike) -> FloatArray:
+    # The bulb mixes its white LEDs in as saturation drops, so the unsaturated
+    # part of a colour takes the tint of its kelvin rather than pure white.
+    hsbk = np.asarray(hsbk, dtype=np.float64)
+    hue = hsbk[..., 0] / 65535 * 6
+    saturation = hsbk[..., 1:2] / 65535
+    brightness = hsbk[..., 2:3] / 65535
+    sector = np.floor(hue).astype(np.intp) % 6
+    fraction = hue - np.floor(hue)
+    rising = fraction
+    falling = 1 - fraction
+    ones = np.ones_like(hue)
+    zeros = np.zeros_like(hue)
+    # fully saturated colour for each of the six hue sectors
+    channels = np.stack(
+        [
+            np.choose(sector, [ones, falling, zeros, zeros, rising, ones]),
+            np.choose(sector, [rising, ones, ones, falling, zeros, zeros]),
+            np.choose(sector, [zeros, zeros, rising, ones, ones, falling]),
+        ],
+        axis=-1,
+    )
+    white = kelvin_to_rgb(hsbk[..., 3])
+    return brightness * (saturation * channels + (1 - saturation) * white)
+
+
+def blend_kelvin(hsbk: npt.ArrayLike, kelvin: npt.ArrayLike, amount: float) -> HsbkArray:
+    # moves the white point of every colour part of the way towards kelvin
+    colors = np.array(hsbk, dtype=np.uint16)
+    current = colors[..., 3].astype(np.float64)
+    target = np.asarray(kelvin, dtype=np.float64)
+    colors[..., 3] = np.rint(current + (target - current) * amount)
+    return colors
+
+
+def rgb_to_hsbk_one(
+    red: int, green: int, blue: int, kelvin: int = DEFAULT_KELVIN
+) -> list[int]:
+    # for a single colour the array setup costs more than the maths
+    hue, saturation, brightness = colorsys.rgb_to_hsv(red / 255, green / 255, blue / 255)
+    return [
+        round(hue * 65535),
+        round(saturation * 65535),
+        round(brightness * 65535),
+        kelvin,
+    ]
+
+
+def hsbk_to_rgb_one(
+    hue: int, saturation: int, brightness: int, kelvin: int
+) -> tuple[int, int, int]:
+    color = colorsys.hsv_to_rgb(hue / 65535, 1.0, 1.0)
+    white = _kelvin_to_rgb_one(kelvin)
+    s = saturation / 65535
+    b = brightness / 65535
+    red, green, blue = (
+        round(b * (s * c + (1 - s) * w) * 255) for c, w in zip(color, white, strict=True)
+    )
+    return red, green, blue
+
+
+def _kelvin_to_rgb_one(kelvin: int) -> tuple[float, float, float]:
+    t = kelvin / 100
+    if t <= FIT_KNEE:
+        red = 255.0
+        green = 99.4708025861 * math.log(max(t, 1.0)) - 161.1195681661
+    else:
+        red = 329.698727446 * (t - 60) ** -0.1332047592
+        green = 288.1221695283 * (t - 60) ** -0.0755148492
+    if t >= FIT_KNEE:
+        blue = 255.0
+    elif t <= FIT_BLUE_CUTOFF:
+        blue = 0.0
+    else:
+        blue = 138.5177312231 * math.log(t - 10) - 305.0447927307
+    return (
+        min(max(red, 0), 255) / 255,
+        min(max(green, 0), 255) / 255,
+        min(max(blue, 0), 255) / 255,
+    )
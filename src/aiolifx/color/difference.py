@@ -0,0 +1,55 @@
+import numpy as np
+import numpy.typing as npt
+
+from aiolifx.color.convert import FloatArray
+from aiolifx.color.convert import HsbkArray
+from aiolifx.color.convert import hsbk_to_unit_rgb
+
+# CIE76 distance at which most people can just tell two colours apart
+JUST_NOTICEABLE_DIFFERENCE = 2.3
+
+# linear sRGB to XYZ, scaled so the D65 white point is (1, 1, 1)
+SRGB_TO_XYZ = np.array(
+    [[0.4124, 0.3576, 0.1805], [0.2126, 0.7152, 0.0722], [0.0193, 0.1192, 0.9505]]
+) / np.array([[0.95047], [1.0], [1.08883]])
+SRGB_GAMMA_KNEE = 0.04045
+LAB_EPSILON = (6 / 29) ** 3
+
+
+def hsbk_to_lab(hsbk: npt.ArrayLike) -> FloatArray:
+    rgb = hsbk_to_unit_rgb(hsbk)
+    linear = np.where(rgb <= SRGB_GAMMA_KNEE, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    xyz = linear @ SRGB_TO_XYZ.T
+    f = np.where(xyz > LAB_EPSILON, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack(
+        [
+            116 * f[..., 1] - 16,
+            500 * (f[..., 0] - f[..., 1]),
+            200 * (f[..., 1] - f[..., 2]),
+        ],
+        axis=-1,
+    )
+
+
+def color_difference(colors: npt.ArrayLike, reference: npt.ArrayLike) -> FloatArray:
+    # CIE76 delta E between what the bulb shows for each pair, so a hue change
+    # on a dim or washed out zone counts for as little as it looks
+    return np.linalg.norm(hsbk_to_lab(colors) - hsbk_to_lab(reference), axis=-1)
+
+
+def perceptible(
+    colors: npt.ArrayLike,
+    reference: npt.ArrayLike,
+    threshold: float = JUST_NOTICEABLE_DIFFERENCE,
+) -> npt.NDArray[np.bool_]:
+    return color_difference(colors, reference) >= threshold
+
+
+def skip_imperceptible(
+    reference: HsbkArray, colors: HsbkArray, threshold: float = JUST_NOTICEABLE_DIFFERENCE
+) -> HsbkArray:
+    # Colours nobody could tell from the reference keep the reference value, so
+    # a diff sees them as unchanged. Comparing against what the device was sent
+    # rather than the previous frame means slow drift still gets through.
+    visible = perceptible(colors, reference, threshold)
+    return np.where(visible[..., np.newaxis], colors, reference).astype(np.uint16)
@@ -0,0 +1,64 @@
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+
+from aiolifx.color.convert import HsbkArray
+from aiolifx.fleet.registry import DeviceRecord
+from aiolifx.resources.products_defs import products_dict
+
+# the range the protocol accepts when nothing more is known about a product
+WIRE_MIN_KELVIN = 1500
+WIRE_MAX_KELVIN = 9000
+
+
+@lru_cache(maxsize=256)
+def product_limits(product_id: int | None) -> tuple[int, int, bool]:
+    product = products_dict.get(product_id) if product_id is not None else None
+    if product is None:
+        return WIRE_MIN_KELVIN, WIRE_MAX_KELVIN, True
+    return (
+        product.min_kelvin or WIRE_MIN_KELVIN,
+        product.max_kelvin or WIRE_MAX_KELVIN,
+        product.color,
+    )
+
+
+def normalize_colors(
+    product_ids: Sequence[int | None], colors: npt.ArrayLike
+) -> HsbkArray:
+    # colors is (devices, ..., 4): one colour, zone strip or tile frame per device.
+    # Limits are looked up once per distinct product and spread with an index, so
+    # the work per colour is a handful of array operations.
+    hsbk = np.rint(np.clip(np.asarray(colors, dtype=np.float64), 0, 65535))
+    if len(product_ids) != len(hsbk):
+        msg = f"{len(product_ids)} devices but {len(hsbk)} colours"
+        raise ValueError(msg)
+    keys = [-1 if product_id is None else product_id for product_id in product_ids]
+    distinct, inverse = np.unique(np.asarray(keys, dtype=np.int64), return_inverse=True)
+    limits = np.array(
+        [product_limits(None if key < 0 else int(key)) for key in distinct.tolist()],
+        dtype=np.int64,
+    ).reshape(-1, 3)
+    # broadcast per device values over whatever zone or pixel axes follow
+    shape = (len(hsbk),) + (1,) * (hsbk.ndim - 2)
+    min_kelvin = limits[inverse, 0].reshape(shape)
+    max_kelvin = limits[inverse, 1].reshape(shape)
+    white_only = (limits[inverse, 2] == 0).reshape(shape)
+    hsbk[..., 3] = np.clip(hsbk[..., 3], min_kelvin, max_kelvin)
+    hsbk[..., 0] = np.where(white_only, 0, hsbk[..., 0])
+    hsbk[..., 1] = np.where(white_only, 0, hsbk[..., 1])
+    return hsbk.astype(np.uint16)
+
+
+def normalize_scene(devices: Sequence[DeviceRecord], colors: npt.ArrayLike) -> HsbkArray:
+    return normalize_colors([device.product_id for device in devices], colors)
+
+
+def distinct_colors(colors: HsbkArray) -> tuple[HsbkArray, npt.NDArray[np.intp]]:
+    # Once normalized, devices of the same kind asked for the same colour share
+    # one payload; encode the distinct ones and index back with the inverse.
+    flat = colors.reshape(len(colors), -1)
+    unique, inverse = np.unique(flat, axis=0, return_inverse=True)
+    return unique.reshape(-1, *colors.shape[1:]), inverse.reshape(-1)
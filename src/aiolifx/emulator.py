@@ -0,0 +1,186 @@
+import asyncio
+import random
+from collections.abc import Callable
+from typing import cast
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import Acknowledgement
+from aiolifx.models.message_types import ByteArrayPayload
+from aiolifx.models.message_types import EchoRequest
+from aiolifx.models.message_types import EchoResponse
+from aiolifx.models.message_types import GetHostFirmware
+from aiolifx.models.message_types import GetLabel
+from aiolifx.models.message_types import GetService
+from aiolifx.models.message_types import GetVersion
+from aiolifx.models.message_types import LabelPayload
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightGetPower
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import LightSetPower
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePayload
+from aiolifx.models.message_types import LightStatePower
+from aiolifx.models.message_types import PowerPayload
+from aiolifx.models.message_types import StateHostFirmware
+from aiolifx.models.message_types import StateHostFirmwarePayload
+from aiolifx.models.message_types import StateLabel
+from aiolifx.models.message_types import StateService
+from aiolifx.models.message_types import StateServicePayload
+from aiolifx.models.message_types import StateVersion
+from aiolifx.models.message_types import StateVersionPayload
+from aiolifx.resources.const import UDP_SERVICE
+from aiolifx.transport.receiver import Address
+from aiolifx.unpack import unpack_lifx_message
+
+LIFX_VENDOR = 1
+
+
+class EmulatedDevice:
+    def __init__(  # noqa: PLR0913
+        self,
+        mac: str,
+        *,
+        label: str = "",
+        product_id: int = 27,
+        firmware_build: int = 1_600_000_000,
+        firmware_version: int = (3 << 16) | 70,
+        loss: float = 0.0,
+    ) -> None:
+        self.mac = mac
+        self.label = label
+        self.product_id = product_id
+        self.firmware_build = firmware_build
+        self.firmware_version = firmware_version
+        self.loss = loss
+        self.color = [0, 0, 65535, 3500]
+        self.power_level = 65535
+        self.port = 0
+        self.received: list[Message] = []
+
+    def handle(self, message: Message) -> list[Message]:
+        self.received.append(message)
+        replies: list[Message] = []
+        if message.ack_requested:
+            replies.append(self._reply(Acknowledgement, message))
+        handler = self._handlers.get(type(message))
+        state = handler(self, message) if handler is not None else None
+        if state is not None and (
+            message.response_requested or isinstance(message, GetService)
+        ):
+            replies.append(state)
+        return replies
+
+    def _reply(
+        self, reply_type: type[Message], request: Message, **fields: object
+    ) -> Message:
+        return reply_type(
+            source_id=request.source_id,
+            target_addr=self.mac,
+            seq_num=request.seq_num,
+            **fields,
+        )
+
+    def _state_service(self, message: GetService) -> Message:
+        payload = StateServicePayload(service=UDP_SERVICE, port=self.port)
+        return self._reply(StateService, message, payload=payload)
+
+    def _state_label(self, message: GetLabel) -> Message:
+        return self._reply(StateLabel, message, payload=LabelPayload(label=self.label))
+
+    def _state_version(self, message: GetVersion) -> Message:
+        payload = StateVersionPayload(
+            vendor=LIFX_VENDOR, product=self.product_id, version=0
+        )
+        return self._reply(StateVersion, message, payload=payload)
+
+    def _state_host_firmware(self, message: GetHostFirmware) -> Message:
+        payload = StateHostFirmwarePayload(
+            build=self.firmware_build, reserved1=0, version=self.firmware_version
+        )
+        return self._reply(StateHostFirmware, message, payload=payload)
+
+    def _light_state(self, message: Message) -> Message:
+        payload = LightStatePayload(
+            color=self.color,
+            reserved1=0,
+            power_level=self.power_level,
+            label=self.label.encode(),
+            reserved2=0,
+        )
+        return self._reply(LightState, message, payload=payload)
+
+    def _set_color(self, message: LightSetColor) -> Message:
+        self.color = list(message.payload.color)
+        return self._light_state(message)
+
+    def _state_power(self, message: Message) -> Message:
+        payload = PowerPayload(power_level=self.power_level)
+        return self._reply(LightStatePower, message, payload=payload)
+
+    def _set_power(self, message: LightSetPower) -> Message:
+        self.power_level = message.payload.power_level
+        return self._state_power(message)
+
+    def _echo(self, message: EchoRequest) -> Message:
+        payload = ByteArrayPayload(byte_array=message.payload.byte_array)
+        return self._reply(EchoResponse, message, payload=payload)
+
+    _handlers: dict[type[Message], Callable[..., Message]] = {  # noqa: RUF012
+        GetService: _state_service,
+        GetLabel: _state_label,
+        GetVersion: _state_version,
+        GetHostFirmware: _state_host_firmware,
+        LightGet: _light_state,
+        LightSetColor: _set_color,
+        LightGetPower: _state_power,
+        LightSetPower: _set_power,
+        EchoRequest: _echo,
+    }
+
+
+class EmulatedDeviceProtocol(asyncio.DatagramProtocol):
+    def __init__(self, device: EmulatedDevice) -> None:
+        self.device = device
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast("asyncio.DatagramTransport", transport)
+
+    def datagram_received(self, data: bytes, addr: Address) -> None:
+        if self.transport is None:
+            return
+        message = unpack_lifx_message(data)
+        for reply in self.device.handle(message):
+            if random.random() < self.device.loss:  # noqa: S311
+                continue
+            self.transport.sendto(reply.packed_message, addr)
+
+
+class EmulatedFleet:
+    # Each device gets its own loopback socket, so a whole fleet can be driven
+    # through the real UDP path without any hardware.
+    def __init__(self, count: int, host: str = "127.0.0.1", loss: float = 0.0) -> None:
+        self.host = host
+        self.devices: dict[str, EmulatedDevice] = {}
+        for i in range(count):
+            mac = f"d0:73:d5:{(i >> 16) & 0xFF:02x}:{(i >> 8) & 0xFF:02x}:{i & 0xFF:02x}"
+            self.devices[mac] = EmulatedDevice(mac, label=f"Light {i}", loss=loss)
+        self.addresses: dict[str, Address] = {}
+        self._transports: list[asyncio.DatagramTransport] = []
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for mac, device in self.devices.items():
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda device=device: EmulatedDeviceProtocol(device),
+                local_addr=(self.host, 0),
+            )
+            address: Address = transport.get_extra_info("sockname")
+            device.port = address[1]
+            self.addresses[mac] = address
+            self._transports.append(transport)
+
+    def close(self) -> None:
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
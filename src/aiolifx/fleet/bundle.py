@@ -0,0 +1,197 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GetGroup
+from aiolifx.models.message_types import GetHostFirmware
+from aiolifx.models.message_types import GetLabel
+from aiolifx.models.message_types import GetLocation
+from aiolifx.models.message_types import GetVersion
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import MessageType
+from aiolifx.models.message_types import MultiZoneGetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZones
+from aiolifx.models.message_types import StateGroup
+from aiolifx.models.message_types import StateHostFirmware
+from aiolifx.models.message_types import StateLabel
+from aiolifx.models.message_types import StateLocation
+from aiolifx.models.message_types import StateVersion
+from aiolifx.models.message_types import TileGetDeviceChain
+from aiolifx.models.message_types import TileStateDeviceChain
+from aiolifx.models.product import Product
+from aiolifx.resources.products_defs import products_dict
+from aiolifx.transport.retry import RetryEngine
+
+BASE_REQUESTS: tuple[type[Message], ...] = (
+    GetVersion,
+    GetHostFirmware,
+    GetLabel,
+    GetGroup,
+    GetLocation,
+)
+
+
+class DeviceStateBundle(BaseModel):
+    mac: str
+    version: StateVersion | None = None
+    host_firmware: StateHostFirmware | None = None
+    label: StateLabel | None = None
+    group: StateGroup | None = None
+    location: StateLocation | None = None
+    light: LightState | None = None
+    extended_color_zones: MultiZoneStateExtendedColorZones | None = None
+    device_chain: TileStateDeviceChain | None = None
+    # Gets that went unanswered after retries
+    missing: list[MessageType] = []
+    round_trips: int = 0
+
+    @property
+    def product(self) -> Product | None:
+        if self.version is None:
+            return None
+        return products_dict.get(self.version.payload.product)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def replies(self) -> list[Message]:
+        return [
+            reply
+            for reply in (
+                self.version,
+                self.host_firmware,
+                self.label,
+                self.group,
+                self.location,
+                self.light,
+                self.extended_color_zones,
+                self.device_chain,
+            )
+            if reply is not None
+        ]
+
+    def store(self, reply: Message) -> None:
+        field = BUNDLE_FIELDS.get(type(reply))
+        if field is not None:
+            setattr(self, field, reply)
+
+
+BUNDLE_FIELDS: dict[type[Message], str] = {
+    StateVersion: "version",
+    StateHostFirmware: "host_firmware",
+    StateLabel: "label",
+    StateGroup: "group",
+    StateLocation: "location",
+    LightState: "light",
+    MultiZoneStateExtendedColorZones: "extended_color_zones",
+    TileStateDeviceChain: "device_chain",
+}
+
+
+def firmware_components(firmware: StateHostFirmware) -> tuple[int, int]:
+    version = firmware.payload.version
+    return (version >> 16, version & 0xFFFF)
+
+
+def supports_extended_multizone(
+    product: Product, components: tuple[int, int] | None
+) -> bool:
+    if not product.extended_multizone:
+        return False
+    minimum = product.min_ext_mz_firmware_components
+    if minimum is None:
+        return True
+    return components is not None and components >= (minimum[0], minimum[1])
+
+
+def capability_requests(
+    product: Product, components: tuple[int, int] | None
+) -> list[type[Message]]:
+    requests: list[type[Message]] = []
+    # switches have relays and buttons but no light to query
+    if not product.relays:
+        requests.append(LightGet)
+    if supports_extended_multizone(product, components):
+        requests.append(MultiZoneGetExtendedColorZones)
+    if product.matrix:
+        requests.append(TileGetDeviceChain)
+    return requests
+
+
+class StateBundleFetcher:
+    def __init__(
+        self, engine: RetryEngine, registry: DeviceRegistry | None = None
+    ) -> None:
+        self.engine = engine
+        self.registry = registry
+
+    async def fetch(self, mac: str) -> DeviceStateBundle:
+        bundle = DeviceStateBundle(mac=mac)
+        requests = list(BASE_REQUESTS)
+        device = self.registry.get(mac) if self.registry is not None else None
+        product = None if device is None else device.product
+        components = None if device is None else device.firmware_components
+        known = product is not None and (
+            not product.extended_multizone or components is not None
+        )
+        if product is not None and known:
+            requests += capability_requests(product, components)
+        await self._burst(bundle, requests)
+
+        # unknown devices need their version and firmware before the capability
+        # specific Gets can be chosen, which costs one extra round trip
+        if not known and bundle.product is not None:
+            firmware = bundle.host_firmware
+            await self._burst(
+                bundle,
+                capability_requests(
+                    bundle.product,
+                    None if firmware is None else firmware_components(firmware),
+                ),
+            )
+        return bundle
+
+    async def fetch_many(
+        self, macs: list[str], concurrency: int = 16
+    ) -> dict[str, DeviceStateBundle]:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch_one(mac: str) -> DeviceStateBundle:
+            async with semaphore:
+                return await self.fetch(mac)
+
+        bundles = await asyncio.gather(*(fetch_one(mac) for mac in macs))
+        return {bundle.mac: bundle for bundle in bundles}
+
+    async def _burst(
+        self, bundle: DeviceStateBundle, requests: list[type[Message]]
+    ) -> None:
+        if not requests:
+            return
+        messages = [
+            request(
+                source_id=self.engine.source_id,
+                target_addr=bundle.mac,
+                seq_num=self.engine.next_seq_num(bundle.mac),
+                response_requested=True,
+            )
+            for request in requests
+        ]
+        # every request is sent before any reply is awaited, so the whole burst
+        # costs a single round trip when nothing is lost
+        replies = await asyncio.gather(
+            *(self.engine.request(message) for message in messages),
+            return_exceptions=True,
+        )
+        bundle.round_trips += 1
+        for message, reply in zip(messages, replies, strict=True):
+            if isinstance(reply, BaseException):
+                bundle.missing.append(message.message_type)
+                continue
+            bundle.store(reply)
+            if self.registry is not None:
+                self.registry.apply(reply)
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GetService
+from aiolifx.models.message_types import StateService
+from aiolifx.resources.const import BROADCAST_ADDRESS
+from aiolifx.resources.const import BROADCAST_MAC
+from aiolifx.resources.const import LIFX_PORT
+from aiolifx.resources.const import UDP_SERVICE
+from aiolifx.transport.udp import Address
+
+
+class DiscoveredDevice(BaseModel):
+    mac: str
+    ip: str
+    port: int = LIFX_PORT
+    services: dict[int, int] = {}
+    first_seen: float
+    last_seen: float
+
+    @property
+    def address(self) -> Address:
+        return (self.ip, self.port)
+
+
+class DiscoveryPolicy(BaseModel):
+    reply_window: float = 1.0
+    stale_after: float = 60.0
+    min_broadcast_interval: float = 10.0
+    max_broadcast_interval: float = 600.0
+    backoff_factor: float = 2.0
+
+
+class SweepResult(BaseModel):
+    broadcast: bool
+    probed: int = 0
+    replies: int = 0
+    duplicates: int = 0
+    new: list[str] = []
+    missing: list[str] = []
+
+
+class Discovery:
+    def __init__(
+        self,
+        send_to: Callable[[Message, Address], None],
+        source_id: int,
+        policy: DiscoveryPolicy | None = None,
+        broadcast_address: Address = (BROADCAST_ADDRESS, LIFX_PORT),
+    ) -> None:
+        self._send_to = send_to
+        self.source_id = source_id
+        self.policy = policy or DiscoveryPolicy()
+        self.broadcast_address = broadcast_address
+        self.devices: dict[str, DiscoveredDevice] = {}
+        self.on_new_device: Callable[[DiscoveredDevice], None] | None = None
+        self.broadcast_interval = self.policy.min_broadcast_interval
+        self.next_broadcast_at = 0.0
+        self._seq_num = 0
+        self._sweep: SweepResult | None = None
+        self._sweep_seen: set[tuple[str, int]] = set()
+
+    def handle_message(self, message: Message, addr: Address) -> bool:
+        if not isinstance(message, StateService):
+            return False
+        now = time.monotonic()
+        mac = message.target_addr
+        service = message.payload.service
+        device = self.devices.get(mac)
+        is_new = device is None
+        if device is None:
+            device = DiscoveredDevice(mac=mac, ip=addr[0], first_seen=now, last_seen=now)
+            self.devices[mac] = device
+        device.ip = addr[0]
+        device.last_seen = now
+        device.services[service] = message.payload.port
+        if service == UDP_SERVICE:
+            device.port = message.payload.port
+
+        if self._sweep is not None:
+            self._sweep.replies += 1
+            # devices answer once per service and often repeat themselves
+            if (mac, service) in self._sweep_seen:
+                self._sweep.duplicates += 1
+            self._sweep_seen.add((mac, service))
+            if is_new:
+                self._sweep.new.append(mac)
+        if is_new and self.on_new_device is not None:
+            self.on_new_device(device)
+        return True
+
+    def missing(self, now: float | None = None) -> list[str]:
+        if now is None:
+            now = time.monotonic()
+        return [
+            mac
+            for mac, device in self.devices.items()
+            if now - device.last_seen > self.policy.stale_after
+        ]
+
+    async def sweep(self, *, broadcast: bool | None = None) -> SweepResult:
+        now = time.monotonic()
+        if broadcast is None:
+            broadcast = now >= self.next_broadcast_at
+        result = SweepResult(broadcast=broadcast)
+        if broadcast:
+            self._send_to(self._get_service(), self.broadcast_address)
+            result.probed = 1
+        else:
+            # incremental sweeps only chase devices that have gone quiet
+            for mac in self.missing(now):
+                self._send_to(self._get_service(mac), self.devices[mac].address)
+                result.probed += 1
+        if result.probed == 0:
+            return result
+
+        self._sweep = result
+        self._sweep_seen = set()
+        try:
+            await asyncio.sleep(self.policy.reply_window)
+        finally:
+            self._sweep = None
+        result.missing = self.missing()
+        if broadcast:
+            self._schedule_broadcast(now, stable=not result.new)
+        return result
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await self.sweep()
+            await asyncio.sleep(interval)
+
+    def _schedule_broadcast(self, now: float, *, stable: bool) -> None:
+        if stable:
+            self.broadcast_interval = min(
+                self.broadcast_interval * self.policy.backoff_factor,
+                self.policy.max_broadcast_interval,
+            )
+        else:
+            self.broadcast_interval = self.policy.min_broadcast_interval
+        self.next_broadcast_at = now + self.broadcast_interval
+
+    def _get_service(self, target_addr: str = BROADCAST_MAC) -> GetService:
+        self._seq_num = (self._seq_num + 1) % 256
+        return GetService(
+            source_id=self.source_id, seq_num=self._seq_num, target_addr=target_addr
+        )
@@ -0,0 +1,154 @@
+from collections.abc import Set as AbstractSet
+
+from aiolifx.fleet.registry import DeviceRecord
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.fleet.registry import RegistryField
+from aiolifx.models.product import Product
+
+CAPABILITIES = tuple(
+    name for name, field in Product.model_fields.items() if field.annotation is bool
+)
+
+EMPTY: frozenset[str] = frozenset()
+
+
+def _add(index: dict[str, set[str]], key: str | None, value: str) -> None:
+    if key is not None:
+        index.setdefault(key, set()).add(value)
+
+
+def _discard(index: dict[str, set[str]], key: str | None, value: str) -> None:
+    if key is None:
+        return
+    values = index.get(key)
+    if values is not None:
+        values.discard(value)
+        if not values:
+            del index[key]
+
+
+class RegistryIndexes:
+    def __init__(self, registry: DeviceRegistry) -> None:
+        self.registry = registry
+        self.all: set[str] = set()
+        self.by_group: dict[str, set[str]] = {}
+        self.by_location: dict[str, set[str]] = {}
+        self.by_label: dict[str, set[str]] = {}
+        self.by_capability: dict[str, set[str]] = {}
+        self.groups_by_label: dict[str, set[str]] = {}
+        self.locations_by_label: dict[str, set[str]] = {}
+        self.rebuild()
+        registry.listeners.append(self.on_registry_change)
+
+    def rebuild(self) -> None:
+        for index in (
+            self.by_group,
+            self.by_location,
+            self.by_label,
+            self.by_capability,
+            self.groups_by_label,
+            self.locations_by_label,
+        ):
+            index.clear()
+        self.all.clear()
+        for device in self.registry:
+            self.all.add(device.mac)
+            _add(self.by_group, device.group_id, device.mac)
+            _add(self.by_location, device.location_id, device.mac)
+            _add(self.by_label, device.label, device.mac)
+            self._index_capabilities(device)
+        for group in self.registry.groups.values():
+            _add(self.groups_by_label, group.label, group.id)
+        for location in self.registry.locations.values():
+            _add(self.locations_by_label, location.label, location.id)
+
+    def on_registry_change(
+        self, field: RegistryField, key: str, previous: str | int | None
+    ) -> None:
+        if field == RegistryField.GROUP_LABEL:
+            _discard(self.groups_by_label, str(previous), key)
+            _add(self.groups_by_label, self.registry.groups[key].label, key)
+            return
+        if field == RegistryField.LOCATION_LABEL:
+            _discard(self.locations_by_label, str(previous), key)
+            _add(self.locations_by_label, self.registry.locations[key].label, key)
+            return
+
+        device = self.registry.devices[key]
+        self.all.add(key)
+        if field == RegistryField.LABEL:
+            _discard(self.by_label, _as_key(previous), key)
+            _add(self.by_label, device.label, key)
+        elif field == RegistryField.GROUP:
+            _discard(self.by_group, _as_key(previous), key)
+            _add(self.by_group, device.group_id, key)
+            if device.group_id is not None:
+                group = self.registry.groups[device.group_id]
+                _add(self.groups_by_label, group.label, group.id)
+        elif field == RegistryField.LOCATION:
+            _discard(self.by_location, _as_key(previous), key)
+            _add(self.by_location, device.location_id, key)
+            if device.location_id is not None:
+                location = self.registry.locations[device.location_id]
+                _add(self.locations_by_label, location.label, location.id)
+        elif field == RegistryField.PRODUCT:
+            for members in self.by_capability.values():
+                members.discard(key)
+            self._index_capabilities(device)
+
+    def in_group(self, group_id: str) -> AbstractSet[str]:
+        return self.by_group.get(group_id, EMPTY)
+
+    def in_location(self, location_id: str) -> AbstractSet[str]:
+        return self.by_location.get(location_id, EMPTY)
+
+    def in_group_labeled(self, label: str) -> AbstractSet[str]:
+        return self._union(self.by_group, self.groups_by_label.get(label, EMPTY))
+
+    def in_location_labeled(self, label: str) -> AbstractSet[str]:
+        return self._union(self.by_location, self.locations_by_label.get(label, EMPTY))
+
+    def labeled(self, label: str) -> AbstractSet[str]:
+        return self.by_label.get(label, EMPTY)
+
+    def with_capability(self, capability: str) -> AbstractSet[str]:
+        if capability not in CAPABILITIES:
+            msg = f"Unknown capability {capability!r}"
+            raise ValueError(msg)
+        return self.by_capability.get(capability, EMPTY)
+
+    @staticmethod
+    def intersection(*sets: AbstractSet[str]) -> set[str]:
+        if not sets:
+            return set()
+        # start from the smallest operand so each step touches as few items as possible
+        ordered = sorted(sets, key=len)
+        result = set(ordered[0])
+        for other in ordered[1:]:
+            if not result:
+                break
+            result.intersection_update(other)
+        return result
+
+    @staticmethod
+    def union(*sets: AbstractSet[str]) -> set[str]:
+        return set().union(*sets)
+
+    def _union(
+        self, index: dict[str, set[str]], keys: AbstractSet[str]
+    ) -> AbstractSet[str]:
+        if len(keys) == 1:
+            return index.get(next(iter(keys)), EMPTY)
+        return self.union(*(index.get(key, EMPTY) for key in keys))
+
+    def _index_capabilities(self, device: DeviceRecord) -> None:
+        product = device.product
+        if product is None:
+            return
+        for capability in CAPABILITIES:
+            if getattr(product, capability):
+                _add(self.by_capability, capability, device.mac)
+
+
+def _as_key(value: str | int | None) -> str | None:
+    return None if value is None else str(value)
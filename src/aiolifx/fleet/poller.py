@@ -0,0 +1,252 @@
+import asyncio
+import contextlib
+import heapq
+import random
+from collections.abc import Callable
+from enum import Enum
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GetHostInfo
+from aiolifx.models.message_types import GetWifiInfo
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightGetPower
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePower
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.retry import RetryEngine
+
+
+class PollKind(Enum):
+    STATE = "state"
+    POWER = "power"
+    HOST_INFO = "host_info"
+    WIFI_INFO = "wifi_info"
+
+
+POLL_REQUESTS: dict[PollKind, type[Message]] = {
+    PollKind.STATE: LightGet,
+    PollKind.POWER: LightGetPower,
+    PollKind.HOST_INFO: GetHostInfo,
+    PollKind.WIFI_INFO: GetWifiInfo,
+}
+
+
+class PollerPolicy(BaseModel):
+    concurrency: int = 32
+    # LightGet cadence adapts between these bounds
+    fast_interval: float = 1.0
+    slow_interval: float = 30.0
+    backoff_factor: float = 1.5
+    interaction_hold: float = 30.0
+    # fixed cadences for the slower moving state
+    power_interval: float = 60.0
+    host_info_interval: float = 300.0
+    wifi_info_interval: float = 300.0
+
+    def fixed_interval(self, kind: PollKind) -> float:
+        return {
+            PollKind.POWER: self.power_interval,
+            PollKind.HOST_INFO: self.host_info_interval,
+            PollKind.WIFI_INFO: self.wifi_info_interval,
+        }[kind]
+
+
+class PollerCounters(BaseModel):
+    sent: int = 0
+    replies: int = 0
+    failures: int = 0
+    paused: int = 0
+    changes: int = 0
+
+
+class PolledDevice:
+    def __init__(self, mac: str, interval: float) -> None:
+        self.mac = mac
+        self.interval = interval
+        self.next_due: dict[PollKind, float] = {}
+        self.in_flight: set[PollKind] = set()
+        self.color: list[int] | None = None
+        self.power_level: int | None = None
+        self.interacting_until = 0.0
+
+
+class FleetPoller:
+    def __init__(
+        self,
+        engine: RetryEngine,
+        policy: PollerPolicy | None = None,
+        on_reply: Callable[[Message], None] | None = None,
+    ) -> None:
+        self.engine = engine
+        self.policy = policy or PollerPolicy()
+        self.on_reply = on_reply
+        self.counters = PollerCounters()
+        self.devices: dict[str, PolledDevice] = {}
+        self._queue: list[tuple[float, int, str, PollKind]] = []
+        self._scheduled = 0
+        self._semaphore = asyncio.Semaphore(self.policy.concurrency)
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def add(self, mac: str) -> None:
+        if mac in self.devices:
+            return
+        now = asyncio.get_running_loop().time()
+        device = self.devices[mac] = PolledDevice(mac, self.policy.fast_interval)
+        for kind in PollKind:
+            interval = self._interval(device, kind)
+            # spread first polls over one interval so a large fleet does not burst
+            self._schedule(device, kind, now + random.uniform(0, interval))  # noqa: S311
+
+    def remove(self, mac: str) -> None:
+        self.devices.pop(mac, None)
+
+    def interaction(self, mac: str) -> None:
+        device = self.devices.get(mac)
+        if device is None:
+            return
+        now = asyncio.get_running_loop().time()
+        device.interacting_until = now + self.policy.interaction_hold
+        device.interval = self.policy.fast_interval
+        due = now + device.interval
+        if due < device.next_due.get(PollKind.STATE, due):
+            self._schedule(device, PollKind.STATE, due)
+
+    def on_circuit_change(self, mac: str, state: CircuitState) -> None:
+        device = self.devices.get(mac)
+        if device is None or state != CircuitState.CLOSED:
+            return
+        # back online: resume at the fast cadence instead of waiting out the pause
+        now = asyncio.get_running_loop().time()
+        device.interval = self.policy.fast_interval
+        for kind in PollKind:
+            self._schedule(device, kind, now + self._interval(device, kind))
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self._queue:
+                    await self._sleep(None)
+                    continue
+                due, _, mac, kind = self._queue[0]
+                delay = due - loop.time()
+                if delay > 0:
+                    await self._sleep(delay)
+                    continue
+                heapq.heappop(self._queue)
+                device = self.devices.get(mac)
+                # entries are never removed in place; stale ones are skipped here
+                if device is None or device.next_due.get(kind) != due:
+                    continue
+                await self._dispatch(device, kind, loop.time())
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, device: PolledDevice, kind: PollKind, now: float) -> None:
+        paused_until = self._paused_until(device.mac, now)
+        if paused_until is not None:
+            self.counters.paused += 1
+            self._schedule(device, kind, paused_until)
+            return
+        if kind in device.in_flight:
+            self._schedule(device, kind, now + self._interval(device, kind))
+            return
+        await self._semaphore.acquire()
+        device.in_flight.add(kind)
+        task = asyncio.get_running_loop().create_task(self._poll(device, kind))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _paused_until(self, mac: str, now: float) -> float | None:
+        breaker = self.engine.breaker(mac)
+        if (
+            breaker is None
+            or breaker.state != CircuitState.OPEN
+            or breaker.opened_at is None
+            or breaker.reset_due(now)
+        ):
+            return None
+        return breaker.opened_at + breaker.policy.reset_timeout
+
+    async def _poll(self, device: PolledDevice, kind: PollKind) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            request = POLL_REQUESTS[kind](
+                source_id=self.engine.source_id,
+                target_addr=device.mac,
+                seq_num=self.engine.next_seq_num(device.mac),
+                response_requested=True,
+            )
+            self.counters.sent += 1
+            try:
+                reply = await self.engine.request(request)
+            except Exception:  # noqa: BLE001
+                # a timeout, an open circuit or the send itself failing, such as
+                # an unreachable network, all count against the device alike
+                self.counters.failures += 1
+                if kind == PollKind.STATE:
+                    self._back_off(device)
+            else:
+                self.counters.replies += 1
+                self._observe(device, reply, loop.time())
+                if self.on_reply is not None:
+                    self.on_reply(reply)
+        finally:
+            device.in_flight.discard(kind)
+            self._semaphore.release()
+            # rescheduled whatever happened, or this kind would never poll again
+            if device.mac in self.devices:
+                self._schedule(device, kind, loop.time() + self._interval(device, kind))
+
+    def _observe(self, device: PolledDevice, reply: Message, now: float) -> None:
+        if isinstance(reply, LightState):
+            changed = self._changed(device.color, reply.payload.color)
+            changed |= self._changed(device.power_level, reply.payload.power_level)
+            device.color = reply.payload.color
+            device.power_level = reply.payload.power_level
+        elif isinstance(reply, LightStatePower):
+            changed = self._changed(device.power_level, reply.payload.power_level)
+            device.power_level = reply.payload.power_level
+        else:
+            return
+        if changed:
+            self.counters.changes += 1
+        if changed or now < device.interacting_until:
+            device.interval = self.policy.fast_interval
+        else:
+            self._back_off(device)
+
+    def _back_off(self, device: PolledDevice) -> None:
+        device.interval = min(
+            device.interval * self.policy.backoff_factor, self.policy.slow_interval
+        )
+
+    @staticmethod
+    def _changed(previous: object, current: object) -> bool:
+        return previous is not None and previous != current
+
+    def _interval(self, device: PolledDevice, kind: PollKind) -> float:
+        if kind == PollKind.STATE:
+            return device.interval
+        return self.policy.fixed_interval(kind)
+
+    def _schedule(self, device: PolledDevice, kind: PollKind, due: float) -> None:
+        device.next_due[kind] = due
+        # the counter breaks ties so kinds never have to be compared
+        self._scheduled += 1
+        heapq.heappush(self._queue, (due, self._scheduled, device.mac, kind))
+        self._wakeup.set()
+
+    async def _sleep(self, delay: float | None) -> None:
+        self._wakeup.clear()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._wakeup.wait(), delay)
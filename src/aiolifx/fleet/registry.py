@@ -0,0 +1,301 @@
+import asyncio
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
+from enum import Enum
+from pathlib import Path
+from typing import ClassVar
+
+from pydantic import BaseModel
+from pydantic import ValidationError
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GroupPayload
+from aiolifx.models.message_types import LocationPayload
+from aiolifx.models.message_types import StateGroup
+from aiolifx.models.message_types import StateHostFirmware
+from aiolifx.models.message_types import StateLabel
+from aiolifx.models.message_types import StateLocation
+from aiolifx.models.message_types import StateVersion
+from aiolifx.models.product import Product
+from aiolifx.resources.const import LIFX_PORT
+from aiolifx.resources.products_defs import products_dict
+from aiolifx.transport.circuit_breaker import CircuitState
+
+REGISTRY_FORMAT_VERSION = 2
+
+
+def decode_label(label: str) -> str:
+    return label.split("\x00", 1)[0]
+
+
+def encode_id(raw_id: list[int]) -> str:
+    return bytes(raw_id).hex()
+
+
+class RegistryField(Enum):
+    DEVICE = "device"
+    LABEL = "label"
+    PRODUCT = "product"
+    GROUP = "group"
+    LOCATION = "location"
+    GROUP_LABEL = "group_label"
+    LOCATION_LABEL = "location_label"
+
+
+# field, key (a MAC, or a group/location ID for *_LABEL fields), previous value
+RegistryListener = Callable[[RegistryField, str, str | int | None], None]
+
+
+class CollectionRecord(BaseModel):
+    id: str
+    label: str
+    updated_at: int
+
+
+class DeviceRecord(BaseModel):
+    mac: str
+    ip: str | None = None
+    port: int = LIFX_PORT
+    vendor: int | None = None
+    product_id: int | None = None
+    hardware_version: int | None = None
+    firmware_build: int | None = None
+    firmware_version: int | None = None
+    label: str | None = None
+    group_id: str | None = None
+    group_updated_at: int | None = None
+    location_id: str | None = None
+    location_updated_at: int | None = None
+    last_seen: float | None = None
+    # wall clock time of the last reply since this process started; None means the
+    # record came from disk and has not been confirmed yet
+    validated_at: float | None = None
+    online: bool = True
+
+    @property
+    def product(self) -> Product | None:
+        if self.product_id is None:
+            return None
+        return products_dict.get(self.product_id)
+
+    @property
+    def firmware_components(self) -> tuple[int, int] | None:
+        if self.firmware_version is None:
+            return None
+        return (self.firmware_version >> 16, self.firmware_version & 0xFFFF)
+
+
+class RegistrySnapshot(BaseModel):
+    version: int = REGISTRY_FORMAT_VERSION
+    saved_at: float
+    devices: list[DeviceRecord]
+    groups: list[CollectionRecord] = []
+    locations: list[CollectionRecord] = []
+
+
+class DeviceRegistry:
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self.devices: dict[str, DeviceRecord] = {}
+        self.groups: dict[str, CollectionRecord] = {}
+        self.locations: dict[str, CollectionRecord] = {}
+        self.listeners: list[RegistryListener] = []
+        self.skipped_updates = 0
+        # why the on-disk cache was discarded at load time, if it was
+        self.load_error: str | None = None
+
+    def __contains__(self, mac: object) -> bool:
+        return mac in self.devices
+
+    def __iter__(self) -> Iterator[DeviceRecord]:
+        return iter(self.devices.values())
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def get(self, mac: str) -> DeviceRecord | None:
+        return self.devices.get(mac)
+
+    def group_label(self, device: DeviceRecord) -> str | None:
+        group = self.groups.get(device.group_id) if device.group_id else None
+        return None if group is None else group.label
+
+    def location_label(self, device: DeviceRecord) -> str | None:
+        location = self.locations.get(device.location_id) if device.location_id else None
+        return None if location is None else location.label
+
+    def record(self, mac: str) -> DeviceRecord:
+        device = self.devices.get(mac)
+        if device is None:
+            device = self.devices[mac] = DeviceRecord(mac=mac)
+            self._notify(RegistryField.DEVICE, mac, None)
+        return device
+
+    def update_address(self, mac: str, ip: str, port: int = LIFX_PORT) -> DeviceRecord:
+        device = self.record(mac)
+        device.ip = ip
+        device.port = port
+        self._touch(device)
+        return device
+
+    def apply(self, message: Message) -> bool:
+        handler = self._handlers.get(type(message))
+        if handler is None:
+            return False
+        device = self.record(message.target_addr)
+        handler(self, device, message)
+        self._touch(device)
+        return True
+
+    def on_circuit_change(self, mac: str, state: CircuitState) -> None:
+        device = self.devices.get(mac)
+        if device is not None:
+            device.online = state != CircuitState.OPEN
+
+    def unvalidated(self) -> list[DeviceRecord]:
+        return [device for device in self if device.validated_at is None]
+
+    async def revalidate(
+        self, refresh: Callable[[DeviceRecord], Awaitable[None]], concurrency: int = 16
+    ) -> None:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def revalidate_one(device: DeviceRecord) -> None:
+            async with semaphore:
+                await refresh(device)
+
+        await asyncio.gather(
+            *(revalidate_one(device) for device in self.unvalidated()),
+            return_exceptions=True,
+        )
+
+    def save(self, path: Path | None = None) -> None:
+        path = self._resolve_path(path)
+        snapshot = RegistrySnapshot(
+            saved_at=time.time(),
+            devices=list(self),
+            groups=list(self.groups.values()),
+            locations=list(self.locations.values()),
+        )
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(snapshot.model_dump_json(exclude_none=True))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "DeviceRegistry":
+        registry = cls(path)
+        if not path.exists():
+            return registry
+        try:
+            snapshot = RegistrySnapshot.model_validate_json(path.read_bytes())
+        except (OSError, ValidationError) as exc:
+            # the registry is only a warm-start cache; rediscovery rebuilds it
+            registry.load_error = str(exc)
+            return registry
+        if snapshot.version != REGISTRY_FORMAT_VERSION:
+            registry.load_error = f"Unsupported registry version {snapshot.version}"
+            return registry
+        for device in snapshot.devices:
+            device.validated_at = None
+            registry.devices[device.mac] = device
+        registry.groups = {group.id: group for group in snapshot.groups}
+        registry.locations = {location.id: location for location in snapshot.locations}
+        return registry
+
+    def _resolve_path(self, path: Path | None) -> Path:
+        path = path or self.path
+        if path is None:
+            msg = "No registry path configured"
+            raise ValueError(msg)
+        return path
+
+    def _touch(self, device: DeviceRecord) -> None:
+        now = time.time()
+        device.last_seen = now
+        device.validated_at = now
+        device.online = True
+
+    def _notify(self, field: RegistryField, key: str, previous: str | int | None) -> None:
+        for listener in self.listeners:
+            listener(field, key, previous)
+
+    def _apply_version(self, device: DeviceRecord, message: StateVersion) -> None:
+        previous = device.product_id
+        device.vendor = message.payload.vendor
+        device.product_id = message.payload.product
+        device.hardware_version = message.payload.version
+        if previous != device.product_id:
+            self._notify(RegistryField.PRODUCT, device.mac, previous)
+
+    def _apply_host_firmware(
+        self, device: DeviceRecord, message: StateHostFirmware
+    ) -> None:
+        device.firmware_build = message.payload.build
+        device.firmware_version = message.payload.version
+
+    def _apply_label(self, device: DeviceRecord, message: StateLabel) -> None:
+        previous = device.label
+        device.label = decode_label(message.payload.label)
+        if previous != device.label:
+            self._notify(RegistryField.LABEL, device.mac, previous)
+
+    def _apply_group(self, device: DeviceRecord, message: StateGroup) -> None:
+        payload = message.payload
+        if (
+            device.group_updated_at is not None
+            and payload.updated_at <= device.group_updated_at
+        ):
+            self.skipped_updates += 1
+            return
+        group_id = encode_id(payload.group)
+        self._update_collection(self.groups, RegistryField.GROUP_LABEL, group_id, payload)
+        device.group_updated_at = payload.updated_at
+        previous = device.group_id
+        if previous != group_id:
+            device.group_id = group_id
+            self._notify(RegistryField.GROUP, device.mac, previous)
+
+    def _apply_location(self, device: DeviceRecord, message: StateLocation) -> None:
+        payload = message.payload
+        if (
+            device.location_updated_at is not None
+            and payload.updated_at <= device.location_updated_at
+        ):
+            self.skipped_updates += 1
+            return
+        location_id = encode_id(payload.location)
+        self._update_collection(
+            self.locations, RegistryField.LOCATION_LABEL, location_id, payload
+        )
+        device.location_updated_at = payload.updated_at
+        previous = device.location_id
+        if previous != location_id:
+            device.location_id = location_id
+            self._notify(RegistryField.LOCATION, device.mac, previous)
+
+    def _update_collection(
+        self,
+        collections: dict[str, CollectionRecord],
+        field: RegistryField,
+        collection_id: str,
+        payload: GroupPayload | LocationPayload,
+    ) -> None:
+        record = collections.get(collection_id)
+        if record is not None and payload.updated_at <= record.updated_at:
+            return
+        label = decode_label(payload.label)
+        collections[collection_id] = CollectionRecord(
+            id=collection_id, label=label, updated_at=payload.updated_at
+        )
+        if record is not None and record.label != label:
+            self._notify(field, collection_id, record.label)
+
+    _handlers: ClassVar[dict[type[Message], Callable[..., None]]] = {
+        StateVersion: _apply_version,
+        StateHostFirmware: _apply_host_firmware,
+        StateLabel: _apply_label,
+        StateGroup: _apply_group,
+        StateLocation: _apply_location,
+    }
@@ -0,0 +1,338 @@
+import re
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Set as AbstractSet
+from fnmatch import fnmatchcase
+from functools import lru_cache
+
+from aiolifx.fleet.indexes import CAPABILITIES
+from aiolifx.fleet.indexes import RegistryIndexes
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.fleet.registry import RegistryField
+
+TOKEN_RE = re.compile(
+    r"""\s*(?:
+        (?P<lparen>\() |
+        (?P<rparen>\)) |
+        (?P<term>(?P<key>[a-z]+):(?:"(?P<quoted>[^"]*)"|(?P<bare>[^\s()"]+))) |
+        (?P<word>[A-Za-z]+)
+    )""",
+    re.VERBOSE,
+)
+
+OPERATORS = frozenset({"and", "or", "not"})
+
+WILDCARDS = frozenset("*?[")
+
+
+class SelectorSyntaxError(ValueError):
+    pass
+
+
+class Change:
+    def __init__(
+        self,
+        registry: DeviceRegistry,
+        field: RegistryField,
+        key: str,
+        previous: str | int | None,
+    ) -> None:
+        self.registry = registry
+        self.field = field
+        self.key = key
+        self.previous = previous
+
+
+class Node(ABC):
+    @abstractmethod
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]: ...
+
+    @abstractmethod
+    def affected_by(self, change: Change) -> bool: ...
+
+
+class All(Node):
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.all
+
+    def affected_by(self, change: Change) -> bool:
+        return change.field == RegistryField.DEVICE
+
+
+class Term(Node):
+    def __init__(self, key: str, pattern: str) -> None:
+        self.key = key
+        self.pattern = pattern
+        self.is_wildcard = not WILDCARDS.isdisjoint(pattern)
+
+    def matches(self, value: str | int | None) -> bool:
+        if value is None:
+            return False
+        return fnmatchcase(str(value), self.pattern)
+
+    def labels(self, candidates: AbstractSet[str]) -> list[str]:
+        if not self.is_wildcard:
+            return [self.pattern] if self.pattern in candidates else []
+        return [label for label in candidates if fnmatchcase(label, self.pattern)]
+
+
+class LabelTerm(Term):
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        if not self.is_wildcard:
+            return indexes.labeled(self.pattern)
+        return indexes.union(
+            *(indexes.labeled(label) for label in self.labels(indexes.by_label.keys()))
+        )
+
+    def affected_by(self, change: Change) -> bool:
+        if change.field != RegistryField.LABEL:
+            return False
+        device = change.registry.devices[change.key]
+        return self.matches(change.previous) or self.matches(device.label)
+
+
+class GroupTerm(Term):
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.union(
+            *(
+                indexes.in_group_labeled(label)
+                for label in self.labels(indexes.groups_by_label.keys())
+            )
+        )
+
+    def affected_by(self, change: Change) -> bool:
+        groups = change.registry.groups
+        if change.field == RegistryField.GROUP_LABEL:
+            return self.matches(change.previous) or self.matches(groups[change.key].label)
+        if change.field == RegistryField.GROUP:
+            device = change.registry.devices[change.key]
+            return any(
+                group_id in groups and self.matches(groups[group_id].label)
+                for group_id in (change.previous, device.group_id)
+                if isinstance(group_id, str)
+            )
+        return False
+
+
+class LocationTerm(Term):
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.union(
+            *(
+                indexes.in_location_labeled(label)
+                for label in self.labels(indexes.locations_by_label.keys())
+            )
+        )
+
+    def affected_by(self, change: Change) -> bool:
+        locations = change.registry.locations
+        if change.field == RegistryField.LOCATION_LABEL:
+            return self.matches(change.previous) or self.matches(
+                locations[change.key].label
+            )
+        if change.field == RegistryField.LOCATION:
+            device = change.registry.devices[change.key]
+            return any(
+                location_id in locations and self.matches(locations[location_id].label)
+                for location_id in (change.previous, device.location_id)
+                if isinstance(location_id, str)
+            )
+        return False
+
+
+class CapabilityTerm(Term):
+    def __init__(self, key: str, pattern: str) -> None:
+        super().__init__(key, pattern)
+        if pattern not in CAPABILITIES:
+            msg = f"Unknown capability {pattern!r}"
+            raise SelectorSyntaxError(msg)
+
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.with_capability(self.pattern)
+
+    def affected_by(self, change: Change) -> bool:
+        return change.field == RegistryField.PRODUCT
+
+
+class Not(Node):
+    def __init__(self, operand: Node) -> None:
+        self.operand = operand
+
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.all - self.operand.evaluate(indexes)
+
+    def affected_by(self, change: Change) -> bool:
+        return change.field == RegistryField.DEVICE or self.operand.affected_by(change)
+
+
+class And(Node):
+    def __init__(self, operands: list[Node]) -> None:
+        # negations are cheaper as set differences once the positive terms have
+        # narrowed the candidates down
+        self.positive = [operand for operand in operands if not isinstance(operand, Not)]
+        self.negative = [operand for operand in operands if isinstance(operand, Not)]
+
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        if self.positive:
+            result = indexes.intersection(
+                *(operand.evaluate(indexes) for operand in self.positive)
+            )
+        else:
+            result = set(indexes.all)
+        for operand in self.negative:
+            if not result:
+                break
+            result -= operand.operand.evaluate(indexes)
+        return result
+
+    def affected_by(self, change: Change) -> bool:
+        return any(
+            operand.affected_by(change) for operand in [*self.positive, *self.negative]
+        )
+
+
+class Or(Node):
+    def __init__(self, operands: list[Node]) -> None:
+        self.operands = operands
+
+    def evaluate(self, indexes: RegistryIndexes) -> AbstractSet[str]:
+        return indexes.union(*(operand.evaluate(indexes) for operand in self.operands))
+
+    def affected_by(self, change: Change) -> bool:
+        return any(operand.affected_by(change) for operand in self.operands)
+
+
+TERMS: dict[str, type[Term]] = {
+    "label": LabelTerm,
+    "group": GroupTerm,
+    "location": LocationTerm,
+    "cap": CapabilityTerm,
+}
+
+
+def tokenize(expression: str) -> list[tuple[str, str, str]]:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN_RE.match(expression, position)
+        if match is None:
+            msg = f"Unexpected input at {position}: {expression[position:]!r}"
+            raise SelectorSyntaxError(msg)
+        position = match.end()
+        if match["term"]:
+            value = match["quoted"] if match["quoted"] is not None else match["bare"]
+            tokens.append(("term", match["key"], value))
+        elif match["word"]:
+            word = match["word"].lower()
+            if word not in OPERATORS:
+                msg = f"Unknown operator {match['word']!r}"
+                raise SelectorSyntaxError(msg)
+            tokens.append((word, "", ""))
+        else:
+            tokens.append(("lparen" if match["lparen"] else "rparen", "", ""))
+    return tokens
+
+
+class Parser:
+    def __init__(self, tokens: list[tuple[str, str, str]]) -> None:
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            return All()
+        node = self.parse_or()
+        if self.position != len(self.tokens):
+            msg = f"Unexpected {self.tokens[self.position][0]!r}"
+            raise SelectorSyntaxError(msg)
+        return node
+
+    def peek(self) -> str | None:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position][0]
+        return None
+
+    def parse_or(self) -> Node:
+        operands = [self.parse_and()]
+        while self.peek() == "or":
+            self.position += 1
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(operands)
+
+    def parse_and(self) -> Node:
+        operands = [self.parse_not()]
+        while self.peek() == "and":
+            self.position += 1
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(operands)
+
+    def parse_not(self) -> Node:
+        if self.peek() == "not":
+            self.position += 1
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Node:
+        if self.position >= len(self.tokens):
+            msg = "Unexpected end of selector"
+            raise SelectorSyntaxError(msg)
+        kind, key, value = self.tokens[self.position]
+        self.position += 1
+        if kind == "lparen":
+            node = self.parse_or()
+            if self.peek() != "rparen":
+                msg = "Missing closing parenthesis"
+                raise SelectorSyntaxError(msg)
+            self.position += 1
+            return node
+        if kind == "term":
+            term = TERMS.get(key)
+            if term is None:
+                msg = f"Unknown selector key {key!r}"
+                raise SelectorSyntaxError(msg)
+            return term(key, value)
+        msg = f"Unexpected {kind!r}"
+        raise SelectorSyntaxError(msg)
+
+
+@lru_cache(maxsize=4096)
+def compile_selector(expression: str) -> Node:
+    return Parser(tokenize(expression)).parse()
+
+
+class SelectorEngine:
+    def __init__(self, indexes: RegistryIndexes, max_cached: int = 4096) -> None:
+        self.indexes = indexes
+        self.max_cached = max_cached
+        self._results: dict[str, tuple[Node, frozenset[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # registered after the indexes so they are current when we are notified
+        indexes.registry.listeners.append(self.on_registry_change)
+
+    def select(self, expression: str) -> frozenset[str]:
+        cached = self._results.get(expression)
+        if cached is not None:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        plan = compile_selector(expression)
+        result = frozenset(plan.evaluate(self.indexes))
+        if len(self._results) >= self.max_cached:
+            del self._results[next(iter(self._results))]
+        self._results[expression] = (plan, result)
+        return result
+
+    def on_registry_change(
+        self, field: RegistryField, key: str, previous: str | int | None
+    ) -> None:
+        change = Change(self.indexes.registry, field, key, previous)
+        stale = [
+            expression
+            for expression, (plan, _) in self._results.items()
+            if plan.affected_by(change)
+        ]
+        for expression in stale:
+            del self._results[expression]
+        self.invalidations += len(stale)
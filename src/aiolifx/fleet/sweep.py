@@ -0,0 +1,231 @@
+import asyncio
+import random
+import time
+from collections.abc import Callable
+
+from pydantic import BaseModel
+
+from aiolifx.fleet.discovery import Discovery
+from aiolifx.fleet.discovery import SweepResult
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightState
+from aiolifx.resources.const import HEADER_SIZE_BYTES
+from aiolifx.transport.circuit_breaker import CircuitBreaker
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.udp import Address
+
+# LightState is the largest common reply; kernels also charge per-skb overhead
+REPLY_SIZE_BYTES = HEADER_SIZE_BYTES + 52
+SKB_OVERHEAD_BYTES = 768
+
+
+def receive_capacity(receive_buffer: int) -> int:
+    return max(1, receive_buffer // (REPLY_SIZE_BYTES + SKB_OVERHEAD_BYTES))
+
+
+class WindowedSweepPolicy(BaseModel):
+    initial_window: int = 32
+    min_window: int = 4
+    max_window: int = 512
+    window_increase: int = 8
+    # a wave losing more than this shrinks the window multiplicatively
+    loss_threshold: float = 0.02
+    decrease_factor: float = 0.5
+    # sends within a wave are jittered over this span to avoid synchronised replies
+    spread: float = 0.02
+    reply_window: float = 0.25
+
+
+class WaveResult(BaseModel):
+    window: int
+    sent: int
+    replies: int
+    # datagrams the kernel discarded on our socket while the wave was in flight
+    receive_drops: int | None = None
+
+    @property
+    def dropped(self) -> int:
+        return self.sent - self.replies
+
+    @property
+    def drop_rate(self) -> float:
+        return self.dropped / self.sent if self.sent else 0.0
+
+    @property
+    def congested(self) -> float:
+        if self.receive_drops is None:
+            return self.drop_rate
+        return self.receive_drops / self.sent if self.sent else 0.0
+
+
+class WindowedSweepReport(BaseModel):
+    waves: list[WaveResult] = []
+    skipped: list[str] = []
+    discovery: SweepResult | None = None
+    duration: float = 0.0
+
+    @property
+    def sent(self) -> int:
+        return sum(wave.sent for wave in self.waves)
+
+    @property
+    def replies(self) -> int:
+        return sum(wave.replies for wave in self.waves)
+
+    @property
+    def dropped(self) -> int:
+        return self.sent - self.replies
+
+    @property
+    def drop_rate(self) -> float:
+        return self.dropped / self.sent if self.sent else 0.0
+
+    @property
+    def receive_drops(self) -> int | None:
+        drops = [wave.receive_drops for wave in self.waves]
+        if not drops or None in drops:
+            return None
+        return sum(drop for drop in drops if drop is not None)
+
+
+class WindowedSweeper:
+    def __init__(  # noqa: PLR0913
+        self,
+        discovery: Discovery,
+        send_to: Callable[[Message, Address], None],
+        policy: WindowedSweepPolicy | None = None,
+        request: type[Message] = LightGet,
+        *,
+        reply: type[Message] = LightState,
+        receive_buffer: int | None = None,
+        breaker: Callable[[str], CircuitBreaker | None] | None = None,
+        receive_drops: Callable[[], int] | None = None,
+    ) -> None:
+        self.discovery = discovery
+        self._send_to = send_to
+        self.policy = policy or WindowedSweepPolicy()
+        self.request = request
+        self.reply = reply
+        self._breaker = breaker
+        self._receive_drops = receive_drops
+        self.window = self.policy.initial_window
+        if receive_buffer is not None:
+            self.window = max(
+                self.policy.min_window,
+                min(receive_capacity(receive_buffer), self.policy.max_window),
+            )
+        self._seq_num = 0
+        # mac -> seq_num of the request still waiting for its reply
+        self._outstanding: dict[str, int] = {}
+        self._wave: WaveResult | None = None
+        self._wave_done: asyncio.Event | None = None
+
+    def handle_message(self, message: Message, addr: Address) -> bool:  # noqa: ARG002
+        if self._wave is None or message.source_id != self.discovery.source_id:
+            return False
+        if not isinstance(message, self.reply):
+            return False
+        if self._outstanding.get(message.target_addr) != message.seq_num:
+            return False
+        del self._outstanding[message.target_addr]
+        self._wave.replies += 1
+        device = self.discovery.devices.get(message.target_addr)
+        if device is not None:
+            device.last_seen = time.monotonic()
+        if self._wave.replies == self._wave.sent and self._wave_done is not None:
+            self._wave_done.set()
+        return True
+
+    async def sweep(self, *, discover: bool | None = None) -> WindowedSweepReport:
+        started = time.monotonic()
+        report = WindowedSweepReport()
+        macs, report.skipped = self._partition(started)
+        while macs:
+            wave, macs = macs[: self.window], macs[self.window :]
+            result = await self._send_wave(wave)
+            report.waves.append(result)
+            self._adapt(result)
+        # known devices never need a broadcast; only go looking for unknowns
+        if discover is None:
+            discover = started >= self.discovery.next_broadcast_at
+        if discover:
+            report.discovery = await self.discovery.sweep(broadcast=True)
+        report.duration = time.monotonic() - started
+        return report
+
+    def _partition(self, now: float) -> tuple[list[str], list[str]]:
+        # devices already known to be offline would only read as lost replies and
+        # shrink the window for everyone else; discovery goes after them instead
+        stale = set(self.discovery.missing(now))
+        available: list[str] = []
+        skipped: list[str] = []
+        for mac in self.discovery.devices:
+            if mac in stale or self._circuit_open(mac):
+                skipped.append(mac)
+            else:
+                available.append(mac)
+        return available, skipped
+
+    def _circuit_open(self, mac: str) -> bool:
+        if self._breaker is None:
+            return False
+        breaker = self._breaker(mac)
+        return breaker is not None and breaker.state == CircuitState.OPEN
+
+    async def _send_wave(self, macs: list[str]) -> WaveResult:
+        loop = asyncio.get_running_loop()
+        result = WaveResult(window=self.window, sent=len(macs), replies=0)
+        self._wave = result
+        self._wave_done = asyncio.Event()
+        self._outstanding = {}
+        drops_before = self._receive_drops() if self._receive_drops else None
+        handles = [
+            loop.call_later(
+                random.uniform(0, self.policy.spread),  # noqa: S311
+                self._send_one,
+                mac,
+            )
+            for mac in macs
+        ]
+        try:
+            await asyncio.wait_for(
+                self._wave_done.wait(), self.policy.spread + self.policy.reply_window
+            )
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for handle in handles:
+                handle.cancel()
+            self._wave = None
+            self._wave_done = None
+            self._outstanding = {}
+        if self._receive_drops is not None and drops_before is not None:
+            result.receive_drops = self._receive_drops() - drops_before
+        return result
+
+    def _send_one(self, mac: str) -> None:
+        device = self.discovery.devices.get(mac)
+        if device is None:
+            return
+        self._seq_num = (self._seq_num + 1) % 256
+        message = self.request(
+            source_id=self.discovery.source_id,
+            target_addr=mac,
+            seq_num=self._seq_num,
+            response_requested=True,
+        )
+        self._outstanding[mac] = self._seq_num
+        self._send_to(message, device.address)
+
+    def _adapt(self, result: WaveResult) -> None:
+        # additive increase while waves arrive intact, multiplicative decrease on
+        # loss, so the window tracks what the receive path can actually absorb
+        if result.congested > self.policy.loss_threshold:
+            self.window = max(
+                self.policy.min_window, int(self.window * self.policy.decrease_factor)
+            )
+        elif result.sent >= self.window:
+            self.window = min(
+                self.policy.max_window, self.window + self.policy.window_increase
+            )
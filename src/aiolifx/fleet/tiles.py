@@ -0,0 +1,135 @@
+import asyncio
+import contextlib
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import TileGet64
+from aiolifx.models.message_types import TileGet64Payload
+from aiolifx.models.message_types import TileState64
+from aiolifx.streaming.diff import TILE_SIZE
+
+
+class TileSnapshot:
+    def __init__(self, mac: str, tiles: int) -> None:
+        self.mac = mac
+        self.pixels: npt.NDArray[np.uint16] = np.zeros(
+            (tiles, TILE_SIZE, TILE_SIZE, 4), dtype=np.uint16
+        )
+        self.received = np.zeros(tiles, dtype=bool)
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.received.all())
+
+    def missing(self) -> list[int]:
+        return np.flatnonzero(~self.received).tolist()
+
+    def fill(
+        self, tile_index: int, x: int, y: int, width: int, colors: list[list[int]]
+    ) -> None:
+        if (
+            not 0 <= tile_index < len(self.pixels)
+            or not 0 <= x < TILE_SIZE
+            or not 0 <= y < TILE_SIZE
+            or width <= 0
+        ):
+            return
+        # the reply is a row major rectangle starting at (x, y)
+        width = min(width, TILE_SIZE - x)
+        rows = min(len(colors) // width, TILE_SIZE - y)
+        block = np.asarray(colors[: rows * width], dtype=np.uint16).reshape(
+            rows, width, 4
+        )
+        self.pixels[tile_index, y : y + rows, x : x + width] = block
+        self.received[tile_index] = True
+
+
+class TileSnapshotRequest:
+    def __init__(
+        self, snapshot: TileSnapshot, seq_num: int, future: "asyncio.Future[TileSnapshot]"
+    ) -> None:
+        self.snapshot = snapshot
+        self.seq_num = seq_num
+        self.future = future
+
+
+class TileSnapshotReader:
+    def __init__(
+        self,
+        send: Callable[[Message], None],
+        source_id: int,
+        timeout: float = 1.0,
+        retry_interval: float = 0.25,
+    ) -> None:
+        self._send = send
+        self.source_id = source_id
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._seq_num = 0
+        self._requests: dict[str, TileSnapshotRequest] = {}
+
+    def handle_message(self, message: Message) -> bool:
+        request = self._requests.get(message.target_addr)
+        if (
+            request is None
+            or not isinstance(message, TileState64)
+            or message.source_id != self.source_id
+            or message.seq_num != request.seq_num
+        ):
+            return False
+        payload = message.payload
+        request.snapshot.fill(
+            payload.tile_index, payload.x, payload.y, payload.width, payload.colors
+        )
+        if request.snapshot.complete and not request.future.done():
+            request.future.set_result(request.snapshot)
+        return True
+
+    async def fetch(
+        self, mac: str, tiles: int, timeout: float | None = None
+    ) -> TileSnapshot:
+        # One TileGet64 spanning the whole chain makes every tile answer at once.
+        # Tiles whose reply is lost are asked for again individually, in a single
+        # burst, until the timeout; a partial snapshot reports what is missing.
+        loop = asyncio.get_running_loop()
+        if mac in self._requests:
+            msg = f"A tile snapshot for {mac} is already in flight"
+            raise RuntimeError(msg)
+        self._seq_num = (self._seq_num + 1) % 256
+        snapshot = TileSnapshot(mac, tiles)
+        request = self._requests[mac] = TileSnapshotRequest(
+            snapshot, self._seq_num, loop.create_future()
+        )
+        deadline = loop.time() + (self.timeout if timeout is None else timeout)
+        try:
+            self._send(self._tile_get(mac, 0, tiles))
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        asyncio.shield(request.future),
+                        min(self.retry_interval, remaining),
+                    )
+                if request.future.done():
+                    break
+                for tile_index in snapshot.missing():
+                    self._send(self._tile_get(mac, tile_index, 1))
+        finally:
+            del self._requests[mac]
+            request.future.cancel()
+        return snapshot
+
+    def _tile_get(self, mac: str, tile_index: int, length: int) -> TileGet64:
+        return TileGet64(
+            source_id=self.source_id,
+            target_addr=mac,
+            seq_num=self._seq_num,
+            payload=TileGet64Payload(
+                tile_index=tile_index, length=length, x=0, y=0, width=TILE_SIZE
+            ),
+        )
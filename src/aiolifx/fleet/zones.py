@@ -0,0 +1,145 @@
+import asyncio
+import contextlib
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import MultiZoneGetColorZones
+from aiolifx.models.message_types import MultiZoneGetColorZonesPayload
+from aiolifx.models.message_types import MultiZoneGetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateMultiZone
+from aiolifx.models.message_types import MultiZoneStateZone
+
+# MultiZoneGetColorZones takes an inclusive uint8 range
+LAST_ZONE_INDEX = 255
+
+
+class ZoneBuffer:
+    def __init__(self, mac: str, zones_count: int = 0) -> None:
+        self.mac = mac
+        self.colors: npt.NDArray[np.uint16] = np.zeros((zones_count, 4), dtype=np.uint16)
+        self.received = np.zeros(zones_count, dtype=bool)
+        self.counted = False
+
+    @property
+    def zones_count(self) -> int:
+        return len(self.colors)
+
+    @property
+    def complete(self) -> bool:
+        return self.counted and bool(self.received.all())
+
+    def missing(self) -> list[int]:
+        return np.flatnonzero(~self.received).tolist()
+
+    def fill(self, zones_count: int, index: int, colors: list[list[int]]) -> None:
+        # every reply carries the strip length, so the buffer is sized by the
+        # first one to arrive and never by the requester's guess
+        if zones_count != self.zones_count:
+            self._resize(zones_count)
+        self.counted = True
+        end = min(index + len(colors), zones_count)
+        if end <= index:
+            return
+        self.colors[index:end] = colors[: end - index]
+        self.received[index:end] = True
+
+    def _resize(self, zones_count: int) -> None:
+        colors = np.zeros((zones_count, 4), dtype=np.uint16)
+        received = np.zeros(zones_count, dtype=bool)
+        kept = min(zones_count, self.zones_count)
+        colors[:kept] = self.colors[:kept]
+        received[:kept] = self.received[:kept]
+        self.colors = colors
+        self.received = received
+
+
+class ZoneRequest:
+    def __init__(
+        self, buffer: ZoneBuffer, seq_num: int, future: "asyncio.Future[ZoneBuffer]"
+    ) -> None:
+        self.buffer = buffer
+        self.seq_num = seq_num
+        self.future = future
+
+
+class ZoneAssembler:
+    def __init__(
+        self, send: Callable[[Message], None], source_id: int, timeout: float = 1.0
+    ) -> None:
+        self._send = send
+        self.source_id = source_id
+        self.timeout = timeout
+        self._seq_num = 0
+        self._requests: dict[str, ZoneRequest] = {}
+
+    def handle_message(self, message: Message) -> bool:
+        request = self._requests.get(message.target_addr)
+        if (
+            request is None
+            or message.source_id != self.source_id
+            or message.seq_num != request.seq_num
+        ):
+            return False
+        payload = message.payload
+        if isinstance(message, MultiZoneStateExtendedColorZones):
+            request.buffer.fill(
+                payload.zones_count,
+                payload.zone_index,
+                payload.colors[: payload.colors_count],
+            )
+        elif isinstance(message, MultiZoneStateMultiZone):
+            request.buffer.fill(payload.count, payload.index, payload.color)
+        elif isinstance(message, MultiZoneStateZone):
+            request.buffer.fill(payload.count, payload.index, [payload.color])
+        else:
+            return False
+        if request.buffer.complete and not request.future.done():
+            request.future.set_result(request.buffer)
+        return True
+
+    async def fetch(
+        self,
+        mac: str,
+        *,
+        extended: bool,
+        zones_count: int = 0,
+        timeout: float | None = None,
+    ) -> ZoneBuffer:
+        # Resolves as soon as every zone has arrived; after the timeout whatever
+        # did arrive is returned and the buffer reports what is missing.
+        loop = asyncio.get_running_loop()
+        if mac in self._requests:
+            msg = f"A zone fetch for {mac} is already in flight"
+            raise RuntimeError(msg)
+        self._seq_num = (self._seq_num + 1) % 256
+        buffer = ZoneBuffer(mac, zones_count)
+        request = self._requests[mac] = ZoneRequest(
+            buffer, self._seq_num, loop.create_future()
+        )
+        try:
+            self._send(self._request_message(mac, extended=extended))
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    request.future, self.timeout if timeout is None else timeout
+                )
+        finally:
+            del self._requests[mac]
+        return buffer
+
+    def _request_message(self, mac: str, *, extended: bool) -> Message:
+        if extended:
+            return MultiZoneGetExtendedColorZones(
+                source_id=self.source_id, target_addr=mac, seq_num=self._seq_num
+            )
+        return MultiZoneGetColorZones(
+            source_id=self.source_id,
+            target_addr=mac,
+            seq_num=self._seq_num,
+            payload=MultiZoneGetColorZonesPayload(
+                start_index=0, end_index=LAST_ZONE_INDEX
+            ),
+        )
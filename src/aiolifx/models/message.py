@@ -117,5 +117,5 @@ class Message(BaseModel):
         return reserved_64 + message_type + reserved_16
 
     def get_msg_size(self) -> int:
-        payload_size_bytes = len(self.payload)
+        payload_size_bytes = len(self.get_payload())
         return HEADER_SIZE_BYTES + payload_size_bytes
@@ -38,10 +38,6 @@ def float32_format(d: float) -> bytes:
     return little_endian(bitstring.pack("float:32", d))
 
 
-def float_format(d: float) -> bytes:
-    return little_endian(bitstring.pack("float", d))
-
-
 def uint64_format(d: int) -> bytes:
     return little_endian(bitstring.pack("uint:64", d))
 
@@ -169,6 +165,14 @@ class TileEffectSkyType(Enum):
     CLOUDS = 2
 
 
+class Waveform(Enum):
+    SAW = 0
+    SINE = 1
+    HALF_SINE = 2
+    TRIANGLE = 3
+    PULSE = 4
+
+
 class ButtonTargetRelays:
     def __init__(self, data) -> None:
         self.relays_count = data[0]
@@ -346,7 +350,7 @@ class StateLabel(Message):
 
     def get_payload(self) -> bytes:
         field_len_bytes = 32
-        label = b"".join(uint8_format(c) for c in self.payload.label)
+        label = b"".join(uint8_format(ord(c)) for c in self.payload.label)
         padding = b"".join(
             uint8_format(0) for i in range(field_len_bytes - len(self.payload.label))
         )
@@ -411,7 +415,7 @@ class StateLocation(Message):
 
     def get_payload(self) -> bytes:
         location = b"".join(uint8_format(b) for b in self.payload.location)
-        label = b"".join(uint8_format(c) for c in self.payload.label)
+        label = b"".join(uint8_format(ord(c)) for c in self.payload.label)
         label_padding = b"".join(
             uint8_format(0) for i in range(32 - len(self.payload.label))
         )
@@ -435,7 +439,7 @@ class StateGroup(Message):
 
     def get_payload(self) -> bytes:
         group = b"".join(uint8_format(b) for b in self.payload.group)
-        label = b"".join(uint8_format(c) for c in self.payload.label)
+        label = b"".join(uint8_format(ord(c)) for c in self.payload.label)
         label_padding = b"".join(
             uint8_format(0) for i in range(32 - len(self.payload.label))
         )
@@ -453,7 +457,7 @@ class Acknowledgement(Message):
 
 
 class ByteArrayPayload(BaseModel):
-    byte_array: str
+    byte_array: list[int]
 
 
 class EchoRequest(Message):
@@ -573,7 +577,7 @@ class LightStatePayload(BaseModel):
     color: list[int]
     reserved1: int
     power_level: int
-    label: int
+    label: bytes
     reserved2: int
 
 
@@ -966,6 +970,10 @@ class TileDevice(BaseModel):
     firmware_version_major: int
 
 
+TILE_CHAIN_SLOTS = 16
+TILE_DEVICE_BYTES = 55
+
+
 class TileStateDeviceChainPayload(BaseModel):
     start_index: int
     tile_devices: list[TileDevice]
@@ -985,17 +993,25 @@ class TileStateDeviceChain(Message):
                     int16_format(tile_device.accel_meas_x),
                     int16_format(tile_device.accel_meas_y),
                     int16_format(tile_device.accel_meas_z),
-                    float_format(tile_device.user_x),
-                    float_format(tile_device.user_y),
+                    int16_format(0),
+                    float32_format(tile_device.user_x),
+                    float32_format(tile_device.user_y),
                     uint8_format(tile_device.width),
                     uint8_format(tile_device.height),
+                    uint8_format(0),
                     uint32_format(tile_device.device_version_vendor),
                     uint32_format(tile_device.device_version_product),
+                    uint32_format(0),
                     uint64_format(tile_device.firmware_build),
+                    uint64_format(0),
                     uint16_format(tile_device.firmware_version_minor),
                     uint16_format(tile_device.firmware_version_major),
+                    uint32_format(0),
                 ]
             )
+        # the chain always has room for 16 tiles, unused ones are zeroed
+        unused = TILE_CHAIN_SLOTS - len(self.payload.tile_devices)
+        tile_devices += bytes(TILE_DEVICE_BYTES * unused)
         tile_devices_count = uint8_format(self.payload.tile_devices_count)
         return start_index + tile_devices + tile_devices_count
 
@@ -1286,7 +1302,7 @@ class SetButtonConfig(Message):
         return haptic_duration_ms + backlight_on_color + backlight_off_color
 
 
-class StateButtonConfig(Message):
+class StateButtonConfig(SetButtonConfig):
     message_type: MessageType = MessageType.StateButtonConfig
 
 
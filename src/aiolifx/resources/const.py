@@ -3,3 +3,9 @@ BROADCAST_MAC = "00:00:00:00:00:00"
 BROADCAST_SOURCE_ID = 0
 
 HEADER_SIZE_BYTES = 36
+
+BROADCAST_ADDRESS = "255.255.255.255"
+
+LIFX_PORT = 56700
+
+UDP_SERVICE = 1
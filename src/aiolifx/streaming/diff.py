@@ -0,0 +1,161 @@
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from aiolifx.color.difference import JUST_NOTICEABLE_DIFFERENCE
+from aiolifx.color.difference import perceptible
+from aiolifx.models.message_types import TileSet64
+from aiolifx.models.message_types import TileSet64Payload
+
+TILE_SIZE = 8
+TILE_PIXELS = TILE_SIZE * TILE_SIZE
+
+HsbkArray = npt.NDArray[np.uint16]
+
+
+class FrameDiffPolicy(BaseModel):
+    # past this share of changed zones or tiles a diff costs more than it saves
+    full_frame_ratio: float = 0.5
+    # a lost packet would otherwise leave zones wrong until they change again
+    refresh_interval: float = 1.0
+
+
+class PerceptualPolicy(BaseModel):
+    # changes smaller than this delta E are not sent
+    threshold: float = JUST_NOTICEABLE_DIFFERENCE
+    # every so often the true frame goes out whole to correct what was skipped
+    keyframe_interval: float = 1.0
+
+
+class PerceptualFilter:
+    # For streams that send each frame whole, such as one LightSetColor per
+    # frame: a frame is let through when any of it looks different from the
+    # last one let through, or when a keyframe is due.
+    def __init__(self, policy: PerceptualPolicy | None = None) -> None:
+        self.policy = policy or PerceptualPolicy()
+        self.shown: HsbkArray | None = None
+        self.skipped = 0
+        self._keyframe_at = 0.0
+
+    def admit(self, colors: npt.ArrayLike, now: float) -> bool:
+        frame = np.asarray(colors, dtype=np.uint16)
+        keyframe = (
+            self.shown is None
+            or self.shown.shape != frame.shape
+            or now - self._keyframe_at >= self.policy.keyframe_interval
+        )
+        if (
+            not keyframe
+            and not perceptible(frame, self.shown, self.policy.threshold).any()
+        ):
+            self.skipped += 1
+            return False
+        if keyframe:
+            self._keyframe_at = now
+        self.shown = frame.copy()
+        return True
+
+
+class TileRect(BaseModel):
+    tile_index: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+def changed_zone_segments(
+    previous: HsbkArray | None,
+    current: HsbkArray,
+    policy: FrameDiffPolicy,
+    packet_zones: int,
+) -> list[tuple[int, int]] | None:
+    # None means the whole frame should go out
+    if previous is None or previous.shape != current.shape:
+        return None
+    changed = np.flatnonzero(np.any(previous != current, axis=1))
+    if len(changed) > policy.full_frame_ratio * len(current):
+        return None
+    # Zone packets are a fixed size whatever their colour count says, so the
+    # fewest packets is the only saving: cover the changes with packet sized
+    # windows, each trimmed back to the last change it holds.
+    segments: list[tuple[int, int]] = []
+    position = 0
+    while position < len(changed):
+        start = int(changed[position])
+        end = int(np.searchsorted(changed, start + packet_zones))
+        last = int(changed[end - 1])
+        segments.append((start, last - start + 1))
+        position = end
+    return segments
+
+
+def full_tile_rects(tiles: int) -> list[TileRect]:
+    return [
+        TileRect(tile_index=i, x=0, y=0, width=TILE_SIZE, height=TILE_SIZE)
+        for i in range(tiles)
+    ]
+
+
+def changed_tile_rects(
+    previous: HsbkArray | None, current: HsbkArray, policy: FrameDiffPolicy
+) -> list[TileRect] | None:
+    # frames are (tiles, rows, columns, HSBK); None means send every tile whole
+    if previous is None or previous.shape != current.shape:
+        return None
+    changed = np.any(previous != current, axis=-1)
+    changed_tiles = np.flatnonzero(changed.any(axis=(1, 2)))
+    if len(changed_tiles) > policy.full_frame_ratio * len(current):
+        return None
+    rects: list[TileRect] = []
+    for tile in changed_tiles.tolist():
+        rows = np.flatnonzero(changed[tile].any(axis=1))
+        columns = np.flatnonzero(changed[tile].any(axis=0))
+        rects.append(
+            TileRect(
+                tile_index=tile,
+                x=int(columns[0]),
+                y=int(rows[0]),
+                width=int(columns[-1] - columns[0] + 1),
+                height=int(rows[-1] - rows[0] + 1),
+            )
+        )
+    return rects
+
+
+def tile_messages(  # noqa: PLR0913
+    frame: HsbkArray,
+    rects: list[TileRect],
+    source_id: int,
+    target: str,
+    *,
+    seq_num: int,
+    duration: int = 0,
+) -> list[TileSet64]:
+    messages = []
+    for i, rect in enumerate(rects):
+        # The device writes all 64 colours row by row from (x, y) at this width,
+        # so the rows past the rectangle are filled from the frame and rewrite
+        # what is already there; only writes off the tile are left as padding.
+        rows = -(-TILE_PIXELS // rect.width)
+        colors = frame[
+            rect.tile_index, rect.y : rect.y + rows, rect.x : rect.x + rect.width
+        ].reshape(-1, 4)[:TILE_PIXELS]
+        padding = [[0, 0, 0, 0]] * (TILE_PIXELS - len(colors))
+        messages.append(
+            TileSet64(
+                source_id=source_id,
+                target_addr=target,
+                seq_num=(seq_num + i) % 256,
+                payload=TileSet64Payload(
+                    tile_index=rect.tile_index,
+                    length=1,
+                    x=rect.x,
+                    y=rect.y,
+                    width=rect.width,
+                    duration=duration,
+                    colors=colors.tolist() + padding,
+                ),
+            )
+        )
+    return messages
@@ -0,0 +1,282 @@
+import asyncio
+import contextlib
+import math
+import struct
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from aiolifx.color.difference import skip_imperceptible
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZonesPayload
+from aiolifx.resources.const import HEADER_SIZE_BYTES
+from aiolifx.streaming.diff import FrameDiffPolicy
+from aiolifx.streaming.diff import PerceptualPolicy
+from aiolifx.streaming.diff import changed_zone_segments
+from aiolifx.transport.scheduler import SendScheduler
+
+# MultiZoneSetExtendedColorZones always carries room for 82 colours
+EXTENDED_ZONES_PER_PACKET = 82
+# duration, apply, zone_index, colors_count
+EXTENDED_HEADER_STRUCT = struct.Struct("<IBHB")
+EXTENDED_PACKET_BYTES = (
+    HEADER_SIZE_BYTES + EXTENDED_HEADER_STRUCT.size + EXTENDED_ZONES_PER_PACKET * 8
+)
+SEQ_NUM_OFFSET = 23
+
+NO_APPLY = 0
+APPLY = 1
+
+ZoneFrame = npt.NDArray[np.uint16]
+
+
+def zone_frame(colors: npt.ArrayLike, zones_count: int) -> ZoneFrame:
+    frame = np.asarray(colors, dtype=np.uint16)
+    if frame.shape != (zones_count, 4):
+        msg = f"Expected a ({zones_count}, 4) HSBK frame, got {frame.shape}"
+        raise ValueError(msg)
+    return frame
+
+
+def extended_pages(zones_count: int) -> list[tuple[int, int]]:
+    return [
+        (start, min(EXTENDED_ZONES_PER_PACKET, zones_count - start))
+        for start in range(0, zones_count, EXTENDED_ZONES_PER_PACKET)
+    ]
+
+
+class ExtendedZonesEncoder:
+    # Packets are written into preallocated buffers from a header template, so a
+    # frame costs a few struct/numpy copies instead of a pydantic model and a
+    # per-field bitstring encode for each packet.
+    def __init__(self, source_id: int, target: str, packets: int) -> None:
+        template = MultiZoneSetExtendedColorZones(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=0,
+            payload=MultiZoneSetExtendedColorZonesPayload(
+                duration=0,
+                apply=NO_APPLY,
+                zone_index=0,
+                colors_count=0,
+                colors=[[0, 0, 0, 0]] * EXTENDED_ZONES_PER_PACKET,
+            ),
+        )
+        header = template.packed_message[:HEADER_SIZE_BYTES]
+        self.buffers = [bytearray(EXTENDED_PACKET_BYTES) for _ in range(packets)]
+        self.colors: list[ZoneFrame] = []
+        for buffer in self.buffers:
+            buffer[:HEADER_SIZE_BYTES] = header
+            colors = np.frombuffer(
+                buffer,
+                dtype="<u2",
+                count=EXTENDED_ZONES_PER_PACKET * 4,
+                offset=HEADER_SIZE_BYTES + EXTENDED_HEADER_STRUCT.size,
+            )
+            self.colors.append(colors.reshape(EXTENDED_ZONES_PER_PACKET, 4))
+        self.used = 0
+
+    def encode(
+        self, frame: ZoneFrame, segments: list[tuple[int, int]], duration: int
+    ) -> list[bytearray]:
+        if len(segments) > len(self.buffers):
+            msg = f"{len(segments)} segments do not fit {len(self.buffers)} packets"
+            raise ValueError(msg)
+        last = len(segments) - 1
+        for i, (start, count) in enumerate(segments):
+            # only the final packet applies, so every page changes at once
+            EXTENDED_HEADER_STRUCT.pack_into(
+                self.buffers[i],
+                HEADER_SIZE_BYTES,
+                duration,
+                APPLY if i == last else NO_APPLY,
+                start,
+                count,
+            )
+            colors = self.colors[i]
+            colors[:count] = frame[start : start + count]
+            colors[count:] = 0
+        self.used = len(segments)
+        return self.buffers[: self.used]
+
+    def stamp(self, index: int, seq_num: int) -> bytearray:
+        buffer = self.buffers[index]
+        buffer[SEQ_NUM_OFFSET] = seq_num
+        return buffer
+
+
+class StreamPolicy(BaseModel):
+    fps: float = 20.0
+    # LIFX recommend no more than 20 messages per second per device
+    rate: float = 20.0
+    burst: int = 5
+    # a frame still unsent after this many seconds is dropped, not queued
+    max_frame_age: float = 0.5
+    # only send the zones that changed; None always sends whole frames
+    diff: FrameDiffPolicy | None = FrameDiffPolicy()
+    # leave out zone changes too small to see; None sends every change
+    perceptual: PerceptualPolicy | None = None
+
+    @property
+    def frame_interval(self) -> float:
+        return 1 / self.fps
+
+
+class StreamCounters(BaseModel):
+    submitted: int = 0
+    sent: int = 0
+    packets: int = 0
+    dropped_stale: int = 0
+    unchanged: int = 0
+    partial: int = 0
+
+
+class MultiZoneStream:
+    def __init__(  # noqa: PLR0913
+        self,
+        send: Callable[[bytes | bytearray], None],
+        source_id: int,
+        target: str,
+        zones_count: int,
+        policy: StreamPolicy | None = None,
+        *,
+        scheduler: SendScheduler | None = None,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self._send = send
+        self.target = target
+        self.zones_count = zones_count
+        self.policy = policy or StreamPolicy()
+        # with a scheduler the stream spends the device's shared budget and
+        # yields to anything more urgent queued there, instead of its own bucket
+        self.scheduler = scheduler
+        self._clock = clock
+        self.counters = StreamCounters()
+        self.pages = extended_pages(zones_count)
+        # while one buffer is on the wire the next frame is encoded into the other
+        self._encoders = [
+            ExtendedZonesEncoder(source_id, target, len(self.pages)) for _ in range(2)
+        ]
+        self._front = 0
+        self._back_ready_at: float | None = None
+        self._seq_num = 0
+        self._tokens = float(self.policy.burst)
+        self._refilled_at: float | None = None
+        self._next_send = 0.0
+        self._ready = asyncio.Event()
+        # the frame last put on the wire, which the next one is diffed against
+        self._sent: ZoneFrame | None = None
+        self._pending: ZoneFrame | None = None
+        self._pending_full = False
+        self._refreshed_at = -math.inf
+
+    def submit(self, colors: npt.ArrayLike) -> None:
+        frame = zone_frame(colors, self.zones_count).copy()
+        now = self._now()
+        self.counters.submitted += 1
+        if self._back_ready_at is not None:
+            # latest wins: the frame waiting to go out is already out of date
+            self.counters.dropped_stale += 1
+            self._back_ready_at = None
+        refresh = self._refresh_due(now)
+        perceptual = self.policy.perceptual
+        if perceptual is not None and not refresh and self._sent is not None:
+            frame = skip_imperceptible(self._sent, frame, perceptual.threshold)
+        segments = self.pages if refresh else self._segments(frame)
+        if not segments:
+            self.counters.unchanged += 1
+            return
+        self._encode(frame, segments)
+        self._pending = frame
+        self._pending_full = segments is self.pages
+        self._back_ready_at = now
+        self._ready.set()
+
+    def _refresh_due(self, now: float) -> bool:
+        intervals = []
+        if self.policy.diff is not None:
+            intervals.append(self.policy.diff.refresh_interval)
+        if self.policy.perceptual is not None:
+            intervals.append(self.policy.perceptual.keyframe_interval)
+        return not intervals or now - self._refreshed_at >= min(intervals)
+
+    def _segments(self, frame: ZoneFrame) -> list[tuple[int, int]]:
+        diff = self.policy.diff
+        if diff is None:
+            # without a diff only the perceptual filter can leave a frame
+            # identical to the one on the wire
+            if self._sent is not None and np.array_equal(frame, self._sent):
+                return []
+            return self.pages
+        segments = changed_zone_segments(
+            self._sent, frame, diff, EXTENDED_ZONES_PER_PACKET
+        )
+        return self.pages if segments is None else segments
+
+    def _now(self) -> float:
+        if self._clock is not None:
+            return self._clock()
+        return asyncio.get_running_loop().time()
+
+    async def run(self) -> None:
+        while True:
+            await self._ready.wait()
+            now = self._now()
+            ready_at = self._back_ready_at
+            if ready_at is None:
+                self._ready.clear()
+                continue
+            if now - ready_at > self.policy.max_frame_age:
+                self.counters.dropped_stale += 1
+                self._back_ready_at = None
+                continue
+            delay = self._delay(now)
+            if delay > 0:
+                # a newer frame may replace this one while we wait for budget
+                self._ready.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._ready.wait(), delay)
+                self._ready.set()
+                continue
+            self._flip(now)
+
+    def _delay(self, now: float) -> float:
+        if self._next_send > now:
+            return self._next_send - now
+        packets = self._encoders[1 - self._front].used
+        if self.scheduler is not None:
+            # a zero delay means the budget has already been spent on this frame
+            return self.scheduler.reserve(self.target, packets)
+        if self._refilled_at is not None:
+            elapsed = now - self._refilled_at
+            self._tokens = min(
+                self._tokens + elapsed * self.policy.rate, self.policy.burst
+            )
+        self._refilled_at = now
+        return max(0.0, (packets - self._tokens) / self.policy.rate)
+
+    def _encode(self, frame: ZoneFrame, segments: list[tuple[int, int]]) -> None:
+        # the device fades over one frame interval, so motion stays smooth between
+        # frames instead of stepping
+        duration = round(self.policy.frame_interval * 1000)
+        self._encoders[1 - self._front].encode(frame, segments, duration)
+
+    def _flip(self, now: float) -> None:
+        self._front = 1 - self._front
+        self._back_ready_at = None
+        self._sent = self._pending
+        if self._pending_full:
+            self._refreshed_at = now
+        else:
+            self.counters.partial += 1
+        encoder = self._encoders[self._front]
+        for index in range(encoder.used):
+            self._seq_num = (self._seq_num + 1) % 256
+            self._send(encoder.stamp(index, self._seq_num))
+        if self.scheduler is None:
+            self._tokens -= encoder.used
+        self._next_send = now + self.policy.frame_interval
+        self.counters.sent += 1
+        self.counters.packets += encoder.used
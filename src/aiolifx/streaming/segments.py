@@ -0,0 +1,99 @@
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from aiolifx.models.message_types import MultiZoneSetColorZones
+from aiolifx.models.message_types import MultiZoneSetColorZonesPayload
+from aiolifx.streaming.multizone import APPLY
+from aiolifx.streaming.multizone import NO_APPLY
+from aiolifx.streaming.multizone import ZoneFrame
+from aiolifx.streaming.multizone import zone_frame
+
+KELVIN_SPAN = 9000 - 1500
+
+
+class ZoneSegment(BaseModel):
+    start_index: int
+    end_index: int
+    color: list[int]
+
+
+def zone_distance(colors: ZoneFrame, reference: npt.ArrayLike) -> npt.NDArray[np.float64]:
+    # Each channel as a fraction of its range; hue only counts in proportion to
+    # how saturated and bright the pair is, kelvin only for the white part.
+    colors = colors.astype(np.float64)
+    reference = np.asarray(reference, dtype=np.float64)
+    hue = np.abs(colors[..., 0] - reference[..., 0])
+    hue = np.minimum(hue, 65536 - hue) / 32768
+    saturation = np.minimum(colors[..., 1], reference[..., 1]) / 65535
+    brightness = np.minimum(colors[..., 2], reference[..., 2]) / 65535
+    return np.maximum.reduce(
+        [
+            hue * saturation * brightness,
+            np.abs(colors[..., 1] - reference[..., 1]) / 65535,
+            np.abs(colors[..., 2] - reference[..., 2]) / 65535,
+            np.abs(colors[..., 3] - reference[..., 3])
+            / KELVIN_SPAN
+            * (1 - saturation)
+            * brightness,
+        ]
+    )
+
+
+def plan_zone_segments(
+    colors: npt.ArrayLike, tolerance: float = 0.0
+) -> list[ZoneSegment]:
+    frame = np.asarray(colors, dtype=np.uint16)
+    frame = zone_frame(frame, len(frame))
+    if not len(frame):
+        return []
+    if tolerance <= 0:
+        # exact runs: a new segment starts wherever a zone differs from the last
+        changed = np.any(frame[1:] != frame[:-1], axis=1)
+        starts = [0, *(np.flatnonzero(changed) + 1).tolist()]
+    else:
+        starts = _tolerant_starts(frame, tolerance)
+    ends = [*(start - 1 for start in starts[1:]), len(frame) - 1]
+    return [
+        ZoneSegment(start_index=start, end_index=end, color=frame[start].tolist())
+        for start, end in zip(starts, ends, strict=True)
+    ]
+
+
+def _tolerant_starts(frame: ZoneFrame, tolerance: float) -> list[int]:
+    # A run keeps growing while each zone stays within tolerance of the colour it
+    # will be painted with, so merging never drifts along a slow gradient.
+    starts = [0]
+    distances = zone_distance(frame, frame[0])
+    for index in range(1, len(frame)):
+        if distances[index - starts[-1]] > tolerance:
+            starts.append(index)
+            distances = zone_distance(frame[index:], frame[index])
+    return starts
+
+
+def segment_messages(
+    segments: list[ZoneSegment],
+    source_id: int,
+    target: str,
+    seq_num: int,
+    duration: int = 0,
+) -> list[MultiZoneSetColorZones]:
+    # everything but the last packet is buffered on the device, which then
+    # applies the whole frame at once
+    last = len(segments) - 1
+    return [
+        MultiZoneSetColorZones(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=(seq_num + i) % 256,
+            payload=MultiZoneSetColorZonesPayload(
+                start_index=segment.start_index,
+                end_index=segment.end_index,
+                color=segment.color,
+                duration=duration,
+                apply=APPLY if i == last else NO_APPLY,
+            ),
+        )
+        for i, segment in enumerate(segments)
+    ]
@@ -0,0 +1,210 @@
+import struct
+from functools import lru_cache
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+from pydantic import ConfigDict
+
+from aiolifx.color.convert import DEFAULT_KELVIN
+from aiolifx.color.convert import rgb_to_hsbk
+from aiolifx.color.difference import JUST_NOTICEABLE_DIFFERENCE
+from aiolifx.color.difference import perceptible
+from aiolifx.models.message_types import TileDevice
+from aiolifx.models.message_types import TileSet64
+from aiolifx.models.message_types import TileSet64Payload
+from aiolifx.resources.const import HEADER_SIZE_BYTES
+from aiolifx.streaming.diff import TILE_PIXELS
+from aiolifx.streaming.multizone import SEQ_NUM_OFFSET
+
+# tile_index, length, reserved, x, y, width, duration
+TILE_SET_STRUCT = struct.Struct("<BBBBBBI")
+TILE_SET_PACKET_BYTES = HEADER_SIZE_BYTES + TILE_SET_STRUCT.size + TILE_PIXELS * 8
+RGB_CHANNELS = 3
+HSBK_CHANNELS = 4
+
+
+class TileGeometry(BaseModel):
+    # hashable so sampling maps can be cached per chain layout
+    model_config = ConfigDict(frozen=True)
+
+    # centre of the tile in tile widths, with y growing upwards as the app shows it
+    user_x: float
+    user_y: float
+    width: int
+    height: int
+
+
+class TilePacket(BaseModel):
+    tile_index: int
+    y: int
+    width: int
+    # range of this packet's pixels in the flattened chain
+    start: int
+    count: int
+
+
+def chain_geometry(tiles: list[TileDevice]) -> tuple[TileGeometry, ...]:
+    return tuple(
+        TileGeometry(
+            user_x=tile.user_x, user_y=tile.user_y, width=tile.width, height=tile.height
+        )
+        for tile in tiles
+    )
+
+
+@lru_cache(maxsize=32)
+def sampling_index(
+    geometry: tuple[TileGeometry, ...], canvas_shape: tuple[int, int]
+) -> npt.NDArray[np.intp]:
+    # Flat canvas index for every tile pixel, tile after tile and row by row.
+    # The canvas is stretched over the bounding box of the whole chain and each
+    # pixel samples the canvas at its centre.
+    rows, columns = canvas_shape
+    lefts = [tile.user_x * tile.width - tile.width / 2 for tile in geometry]
+    tops = [tile.user_y * tile.height + tile.height / 2 for tile in geometry]
+    min_x = min(lefts)
+    max_x = max(left + tile.width for left, tile in zip(lefts, geometry, strict=True))
+    max_y = max(tops)
+    min_y = min(top - tile.height for top, tile in zip(tops, geometry, strict=True))
+    indexes = []
+    for left, top, tile in zip(lefts, tops, geometry, strict=True):
+        y, x = np.mgrid[0 : tile.height, 0 : tile.width]
+        chain_x = left + x + 0.5
+        chain_y = top - y - 0.5
+        column = ((chain_x - min_x) / (max_x - min_x) * columns).astype(np.intp)
+        row = ((max_y - chain_y) / (max_y - min_y) * rows).astype(np.intp)
+        indexes.append(
+            (
+                np.clip(row, 0, rows - 1) * columns + np.clip(column, 0, columns - 1)
+            ).ravel()
+        )
+    return np.concatenate(indexes)
+
+
+def tile_packets(geometry: tuple[TileGeometry, ...]) -> list[TilePacket]:
+    # tiles with more than 64 pixels take several packets, each a band of rows
+    packets = []
+    start = 0
+    for index, tile in enumerate(geometry):
+        rows_per_packet = max(1, TILE_PIXELS // tile.width)
+        for y in range(0, tile.height, rows_per_packet):
+            count = min(rows_per_packet, tile.height - y) * tile.width
+            packets.append(
+                TilePacket(
+                    tile_index=index, y=y, width=tile.width, start=start, count=count
+                )
+            )
+            start += count
+    return packets
+
+
+class TileCanvas:
+    def __init__(self, source_id: int, target: str, tiles: list[TileDevice]) -> None:
+        self.geometry = chain_geometry(tiles)
+        self.packets = tile_packets(self.geometry)
+        template = TileSet64(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=0,
+            payload=TileSet64Payload(
+                tile_index=0,
+                length=1,
+                x=0,
+                y=0,
+                width=0,
+                duration=0,
+                colors=[[0, 0, 0, 0]] * TILE_PIXELS,
+            ),
+        )
+        header = template.packed_message[:HEADER_SIZE_BYTES]
+        self.buffers = [bytearray(TILE_SET_PACKET_BYTES) for _ in self.packets]
+        self.colors = []
+        for buffer in self.buffers:
+            buffer[:HEADER_SIZE_BYTES] = header
+            colors = np.frombuffer(
+                buffer,
+                dtype="<u2",
+                count=TILE_PIXELS * 4,
+                offset=HEADER_SIZE_BYTES + TILE_SET_STRUCT.size,
+            )
+            self.colors.append(colors.reshape(TILE_PIXELS, 4))
+        self.starts = [packet.start for packet in self.packets]
+        # the pixels as last encoded, which is what the tiles were sent
+        self.shown: npt.NDArray[np.uint16] | None = None
+
+    def sample(
+        self, canvas: npt.ArrayLike, kelvin: int = DEFAULT_KELVIN
+    ) -> npt.NDArray[np.uint16]:
+        # HSBK canvases are gathered as they are; RGB ones are converted after the
+        # gather, so only the pixels the tiles show are converted
+        image = np.asarray(canvas)
+        rows, columns = image.shape[:2]
+        if image.shape not in {
+            (rows, columns, RGB_CHANNELS),
+            (rows, columns, HSBK_CHANNELS),
+        }:
+            msg = f"Expected a (rows, columns, 3 or 4) canvas, got {image.shape}"
+            raise ValueError(msg)
+        index = sampling_index(self.geometry, (rows, columns))
+        pixels = image.reshape(rows * columns, -1)[index]
+        if pixels.shape[1] == RGB_CHANNELS:
+            return rgb_to_hsbk(pixels, kelvin)
+        return pixels.astype(np.uint16)
+
+    def encode(
+        self, canvas: npt.ArrayLike, duration: int = 0, kelvin: int = DEFAULT_KELVIN
+    ) -> list[bytearray]:
+        pixels = self.sample(canvas, kelvin)
+        for index in range(len(self.packets)):
+            self._write(index, pixels, duration)
+        self.shown = pixels
+        return self.buffers
+
+    def encode_changes(
+        self,
+        canvas: npt.ArrayLike,
+        threshold: float = JUST_NOTICEABLE_DIFFERENCE,
+        *,
+        keyframe: bool = False,
+        duration: int = 0,
+        kelvin: int = DEFAULT_KELVIN,
+    ) -> list[int]:
+        # Indexes of the packets that need sending: those with a pixel that looks
+        # different from what was last sent. A keyframe rewrites every packet so
+        # whatever was skipped along the way is corrected.
+        if keyframe or self.shown is None:
+            self.encode(canvas, duration, kelvin)
+            return list(range(len(self.packets)))
+        pixels = self.sample(canvas, kelvin)
+        visible = perceptible(pixels, self.shown, threshold)
+        changed = np.flatnonzero(np.logical_or.reduceat(visible, self.starts)).tolist()
+        for index in changed:
+            packet = self.packets[index]
+            self._write(index, pixels, duration)
+            self.shown[packet.start : packet.start + packet.count] = pixels[
+                packet.start : packet.start + packet.count
+            ]
+        return changed
+
+    def _write(self, index: int, pixels: npt.NDArray[np.uint16], duration: int) -> None:
+        packet = self.packets[index]
+        TILE_SET_STRUCT.pack_into(
+            self.buffers[index],
+            HEADER_SIZE_BYTES,
+            packet.tile_index,
+            1,
+            0,
+            0,
+            packet.y,
+            packet.width,
+            duration,
+        )
+        colors = self.colors[index]
+        colors[: packet.count] = pixels[packet.start : packet.start + packet.count]
+        colors[packet.count :] = 0
+
+    def stamp(self, index: int, seq_num: int) -> bytearray:
+        buffer = self.buffers[index]
+        buffer[SEQ_NUM_OFFSET] = seq_num
+        return buffer
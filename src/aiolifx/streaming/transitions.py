@@ -0,0 +1,269 @@
+from collections.abc import Callable
+
+import numpy as np
+import numpy.typing as npt
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import LightSetWaveform
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZonesPayload
+from aiolifx.models.message_types import SetColorPayload
+from aiolifx.models.message_types import Waveform
+from aiolifx.models.message_types import WaveFormPayload
+from aiolifx.streaming.diff import TILE_SIZE
+from aiolifx.streaming.diff import full_tile_rects
+from aiolifx.streaming.diff import tile_messages
+from aiolifx.streaming.multizone import APPLY
+from aiolifx.streaming.multizone import EXTENDED_ZONES_PER_PACKET
+from aiolifx.streaming.multizone import NO_APPLY
+from aiolifx.streaming.multizone import extended_pages
+from aiolifx.streaming.segments import zone_distance
+
+FloatArray = npt.NDArray[np.float64]
+# how far either side of the strongest frequency the cycle count is searched
+CYCLE_SEARCH = 1
+# a waveform needs enough samples to show a swing, and costs two packets
+MIN_WAVEFORM_SAMPLES = 3
+WAVEFORM_PACKETS = 2
+SINGLE_COLOR_NDIM = 2
+ZONES_NDIM = 3
+TILES_NDIM = 5
+HSBK_CHANNELS = 4
+
+# colour weight over one period for each waveform the bulb can run, phase in 0..1
+WAVEFORM_SHAPES: dict[Waveform, Callable[[FloatArray], FloatArray]] = {
+    Waveform.SAW: lambda phase: phase,
+    Waveform.SINE: lambda phase: (1 - np.cos(2 * np.pi * phase)) / 2,
+    Waveform.HALF_SINE: lambda phase: np.sin(np.pi * phase),
+    Waveform.TRIANGLE: lambda phase: 1 - np.abs(2 * phase - 1),
+}
+
+
+class Keyframe(BaseModel):
+    # sent `at` seconds into the trajectory, the device then fades to sample
+    # `index` over `duration` milliseconds
+    at: float
+    index: int
+    duration: int
+
+
+class WaveformFit(BaseModel):
+    waveform: Waveform
+    color: list[int]
+    period: int
+    cycles: int
+    error: float
+
+
+def interpolate(
+    start: npt.ArrayLike, end: npt.ArrayLike, weights: npt.ArrayLike
+) -> FloatArray:
+    # Colours between start and end for each weight, the way the bulb fades:
+    # every channel linearly, hue the short way round the wheel.
+    start = np.asarray(start, dtype=np.float64)
+    delta = np.asarray(end, dtype=np.float64) - start
+    delta[..., 0] = (delta[..., 0] + 32768) % 65536 - 32768
+    weights = np.asarray(weights, dtype=np.float64).reshape((-1,) + (1,) * start.ndim)
+    colors = start + delta * weights
+    colors[..., 0] %= 65536
+    return colors
+
+
+def _fade_error(times: FloatArray, colors: FloatArray, start: int, end: int) -> float:
+    span = times[end] - times[start]
+    weights = (times[start : end + 1] - times[start]) / span if span > 0 else 1.0
+    predicted = interpolate(colors[start], colors[end], weights)
+    return float(zone_distance(colors[start : end + 1], predicted).max())
+
+
+def plan_keyframes(
+    times: npt.ArrayLike, colors: npt.ArrayLike, tolerance: float = 0.01
+) -> list[Keyframe]:
+    # colors is (samples, ..., 4): a single colour, a zone strip or a tile frame
+    # per sample. From each keyframe the fade reaches as far along the
+    # trajectory as it can while every sample it passes stays within tolerance.
+    times = np.asarray(times, dtype=np.float64)
+    colors = np.asarray(colors, dtype=np.float64)
+    if len(times) != len(colors):
+        msg = f"{len(times)} times but {len(colors)} colours"
+        raise ValueError(msg)
+    if not len(times):
+        return []
+    keyframes = [Keyframe(at=0.0, index=0, duration=0)]
+    start = 0
+    while start < len(times) - 1:
+        end = start + 1
+        while end + 1 < len(times):
+            if _fade_error(times, colors, start, end + 1) > tolerance:
+                break
+            end += 1
+        keyframes.append(
+            Keyframe(
+                at=float(times[start] - times[0]),
+                index=end,
+                duration=round((times[end] - times[start]) * 1000),
+            )
+        )
+        start = end
+    return keyframes
+
+
+def fit_waveform(
+    times: npt.ArrayLike, colors: npt.ArrayLike, tolerance: float = 0.01
+) -> WaveformFit | None:
+    # A single colour trajectory that swings between its first colour and
+    # another one a whole number of times is one LightSetWaveform. The swing is
+    # projected onto that line, its strongest frequency gives the cycle count
+    # and every bulb waveform is tried against the samples.
+    times = np.asarray(times, dtype=np.float64)
+    colors = np.asarray(colors, dtype=np.float64)
+    span = times[-1] - times[0] if len(times) else 0.0
+    if colors.ndim != SINGLE_COLOR_NDIM or len(times) < MIN_WAVEFORM_SAMPLES or span <= 0:
+        return None
+    start = colors[0]
+    offsets = colors - start
+    offsets[:, 0] = (offsets[:, 0] + 32768) % 65536 - 32768
+    direction = offsets[int(np.argmax(zone_distance(colors, start)))]
+    if not direction.any():
+        return None
+    swing = offsets @ direction / (direction @ direction)
+    elapsed = times - times[0]
+    uniform = np.interp(np.linspace(0, span, len(times)), elapsed, swing)
+    spectrum = np.abs(np.fft.rfft(uniform - uniform.mean()))
+    strongest = int(np.argmax(spectrum[1:])) + 1
+    best = None
+    for cycles in range(max(1, strongest - CYCLE_SEARCH), strongest + CYCLE_SEARCH + 1):
+        period = span / cycles
+        phase = (elapsed / period) % 1
+        for waveform, shape in WAVEFORM_SHAPES.items():
+            weights = shape(phase)
+            if not weights.any():
+                continue
+            # the amplitude that best fits the swing sets the waveform's colour
+            amplitude = float(weights @ swing / (weights @ weights))
+            target = interpolate(start, start + direction, amplitude)[0]
+            predicted = interpolate(start, target, weights)
+            error = float(zone_distance(colors, predicted).max())
+            if best is None or error < best.error:
+                best = WaveformFit(
+                    waveform=waveform,
+                    color=np.clip(np.rint(target), 0, 65535).astype(int).tolist(),
+                    period=round(period * 1000),
+                    cycles=cycles,
+                    error=error,
+                )
+    if best is None or best.error > tolerance:
+        return None
+    return best
+
+
+def transition_messages(  # noqa: PLR0913
+    times: npt.ArrayLike,
+    colors: npt.ArrayLike,
+    source_id: int,
+    target: str,
+    *,
+    tolerance: float = 0.01,
+    seq_num: int = 0,
+) -> list[tuple[float, Message]]:
+    # (seconds from the start, message) pairs for one device; the caller sends
+    # each message when its time comes. Samples are a colour, a (zones, 4) strip
+    # or a (tiles, 8, 8, 4) chain, keyframed with LightSetColor,
+    # MultiZoneSetExtendedColorZones or TileSet64 respectively.
+    colors = np.asarray(colors, dtype=np.float64)
+    if colors.ndim not in {SINGLE_COLOR_NDIM, ZONES_NDIM, TILES_NDIM} or (
+        colors.shape[-1] != HSBK_CHANNELS
+        or (colors.ndim == TILES_NDIM and colors.shape[2:4] != (TILE_SIZE, TILE_SIZE))
+    ):
+        msg = (
+            "Expected (samples, 4), (samples, zones, 4) or (samples, tiles, 8, 8, 4) "
+            f"colours, got {colors.shape}"
+        )
+        raise ValueError(msg)
+    keyframes = plan_keyframes(times, colors, tolerance)
+    fit = None
+    if len(keyframes) > WAVEFORM_PACKETS:
+        fit = fit_waveform(times, colors, tolerance)
+    if fit is not None:
+        # the bulb starts from its current colour, so set that first
+        first = LightSetColor(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=seq_num % 256,
+            payload=SetColorPayload(color=_wire_colors(colors[0]), duration=0),
+        )
+        waveform = LightSetWaveform(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=(seq_num + 1) % 256,
+            payload=WaveFormPayload(
+                transient=1,
+                color=fit.color,
+                period=fit.period,
+                cycles=fit.cycles,
+                skew_ratio=0,
+                waveform=fit.waveform.value,
+            ),
+        )
+        return [(0.0, first), (0.0, waveform)]
+    timed: list[tuple[float, Message]] = []
+    for keyframe in keyframes:
+        messages = _keyframe_messages(
+            colors[keyframe.index],
+            source_id,
+            target,
+            seq_num=seq_num + len(timed),
+            duration=keyframe.duration,
+        )
+        timed.extend((keyframe.at, message) for message in messages)
+    return timed
+
+
+def _keyframe_messages(
+    frame: FloatArray, source_id: int, target: str, *, seq_num: int, duration: int
+) -> list[Message]:
+    if frame.ndim == 1:
+        return [
+            LightSetColor(
+                source_id=source_id,
+                target_addr=target,
+                seq_num=seq_num % 256,
+                payload=SetColorPayload(color=_wire_colors(frame), duration=duration),
+            )
+        ]
+    wire = np.array(_wire_colors(frame), dtype=np.uint16)
+    if frame.ndim == TILES_NDIM - 1:
+        return list(
+            tile_messages(
+                wire,
+                full_tile_rects(len(wire)),
+                source_id,
+                target,
+                seq_num=seq_num,
+                duration=duration,
+            )
+        )
+    # only the last page applies, so the whole strip starts fading together
+    pages = extended_pages(len(wire))
+    return [
+        MultiZoneSetExtendedColorZones(
+            source_id=source_id,
+            target_addr=target,
+            seq_num=(seq_num + i) % 256,
+            payload=MultiZoneSetExtendedColorZonesPayload(
+                duration=duration,
+                apply=APPLY if i == len(pages) - 1 else NO_APPLY,
+                zone_index=start,
+                colors_count=count,
+                colors=wire[start : start + count].tolist()
+                + [[0, 0, 0, 0]] * (EXTENDED_ZONES_PER_PACKET - count),
+            ),
+        )
+        for i, (start, count) in enumerate(pages)
+    ]
+
+
+def _wire_colors(colors: FloatArray) -> list:
+    return np.clip(np.floor(colors + 0.5), 0, 65535).astype(int).tolist()
@@ -0,0 +1,80 @@
+from collections.abc import Callable
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, target: str) -> None:
+        super().__init__(f"Circuit open for {target}")
+        self.target = target
+
+
+class CircuitBreakerPolicy(BaseModel):
+    failure_threshold: int = 3
+    reset_timeout: float = 30.0
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        target: str,
+        policy: CircuitBreakerPolicy,
+        on_state_change: Callable[[str, CircuitState], None] | None = None,
+    ) -> None:
+        self.target = target
+        self.policy = policy
+        self.on_state_change = on_state_change
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    def reset_due(self, now: float) -> bool:
+        return (
+            self.state == CircuitState.OPEN
+            and self.opened_at is not None
+            and now - self.opened_at >= self.policy.reset_timeout
+        )
+
+    def allow_request(self, now: float) -> bool:
+        if self.state == CircuitState.CLOSED:
+            return True
+        # A single trial request is let through once the reset timeout elapses;
+        # everything else fails fast until that trial settles.
+        if self.reset_due(now):
+            self._transition(CircuitState.HALF_OPEN)
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        if self.state != CircuitState.CLOSED:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.failures >= self.policy.failure_threshold
+        ):
+            self.opened_at = now
+            if self.state != CircuitState.OPEN:
+                self._transition(CircuitState.OPEN)
+
+    def abandon_trial(self) -> None:
+        # a cancelled trial says nothing about the device; reopen with the reset
+        # already due so the next request becomes the trial instead
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(self.target, state)
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+from aiolifx.models.message_types import MessageType
+
+# Reads that are safe to duplicate: answering twice has no side effects.
+IDEMPOTENT_GETS = frozenset(
+    {
+        MessageType.LightGet,
+        MessageType.GetPower,
+        MessageType.GetLabel,
+        MessageType.MultiZoneGetExtendedColorZones,
+        MessageType.TileGet64,
+    }
+)
+
+
+class HedgingPolicy(BaseModel):
+    message_types: frozenset[MessageType] = IDEMPOTENT_GETS
+    percentile: float = 0.9
+    min_samples: int = 10
+
+
+class HedgingCounters(BaseModel):
+    eligible_requests: int = 0
+    hedges_sent: int = 0
+    hedge_wins: int = 0
@@ -0,0 +1,135 @@
+import asyncio
+import socket
+import struct
+import sys
+from collections.abc import Callable
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.unpack import unpack_lifx_messages
+
+Address = tuple[str, int]
+Datagram = tuple[bytes | memoryview, Address]
+
+# the largest LIFX reply (StateButton) is under 1 KiB
+DATAGRAM_SLOT_BYTES = 1024
+
+# Linux only; the socket module does not export it
+SO_RXQ_OVFL = 40
+OVERFLOW_CMSG_SPACE = socket.CMSG_SPACE(4) if hasattr(socket, "CMSG_SPACE") else 0
+
+
+class ReceiverCounters(BaseModel):
+    wakeups: int = 0
+    datagrams: int = 0
+    decode_errors: int = 0
+    largest_batch: int = 0
+    # datagrams the kernel dropped because the socket buffer was full; stays None
+    # where SO_RXQ_OVFL is unavailable
+    kernel_drops: int | None = None
+
+
+class RingBuffer:
+    def __init__(self, slots: int, slot_size: int = DATAGRAM_SLOT_BYTES) -> None:
+        self.slots = slots
+        self.slot_size = slot_size
+        self.buffer = bytearray(slots * slot_size)
+        view = memoryview(self.buffer)
+        self.views = [view[i * slot_size : (i + 1) * slot_size] for i in range(slots)]
+        self.position = 0
+
+    def next_slot(self) -> memoryview:
+        view = self.views[self.position]
+        self.position = (self.position + 1) % self.slots
+        return view
+
+
+class BatchReceiver:
+    def __init__(
+        self,
+        sock: socket.socket,
+        on_batch: Callable[[list[tuple[Message, Address]]], None],
+        slots: int = 256,
+    ) -> None:
+        self.sock = sock
+        self.on_batch = on_batch
+        self.ring = RingBuffer(slots)
+        self.counters = ReceiverCounters()
+        # returns True for datagrams it has taken over, which are then not decoded;
+        # the view is only valid for the duration of the call
+        self.route: Callable[[bytes | memoryview, Address], bool] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        sock.setblocking(False)  # noqa: FBT003
+        self.track_overflow = self._enable_overflow_tracking()
+        if self.track_overflow:
+            self.counters.kernel_drops = 0
+
+    def _enable_overflow_tracking(self) -> bool:
+        if not sys.platform.startswith("linux") or not OVERFLOW_CMSG_SPACE:
+            return False
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+        except OSError:
+            return False
+        return True
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.sock.fileno(), self._on_readable)
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.remove_reader(self.sock.fileno())
+            self._loop = None
+
+    def drain(self) -> list[Datagram]:
+        # the views point into the ring and are overwritten by the next drain, so
+        # they must be decoded before returning to the event loop
+        datagrams: list[Datagram] = []
+        # bounded by the ring so one wakeup cannot starve the rest of the loop
+        for _ in range(self.ring.slots):
+            slot = self.ring.next_slot()
+            try:
+                size, addr = self._receive_into(slot)
+            except (BlockingIOError, InterruptedError):
+                break
+            datagrams.append((slot[:size], addr))
+        return datagrams
+
+    def _receive_into(self, slot: memoryview) -> tuple[int, Address]:
+        if not self.track_overflow:
+            return self.sock.recvfrom_into(slot)
+        size, ancdata, _, addr = self.sock.recvmsg_into([slot], OVERFLOW_CMSG_SPACE)
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                # the kernel reports the running total for the socket
+                (self.counters.kernel_drops,) = struct.unpack("=I", data[:4])
+        return size, addr
+
+    def _on_readable(self) -> None:
+        datagrams = self.drain()
+        self.counters.wakeups += 1
+        if not datagrams:
+            return
+        self.counters.datagrams += len(datagrams)
+        self.counters.largest_batch = max(self.counters.largest_batch, len(datagrams))
+        if self.route is not None:
+            route = self.route
+            datagrams = [
+                (data, addr) for data, addr in datagrams if not route(data, addr)
+            ]
+        self.receive(datagrams)
+
+    def receive(self, datagrams: list[Datagram]) -> None:
+        if not datagrams:
+            return
+        messages = unpack_lifx_messages([data for data, _ in datagrams])
+        batch = []
+        for message, (_, addr) in zip(messages, datagrams, strict=True):
+            if message is None:
+                self.counters.decode_errors += 1
+                continue
+            batch.append((message, addr))
+        if batch:
+            self.on_batch(batch)
@@ -0,0 +1,92 @@
+import asyncio
+import math
+from collections.abc import Callable
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import MessageType
+
+FIRE_AND_FORGET_SETS = frozenset(
+    {
+        MessageType.SetPower,
+        MessageType.LightSetColor,
+        MessageType.LightSetPower,
+        MessageType.LightSetWaveform,
+        MessageType.LightSetWaveformOptional,
+        MessageType.MultiZoneSetColorZones,
+        MessageType.MultiZoneSetExtendedColorZones,
+        MessageType.TileSet64,
+        MessageType.SetRPower,
+    }
+)
+
+
+class LossEstimator:
+    def __init__(self, alpha: float = 0.1, min_samples: int = 5) -> None:
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self._round_trip_loss: dict[str, float] = {}
+        self._samples: dict[str, int] = {}
+
+    def record(self, target: str, *, delivered: bool) -> None:
+        sample = 0.0 if delivered else 1.0
+        previous = self._round_trip_loss.get(target, sample)
+        self._round_trip_loss[target] = previous + self.alpha * (sample - previous)
+        self._samples[target] = self._samples.get(target, 0) + 1
+
+    def round_trip_loss(self, target: str) -> float:
+        if self._samples.get(target, 0) < self.min_samples:
+            return 0.0
+        return self._round_trip_loss[target]
+
+    def loss(self, target: str) -> float:
+        # An attempt fails if either the request or the reply is lost; assuming
+        # both directions are equally lossy, one-way loss is 1 - sqrt(1 - p).
+        return 1 - math.sqrt(1 - min(self.round_trip_loss(target), 1.0))
+
+
+class RedundancyPolicy(BaseModel):
+    message_types: frozenset[MessageType] = FIRE_AND_FORGET_SETS
+    loss_threshold: float = 0.05
+    target_delivery: float = 0.999
+    max_copies: int = 4
+    spacing: float = 0.005
+
+    def copies(self, loss: float) -> int:
+        if loss <= self.loss_threshold:
+            return 1
+        if loss >= 1:
+            return self.max_copies
+        needed = math.ceil(math.log(1 - self.target_delivery) / math.log(loss))
+        return max(1, min(needed, self.max_copies))
+
+
+class RedundantSender:
+    def __init__(
+        self,
+        send: Callable[[Message], None],
+        loss_estimator: LossEstimator,
+        policy: RedundancyPolicy | None = None,
+    ) -> None:
+        self._send = send
+        self.loss_estimator = loss_estimator
+        self.policy = policy or RedundancyPolicy()
+        self.redundant_copies_sent = 0
+
+    def send(self, message: Message) -> int:
+        self._send(message)
+        if (
+            message.ack_requested
+            or message.response_requested
+            or message.message_type not in self.policy.message_types
+        ):
+            return 1
+        copies = self.policy.copies(self.loss_estimator.loss(message.target_addr))
+        loop = asyncio.get_running_loop()
+        # copies keep the same seq_num and packed bytes, spaced so a short burst of
+        # interference does not swallow them all
+        for i in range(1, copies):
+            loop.call_later(i * self.policy.spacing, self._send, message)
+        self.redundant_copies_sent += copies - 1
+        return copies
@@ -0,0 +1,289 @@
+import asyncio
+import struct
+from collections.abc import Callable
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import ByteArrayPayload
+from aiolifx.models.message_types import EchoRequest
+from aiolifx.models.message_types import MessageType
+from aiolifx.transport.circuit_breaker import CircuitBreaker
+from aiolifx.transport.circuit_breaker import CircuitBreakerPolicy
+from aiolifx.transport.circuit_breaker import CircuitOpenError
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.hedging import HedgingCounters
+from aiolifx.transport.hedging import HedgingPolicy
+from aiolifx.transport.redundancy import LossEstimator
+from aiolifx.transport.rtt import RttEstimator
+
+
+class RetryPolicy(BaseModel):
+    max_attempts: int = 5
+    initial_rto: float = 1.0
+    min_rto: float = 0.05
+    max_rto: float = 5.0
+    backoff_factor: float = 2.0
+    max_timeout: float = 10.0
+
+    def timeout(self, rto: float, attempt: int) -> float:
+        return min(rto * self.backoff_factor**attempt, self.max_timeout)
+
+
+class PendingRequest:
+    def __init__(self, message: Message, future: "asyncio.Future[Message]") -> None:
+        self.message = message
+        self.future = future
+        self.ack_only = not message.response_requested
+        # sequence number -> send time, one entry per hedged copy
+        self.sent_at: dict[int, float] = {}
+
+
+class RetryEngine:
+    def __init__(
+        self,
+        send: Callable[[Message], None],
+        source_id: int,
+        *,
+        policy: RetryPolicy | None = None,
+        hedging: HedgingPolicy | None = None,
+        circuit_breaker: CircuitBreakerPolicy | None = None,
+    ) -> None:
+        self._send = send
+        self.source_id = source_id
+        self.policy = policy or RetryPolicy()
+        self.hedging = hedging
+        self.hedging_counters = HedgingCounters()
+        self.circuit_breaker = circuit_breaker
+        self.circuit_listeners: list[Callable[[str, CircuitState], None]] = []
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.loss_estimator = LossEstimator()
+        self._estimators: dict[str, RttEstimator] = {}
+        self._sequences: dict[str, int] = {}
+        self._pending: dict[tuple[str, int], PendingRequest] = {}
+
+    def estimator(self, target: str) -> RttEstimator:
+        estimator = self._estimators.get(target)
+        if estimator is None:
+            estimator = RttEstimator(
+                initial_rto=self.policy.initial_rto,
+                min_rto=self.policy.min_rto,
+                max_rto=self.policy.max_rto,
+            )
+            self._estimators[target] = estimator
+        return estimator
+
+    def breaker(self, target: str) -> CircuitBreaker | None:
+        if self.circuit_breaker is None:
+            return None
+        breaker = self._breakers.get(target)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                target, self.circuit_breaker, on_state_change=self._notify_circuit
+            )
+            self._breakers[target] = breaker
+        return breaker
+
+    def next_seq_num(self, target: str) -> int:
+        seq_num = self._sequences.get(target, -1)
+        for _ in range(256):
+            seq_num = (seq_num + 1) % 256
+            if (target, seq_num) not in self._pending:
+                break
+        self._sequences[target] = seq_num
+        return seq_num
+
+    async def request(self, message: Message) -> Message:
+        if not (message.ack_requested or message.response_requested):
+            msg = "Message must request an acknowledgement or a response"
+            raise ValueError(msg)
+        target = message.target_addr
+        key = (target, message.seq_num)
+        if key in self._pending:
+            msg = f"Sequence number {message.seq_num} already in flight to {target}"
+            raise ValueError(msg)
+
+        loop = asyncio.get_running_loop()
+        attempts = self._admit(target, loop.time())
+        estimator = self.estimator(target)
+        pending = PendingRequest(message, loop.create_future())
+        self._pending[key] = pending
+        try:
+            reply = await self._attempt(pending, attempts, estimator)
+        except asyncio.CancelledError:
+            # the caller gave up, which says nothing about the device's health
+            self._abandon_circuit(target)
+            raise
+        finally:
+            for seq_num in pending.sent_at:
+                del self._pending[target, seq_num]
+            if not pending.future.done():
+                pending.future.cancel()
+        self._settle_circuit(target, loop.time(), succeeded=reply is not None)
+        if reply is None:
+            msg = f"No reply from {target} after {attempts} attempts"
+            raise asyncio.TimeoutError(msg)
+        return reply
+
+    async def _attempt(
+        self, pending: PendingRequest, attempts: int, estimator: RttEstimator
+    ) -> Message | None:
+        loop = asyncio.get_running_loop()
+        message = pending.message
+        for attempt in range(attempts):
+            pending.sent_at[message.seq_num] = loop.time()
+            self._send(message)
+            timeout = self.policy.timeout(estimator.rto, attempt)
+            hedge_after = None
+            if attempt == 0:
+                hedge_after = self._hedge_after(message, estimator, timeout)
+            reply = await self._await_reply(pending, timeout, hedge_after)
+            self.loss_estimator.record(message.target_addr, delivered=reply is not None)
+            if reply is None:
+                continue
+            if reply.seq_num != message.seq_num:
+                self.hedging_counters.hedge_wins += 1
+            # Karn's algorithm: retransmissions reuse the sequence number, so
+            # only a first-attempt reply is an unambiguous RTT sample.
+            if attempt == 0:
+                now = loop.time()
+                estimator.update(now - pending.sent_at[reply.seq_num], now)
+            return reply
+        return None
+
+    def _admit(self, target: str, now: float) -> int:
+        breaker = self.breaker(target)
+        if breaker is None:
+            return self.policy.max_attempts
+        if not breaker.allow_request(now):
+            raise CircuitOpenError(target)
+        # the half-open trial is a single cheap attempt, not a full schedule
+        if breaker.state == CircuitState.HALF_OPEN:
+            return 1
+        return self.policy.max_attempts
+
+    def _settle_circuit(self, target: str, now: float, *, succeeded: bool) -> None:
+        breaker = self.breaker(target)
+        if breaker is None:
+            return
+        if succeeded:
+            breaker.record_success()
+        else:
+            breaker.record_failure(now)
+
+    def _abandon_circuit(self, target: str) -> None:
+        breaker = self.breaker(target)
+        if breaker is not None:
+            breaker.abandon_trial()
+
+    def _notify_circuit(self, target: str, state: CircuitState) -> None:
+        for listener in self.circuit_listeners:
+            listener(target, state)
+
+    def _hedge_after(
+        self, message: Message, estimator: RttEstimator, timeout: float
+    ) -> float | None:
+        if self.hedging is None or message.message_type not in self.hedging.message_types:
+            return None
+        self.hedging_counters.eligible_requests += 1
+        if estimator.samples < self.hedging.min_samples:
+            return None
+        delay = estimator.percentile(self.hedging.percentile)
+        if delay is None or delay >= timeout:
+            return None
+        return delay
+
+    async def _await_reply(
+        self, pending: PendingRequest, timeout: float, hedge_after: float | None
+    ) -> Message | None:
+        if hedge_after is None:
+            return await self._wait(pending.future, timeout)
+        reply = await self._wait(pending.future, hedge_after)
+        if reply is None:
+            self._send_hedge(pending)
+            reply = await self._wait(pending.future, timeout - hedge_after)
+        return reply
+
+    def _send_hedge(self, pending: PendingRequest) -> None:
+        target = pending.message.target_addr
+        hedge = pending.message.model_copy(update={"seq_num": self.next_seq_num(target)})
+        hedge.packed_message = None
+        self._pending[target, hedge.seq_num] = pending
+        pending.sent_at[hedge.seq_num] = asyncio.get_running_loop().time()
+        self._send(hedge)
+        self.hedging_counters.hedges_sent += 1
+
+    async def _wait(
+        self, future: "asyncio.Future[Message]", timeout: float
+    ) -> Message | None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def handle_message(self, message: Message) -> bool:
+        if message.source_id != self.source_id:
+            return False
+        pending = self._pending.get((message.target_addr, message.seq_num))
+        if pending is None or pending.future.done():
+            return False
+        is_ack = message.message_type == MessageType.Acknowledgement
+        if is_ack == pending.ack_only:
+            pending.future.set_result(message)
+        return True
+
+    def handle_batch(self, messages: list[Message]) -> list[bool]:
+        # one pass over a whole receive batch; the result lines up with messages
+        # so callers can pass on whatever was not a reply to us
+        pending_requests = self._pending
+        source_id = self.source_id
+        claimed: list[bool] = []
+        for message in messages:
+            if message.source_id != source_id:
+                claimed.append(False)
+                continue
+            pending = pending_requests.get((message.target_addr, message.seq_num))
+            if pending is None or pending.future.done():
+                claimed.append(False)
+                continue
+            is_ack = message.message_type == MessageType.Acknowledgement
+            if is_ack == pending.ack_only:
+                pending.future.set_result(message)
+            claimed.append(True)
+        return claimed
+
+    async def probe(self, target: str) -> float:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        message = EchoRequest(
+            source_id=self.source_id,
+            target_addr=target,
+            seq_num=self.next_seq_num(target),
+            response_requested=True,
+            payload=ByteArrayPayload(byte_array=list(struct.pack("<d", started))),
+        )
+        await self.request(message)
+        return loop.time() - started
+
+    def idle_targets(self, idle_after: float) -> list[str]:
+        now = asyncio.get_running_loop().time()
+        return [
+            target
+            for target, estimator in self._estimators.items()
+            if estimator.updated_at is None or now - estimator.updated_at > idle_after
+        ]
+
+    async def probe_idle(self, idle_after: float) -> None:
+        await asyncio.gather(
+            *(self.probe(target) for target in self.idle_targets(idle_after)),
+            return_exceptions=True,
+        )
+
+    async def probe_circuits(self) -> None:
+        now = asyncio.get_running_loop().time()
+        due = [
+            target for target, breaker in self._breakers.items() if breaker.reset_due(now)
+        ]
+        await asyncio.gather(
+            *(self.probe(target) for target in due), return_exceptions=True
+        )
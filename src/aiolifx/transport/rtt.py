@@ -0,0 +1,50 @@
+from collections import deque
+
+
+class RttEstimator:
+    # RFC 6298 smoothing gains and variance multiplier
+    alpha: float = 0.125
+    beta: float = 0.25
+    k: int = 4
+
+    def __init__(
+        self,
+        initial_rto: float = 1.0,
+        min_rto: float = 0.05,
+        max_rto: float = 5.0,
+        granularity: float = 0.001,
+        window: int = 64,
+    ) -> None:
+        self.initial_rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.granularity = granularity
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.samples = 0
+        self.updated_at: float | None = None
+        self._window: deque[float] = deque(maxlen=window)
+
+    def update(self, rtt: float, now: float) -> None:
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.beta) * self.rttvar + self.beta * abs(self.srtt - rtt)
+            self.srtt = (1 - self.alpha) * self.srtt + self.alpha * rtt
+        self.samples += 1
+        self.updated_at = now
+        self._window.append(rtt)
+
+    def percentile(self, q: float) -> float | None:
+        if not self._window:
+            return None
+        ordered = sorted(self._window)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    @property
+    def rto(self) -> float:
+        if self.srtt is None or self.rttvar is None:
+            return self.initial_rto
+        rto = self.srtt + max(self.granularity, self.k * self.rttvar)
+        return min(max(rto, self.min_rto), self.max_rto)
@@ -0,0 +1,188 @@
+import asyncio
+from collections import deque
+from collections.abc import Callable
+from collections.abc import Hashable
+from enum import IntEnum
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import MessageType
+
+
+class PriorityClass(IntEnum):
+    CONTROL = 0
+    INTERACTIVE = 1
+    BULK = 2
+    BACKGROUND = 3
+
+
+DEFAULT_PRIORITIES: dict[MessageType, PriorityClass] = {
+    MessageType.SetPower: PriorityClass.CONTROL,
+    MessageType.LightSetPower: PriorityClass.CONTROL,
+    MessageType.SetRPower: PriorityClass.CONTROL,
+    MessageType.MultiZoneSetColorZones: PriorityClass.BULK,
+    MessageType.MultiZoneSetExtendedColorZones: PriorityClass.BULK,
+    MessageType.TileSet64: PriorityClass.BULK,
+}
+
+
+def default_priority(message: Message) -> PriorityClass:
+    priority = DEFAULT_PRIORITIES.get(message.message_type)
+    if priority is not None:
+        return priority
+    if "Get" in message.message_type.name:
+        return PriorityClass.BACKGROUND
+    return PriorityClass.INTERACTIVE
+
+
+class SchedulerPolicy(BaseModel):
+    # LIFX recommend no more than 20 messages per second per device
+    rate: float = 20.0
+    burst: int = 5
+    max_bulk_age: float = 0.1
+
+
+class SchedulerCounters(BaseModel):
+    sent: int = 0
+    # datagrams sent by streams on budget taken with reserve
+    reserved: int = 0
+    coalesced: int = 0
+    dropped_stale: int = 0
+
+
+class QueuedMessage:
+    def __init__(
+        self, message: Message, enqueued_at: float, coalesce_key: Hashable | None
+    ) -> None:
+        self.message = message
+        self.enqueued_at = enqueued_at
+        self.coalesce_key = coalesce_key
+
+
+class TargetQueue:
+    def __init__(self, policy: SchedulerPolicy, now: float) -> None:
+        self.policy = policy
+        self.queues: dict[PriorityClass, deque[QueuedMessage]] = {
+            priority: deque() for priority in PriorityClass
+        }
+        self.tokens = float(policy.burst)
+        self.refilled_at = now
+
+    def push(self, entry: QueuedMessage, priority: PriorityClass) -> bool:
+        queue = self.queues[priority]
+        if entry.coalesce_key is not None:
+            for queued in queue:
+                if queued.coalesce_key == entry.coalesce_key:
+                    queued.message = entry.message
+                    queued.enqueued_at = entry.enqueued_at
+                    return True
+        queue.append(entry)
+        return False
+
+    def pop(self, now: float, counters: SchedulerCounters) -> QueuedMessage | None:
+        for priority, queue in self.queues.items():
+            while queue:
+                entry = queue.popleft()
+                if (
+                    priority == PriorityClass.BULK
+                    and now - entry.enqueued_at > self.policy.max_bulk_age
+                ):
+                    counters.dropped_stale += 1
+                    continue
+                return entry
+        return None
+
+    def pending_before(self, priority: PriorityClass) -> bool:
+        return any(queue for queued, queue in self.queues.items() if queued < priority)
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.refilled_at
+        self.tokens = min(self.tokens + elapsed * self.policy.rate, self.policy.burst)
+        self.refilled_at = now
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+
+class SendScheduler:
+    def __init__(
+        self, send: Callable[[Message], None], policy: SchedulerPolicy | None = None
+    ) -> None:
+        self._send = send
+        self.policy = policy or SchedulerPolicy()
+        self.counters = SchedulerCounters()
+        self._queues: dict[str, TargetQueue] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def submit(
+        self,
+        message: Message,
+        priority: PriorityClass | None = None,
+        coalesce_key: Hashable | None = None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        target = message.target_addr
+        queue = self._queue(target, now)
+        if priority is None:
+            priority = default_priority(message)
+        if queue.push(QueuedMessage(message, now, coalesce_key), priority):
+            self.counters.coalesced += 1
+        if target not in self._tasks:
+            self._tasks[target] = loop.create_task(self._drain(target, queue))
+
+    def reserve(
+        self, target: str, packets: int, priority: PriorityClass = PriorityClass.BULK
+    ) -> float:
+        # For senders that encode their own datagrams, such as a zone stream: 0
+        # means the packets were taken from the target's budget and can go now,
+        # otherwise the seconds to wait before asking again. Anything queued at a
+        # more urgent priority goes out first.
+        now = asyncio.get_running_loop().time()
+        queue = self._queue(target, now)
+        queue.refill(now)
+        if queue.pending_before(priority):
+            return 1 / self.policy.rate
+        # more packets than the burst are let through on a full bucket and
+        # paid back before anything else may send
+        needed = min(packets, self.policy.burst)
+        if queue.tokens < needed:
+            return (needed - queue.tokens) / self.policy.rate
+        queue.tokens -= packets
+        self.counters.reserved += packets
+        return 0.0
+
+    def pending(self, target: str) -> int:
+        queue = self._queues.get(target)
+        return 0 if queue is None else len(queue)
+
+    def _queue(self, target: str, now: float) -> TargetQueue:
+        queue = self._queues.get(target)
+        if queue is None:
+            queue = self._queues[target] = TargetQueue(self.policy, now)
+        return queue
+
+    async def _drain(self, target: str, queue: TargetQueue) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                now = loop.time()
+                queue.refill(now)
+                if queue.tokens < 1:
+                    await asyncio.sleep((1 - queue.tokens) / self.policy.rate)
+                    continue
+                entry = queue.pop(now, self.counters)
+                if entry is None:
+                    break
+                queue.tokens -= 1
+                self._send(entry.message)
+                self.counters.sent += 1
+        finally:
+            del self._tasks[target]
+
+    async def close(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
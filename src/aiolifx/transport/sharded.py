@@ -0,0 +1,308 @@
+import asyncio
+import contextlib
+import itertools
+import multiprocessing
+import zlib
+from collections.abc import Callable
+from multiprocessing.connection import Connection
+from typing import Any
+
+from pydantic import BaseModel
+
+from aiolifx.models.message import Message
+from aiolifx.transport.receiver import Address
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.udp import UdpTransport
+
+# offset of the 6 significant target address bytes in the frame address
+MAC_OFFSET = 8
+MAC_SIZE = 6
+
+
+def shard_for_raw_mac(raw_mac: bytes, shards: int) -> int:
+    return zlib.crc32(raw_mac) % shards
+
+
+def shard_for(mac: str, shards: int) -> int:
+    return shard_for_raw_mac(bytes.fromhex(mac.replace(":", "")), shards)
+
+
+class ShardCounters(BaseModel):
+    requests: int = 0
+    sends: int = 0
+    forwarded: int = 0
+    adopted: int = 0
+
+
+class ShardWorker:
+    def __init__(self, index: int, shards: int, source_id: int, conn: Connection) -> None:
+        self.index = index
+        self.shards = shards
+        self.conn = conn
+        self.counters = ShardCounters()
+        self.transport = UdpTransport(
+            self.handle_message, batched=True, reuse_port=True, on_batch=self.handle_batch
+        )
+        self.engine = RetryEngine(self.transport.send, source_id)
+        self._stopped: asyncio.Event | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def run(self, local_addr: Address) -> None:
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        await self.transport.open(local_addr)
+        receiver = self.transport.receiver
+        if receiver is None:
+            msg = "Batched transport did not open a receiver"
+            raise RuntimeError(msg)
+        receiver.route = self.route
+        loop.add_reader(self.conn.fileno(), self._on_command)
+        self.conn.send(("ready", self.transport.local_address))
+        try:
+            await self._stopped.wait()
+        finally:
+            loop.remove_reader(self.conn.fileno())
+            for task in self._tasks:
+                task.cancel()
+            self.transport.close()
+
+    def route(self, data: bytes | memoryview, addr: Address) -> bool:
+        # The kernel spreads SO_REUSEPORT traffic by flow hash, not by MAC, so
+        # datagrams for another shard are handed over undecoded; only the owner
+        # ever pays for unpacking them.
+        owner = shard_for_raw_mac(data[MAC_OFFSET : MAC_OFFSET + MAC_SIZE], self.shards)
+        if owner == self.index:
+            return False
+        # the receive slot is reused, so the handover needs its own copy
+        self.conn.send(("forward", owner, bytes(data), addr))
+        self.counters.forwarded += 1
+        return True
+
+    def handle_message(self, message: Message, addr: Address) -> None:
+        self.handle_batch([(message, addr)])
+
+    def handle_batch(self, batch: list[tuple[Message, Address]]) -> None:
+        addresses = self.transport.addresses
+        for message, addr in batch:
+            addresses[message.target_addr] = addr
+        claimed = self.engine.handle_batch([message for message, _ in batch])
+        unclaimed = [
+            item for item, is_reply in zip(batch, claimed, strict=True) if not is_reply
+        ]
+        if unclaimed:
+            self.conn.send(("messages", unclaimed))
+
+    def _on_command(self) -> None:
+        while self.conn.poll():
+            command, *args = self.conn.recv()
+            self._commands[command](self, *args)
+
+    def _request(self, call_id: int, message: Message, address: Address) -> None:
+        self.counters.requests += 1
+        self.transport.addresses[message.target_addr] = address
+        task = asyncio.get_running_loop().create_task(self._reply(call_id, message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reply(self, call_id: int, message: Message) -> None:
+        try:
+            reply = await self.engine.request(message)
+        except Exception as exc:  # noqa: BLE001
+            self.conn.send(("error", call_id, exc))
+        else:
+            self.conn.send(("result", call_id, reply))
+
+    def _send(self, message: Message, address: Address) -> None:
+        self.counters.sends += 1
+        self.transport.send_to(message, address)
+
+    def _adopt(self, data: bytes, addr: Address) -> None:
+        self.counters.adopted += 1
+        if self.transport.receiver is not None:
+            self.transport.receiver.receive([(data, addr)])
+
+    def _counters(self, call_id: int) -> None:
+        self.conn.send(("result", call_id, self.counters.model_copy()))
+
+    def _stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    _commands: dict[str, Callable[..., None]] = {  # noqa: RUF012
+        "request": _request,
+        "send": _send,
+        "datagram": _adopt,
+        "counters": _counters,
+        "stop": _stop,
+    }
+
+
+def run_worker(
+    index: int, shards: int, local_addr: Address, source_id: int, conn: Connection
+) -> None:
+    worker = ShardWorker(index, shards, source_id, conn)
+    asyncio.run(worker.run(local_addr))
+
+
+class ShardWorkerError(Exception):
+    def __init__(self, index: int) -> None:
+        super().__init__(f"Shard worker {index} exited")
+        self.index = index
+
+
+class ShardedTransport:
+    def __init__(
+        self,
+        workers: int,
+        source_id: int,
+        on_message: Callable[[Message, Address], None] | None = None,
+        start_timeout: float = 10.0,
+    ) -> None:
+        self.workers = workers
+        self.source_id = source_id
+        self.on_message = on_message
+        self.start_timeout = start_timeout
+        self.local_address: Address | None = None
+        self._conns: dict[int, Connection] = {}
+        self._processes: dict[int, multiprocessing.process.BaseProcess] = {}
+        # call id -> (worker index, future)
+        self._calls: dict[int, tuple[int, asyncio.Future[Any]]] = {}
+        self._call_ids = itertools.count()
+        self._ready: dict[int, asyncio.Future[Address]] = {}
+
+    def shard(self, mac: str) -> int:
+        return shard_for(mac, self.workers)
+
+    async def open(self, local_addr: Address = ("0.0.0.0", 0)) -> None:  # noqa: S104
+        try:
+            # the first worker picks the port when asked for an ephemeral one, the
+            # rest join its SO_REUSEPORT group
+            self.local_address = await self._start_worker(0, local_addr)
+            await asyncio.gather(
+                *(
+                    self._start_worker(index, self.local_address)
+                    for index in range(1, self.workers)
+                )
+            )
+        except BaseException:
+            await self.close()
+            raise
+
+    async def request(self, message: Message, address: Address) -> Message:
+        reply: Message = await self._call(
+            self.shard(message.target_addr), "request", message, address
+        )
+        return reply
+
+    def send(self, message: Message, address: Address) -> None:
+        index = self.shard(message.target_addr)
+        self._check_alive(index)
+        self._conns[index].send(("send", message, address))
+
+    async def counters(self) -> list[ShardCounters]:
+        return list(
+            await asyncio.gather(
+                *(self._call(index, "counters") for index in range(self.workers))
+            )
+        )
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        for index in list(self._conns):
+            conn = self._conns[index]
+            loop.remove_reader(conn.fileno())
+            with contextlib.suppress(OSError):
+                conn.send(("stop",))
+        for process in self._processes.values():
+            await loop.run_in_executor(None, process.join, 5)
+            if process.exitcode is None:
+                process.kill()
+        for conn in self._conns.values():
+            conn.close()
+        for _, future in self._calls.values():
+            future.cancel()
+        for future in self._ready.values():
+            future.cancel()
+        self._conns = {}
+        self._processes = {}
+        self._calls = {}
+        self._ready = {}
+
+    async def _start_worker(self, index: int, local_addr: Address) -> Address:
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=run_worker,
+            args=(index, self.workers, local_addr, self.source_id, child_conn),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._conns[index] = conn
+        self._processes[index] = process
+        ready = self._ready[index] = loop.create_future()
+        loop.add_reader(conn.fileno(), self._on_worker, index, conn)
+        return await asyncio.wait_for(ready, self.start_timeout)
+
+    def _check_alive(self, index: int) -> None:
+        process = self._processes.get(index)
+        if index not in self._conns or process is None or process.exitcode is not None:
+            raise ShardWorkerError(index)
+
+    def _call(self, index: int, command: str, *args: object) -> "asyncio.Future[Any]":
+        self._check_alive(index)
+        call_id = next(self._call_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = (index, future)
+        self._conns[index].send((command, call_id, *args))
+        return future
+
+    def _on_worker(self, index: int, conn: Connection) -> None:
+        try:
+            while conn.poll():
+                self._dispatch(index, *conn.recv())
+        except (EOFError, OSError):
+            # the pipe only reaches EOF once the worker process has gone away
+            self._worker_lost(index)
+
+    def _dispatch(self, index: int, event: str, *args: Any) -> None:  # noqa: ANN401
+        if event == "ready":
+            ready = self._ready.pop(index, None)
+            if ready is not None and not ready.done():
+                ready.set_result(args[0])
+        elif event == "forward":
+            owner, data, addr = args
+            if owner in self._conns:
+                self._conns[owner].send(("datagram", data, addr))
+        elif event == "messages":
+            if self.on_message is not None:
+                for message, addr in args[0]:
+                    self.on_message(message, addr)
+        else:
+            self._settle(event, *args)
+
+    def _worker_lost(self, index: int) -> None:
+        conn = self._conns.pop(index, None)
+        if conn is not None:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            conn.close()
+        error = ShardWorkerError(index)
+        ready = self._ready.pop(index, None)
+        if ready is not None and not ready.done():
+            ready.set_exception(error)
+        for call_id, (owner, future) in list(self._calls.items()):
+            if owner != index:
+                continue
+            del self._calls[call_id]
+            if not future.done():
+                future.set_exception(error)
+
+    def _settle(self, event: str, call_id: int, value: Any) -> None:  # noqa: ANN401
+        call = self._calls.pop(call_id, None)
+        if call is None or call[1].done():
+            return
+        if event == "error":
+            call[1].set_exception(value)
+        else:
+            call[1].set_result(value)
@@ -0,0 +1,140 @@
+import asyncio
+import socket
+from collections.abc import Callable
+from typing import cast
+
+from aiolifx.models.message import Message
+from aiolifx.resources.const import BROADCAST_ADDRESS
+from aiolifx.resources.const import LIFX_PORT
+from aiolifx.transport.receiver import Address
+from aiolifx.transport.receiver import BatchReceiver
+from aiolifx.unpack import unpack_lifx_message
+
+
+class LifxDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_message: Callable[[Message, Address], None]) -> None:
+        self.on_message = on_message
+        self.transport: asyncio.DatagramTransport | None = None
+        self.decode_errors = 0
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = cast("asyncio.DatagramTransport", transport)
+
+    def datagram_received(self, data: bytes, addr: Address) -> None:
+        try:
+            message = unpack_lifx_message(data)
+        except Exception:  # noqa: BLE001
+            self.decode_errors += 1
+            return
+        self.on_message(message, addr)
+
+
+class UdpTransport:
+    def __init__(  # noqa: PLR0913
+        self,
+        on_message: Callable[[Message, Address], None],
+        broadcast_address: str = BROADCAST_ADDRESS,
+        port: int = LIFX_PORT,
+        *,
+        batched: bool = False,
+        reuse_port: bool = False,
+        on_batch: Callable[[list[tuple[Message, Address]]], None] | None = None,
+    ) -> None:
+        self.on_message = on_message
+        # batched mode hands whole receive batches here instead of on_message
+        self.on_batch = on_batch
+        self.broadcast_address = broadcast_address
+        self.port = port
+        self.batched = batched
+        self.reuse_port = reuse_port
+        # MAC address -> (ip, port) of devices we can unicast to
+        self.addresses: dict[str, Address] = {}
+        self.protocol: LifxDatagramProtocol | None = None
+        self.receiver: BatchReceiver | None = None
+        # datagrams dropped because the socket send buffer was full
+        self.send_dropped = 0
+
+    async def open(self, local_addr: Address = ("0.0.0.0", 0)) -> None:  # noqa: S104
+        if self.batched:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            if self.reuse_port:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            sock.bind(local_addr)
+            self.receiver = BatchReceiver(sock, self._receive_batch)
+            self.receiver.start()
+            return
+        loop = asyncio.get_running_loop()
+        _, self.protocol = await loop.create_datagram_endpoint(
+            lambda: LifxDatagramProtocol(self._receive),
+            local_addr=local_addr,
+            family=socket.AF_INET,
+            allow_broadcast=True,
+            reuse_port=self.reuse_port or None,
+        )
+
+    def _receive(self, message: Message, addr: Address) -> None:
+        self._learn(message, addr)
+        self.on_message(message, addr)
+
+    def _receive_batch(self, batch: list[tuple[Message, Address]]) -> None:
+        for message, addr in batch:
+            self._learn(message, addr)
+        if self.on_batch is not None:
+            self.on_batch(batch)
+            return
+        for message, addr in batch:
+            self.on_message(message, addr)
+
+    def _learn(self, message: Message, addr: Address) -> None:
+        # every reply says where its device can be reached for unicast; tagged
+        # messages are broadcasts, such as our own GetService looping back
+        if not message.tagged:
+            self.addresses[message.target_addr] = addr
+
+    @property
+    def local_address(self) -> Address:
+        if self.receiver is not None:
+            address: Address = self.receiver.sock.getsockname()
+        elif self.protocol is None or self.protocol.transport is None:
+            msg = "Transport is not open"
+            raise RuntimeError(msg)
+        else:
+            address = self.protocol.transport.get_extra_info("sockname")
+        return address
+
+    def send(self, message: Message) -> None:
+        if message.tagged:
+            self.send_to(message, (self.broadcast_address, self.port))
+            return
+        address = self.addresses.get(message.target_addr)
+        if address is None:
+            msg = f"No known address for {message.target_addr}"
+            raise KeyError(msg)
+        self.send_to(message, address)
+
+    def send_to(self, message: Message, address: Address) -> None:
+        self.send_datagram(message.packed_message, address)
+
+    def send_datagram(self, data: bytes | memoryview, address: Address) -> None:
+        if self.receiver is not None:
+            try:
+                self.receiver.sock.sendto(data, address)
+            except (BlockingIOError, InterruptedError):
+                # the asyncio transport would buffer this; here the retry layer
+                # resends it instead
+                self.send_dropped += 1
+            return
+        if self.protocol is None or self.protocol.transport is None:
+            msg = "Transport is not open"
+            raise RuntimeError(msg)
+        self.protocol.transport.sendto(data, address)
+
+    def close(self) -> None:
+        if self.receiver is not None:
+            self.receiver.stop()
+            self.receiver.sock.close()
+            self.receiver = None
+        if self.protocol is not None and self.protocol.transport is not None:
+            self.protocol.transport.close()
+        self.protocol = None
@@ -1,6 +1,7 @@
 import binascii
 import struct
 from collections.abc import Callable
+from collections.abc import Iterable
 
 from aiolifx.models.message import Message
 from aiolifx.models.message_types import ButtonGesture
@@ -9,6 +10,11 @@ from aiolifx.models.message_types import MessageType
 from aiolifx.models.message_types import MessageTypes
 from aiolifx.resources.const import HEADER_SIZE_BYTES
 
+# accel x/y/z, reserved, user x/y, width, height, reserved, vendor, product,
+# reserved, firmware build, reserved, firmware minor/major, reserved
+TILE_DEVICE_STRUCT = struct.Struct("<hhhhffBBBIIIQQHHI")
+HSBK_STRUCT = struct.Struct("<HHHH")
+
 
 def add_state_service_payload(data: dict) -> None:
     service = struct.unpack("B", data["payload_str"][0:1])[0]
@@ -191,8 +197,9 @@ def add_echo_request_payload(data: dict) -> None:
 
 
 def add_light_set_color_payload(data: dict) -> None:
-    color = struct.unpack("H" * 4, data["payload_str"][0:8])
-    duration = struct.unpack("I", data["payload_str"][8:12])[0]
+    # the first byte is reserved
+    color = struct.unpack("H" * 4, data["payload_str"][1:9])
+    duration = struct.unpack("I", data["payload_str"][9:13])[0]
     data["payload"] = {"color": color, "duration": duration}
 
 
@@ -328,9 +335,10 @@ def add_tile_state_device_chain_payload(data: dict) -> None:
         "B", data["payload_str"][len(data["payload_str"]) - 1 : len(data["payload_str"])]
     )[0]
 
-    tile_devices = []
-    for i in range(tile_devices_count):
-        tile_devices.append(getTile(data["payload_str"][1 + (i * 55) : 55 + (i * 55)]))
+    tile_devices = [
+        _tile_device(data["payload_str"], 1 + i * TILE_DEVICE_STRUCT.size)
+        for i in range(tile_devices_count)
+    ]
 
     data["payload"] = {
         "start_index": start_index,
@@ -339,6 +347,42 @@ def add_tile_state_device_chain_payload(data: dict) -> None:
     }
 
 
+def _tile_device(payload: bytes | memoryview, offset: int) -> dict:
+    (
+        accel_meas_x,
+        accel_meas_y,
+        accel_meas_z,
+        _,
+        user_x,
+        user_y,
+        width,
+        height,
+        _,
+        device_version_vendor,
+        device_version_product,
+        _,
+        firmware_build,
+        _,
+        firmware_version_minor,
+        firmware_version_major,
+        _,
+    ) = TILE_DEVICE_STRUCT.unpack_from(payload, offset)
+    return {
+        "accel_meas_x": accel_meas_x,
+        "accel_meas_y": accel_meas_y,
+        "accel_meas_z": accel_meas_z,
+        "user_x": user_x,
+        "user_y": user_y,
+        "width": width,
+        "height": height,
+        "device_version_vendor": device_version_vendor,
+        "device_version_product": device_version_product,
+        "firmware_build": firmware_build,
+        "firmware_version_minor": firmware_version_minor,
+        "firmware_version_major": firmware_version_major,
+    }
+
+
 def add_tile_get_64_payload(data: dict) -> None:
     tile_index = struct.unpack("B", data["payload_str"][0:1])[0]
     length = struct.unpack("B", data["payload_str"][1:2])[0]
@@ -429,18 +473,21 @@ def add_state_relay_power_payload(data: dict) -> None:
 
 
 def add_state_button_config_payload(data: dict) -> None:
-    haptic_duration_ms = struct.unpack("B", data["payload_str"][:1])[0]
-
-    backlight_on_color_values = data["payload_str"][1:9]
-    backlight_on_color = getBacklightColor(backlight_on_color_values)
-
-    backlight_off_color_values = data["payload_str"][9:17]
-    backlight_off_color = getBacklightColor(backlight_off_color_values)
-
+    haptic_duration_ms = struct.unpack("<H", data["payload_str"][:2])[0]
     data["payload"] = {
         "haptic_duration_ms": haptic_duration_ms,
-        "backlight_on_color": backlight_on_color,
-        "backlight_off_color": backlight_off_color,
+        "backlight_on_color": _backlight_color(data["payload_str"], 2),
+        "backlight_off_color": _backlight_color(data["payload_str"], 10),
+    }
+
+
+def _backlight_color(payload: bytes | memoryview, offset: int) -> dict:
+    hue, saturation, brightness, kelvin = HSBK_STRUCT.unpack_from(payload, offset)
+    return {
+        "hue": hue,
+        "saturation": saturation,
+        "brightness": brightness,
+        "kelvin": kelvin,
     }
 
 
@@ -488,33 +535,67 @@ payload_function_map: dict[MessageType, Callable[[dict], None]] = {
 }
 
 
-def unpack_lifx_message(packed_message: bytes) -> Message:
-    header_str = packed_message[0:HEADER_SIZE_BYTES]
-    payload_str = packed_message[HEADER_SIZE_BYTES:]
-    message_type = MessageType(struct.unpack("H", header_str[32:34])[0])
-    flags = struct.unpack("H", header_str[2:4])[0]
-    response_flags = struct.unpack("B", header_str[22:23])[0]
+# size, flags, source, target (6 of 8 bytes), response flags, sequence, message type
+HEADER_STRUCT = struct.Struct("<HHI6s2x6xBB8xH2x")
+
+_mac_cache: dict[bytes, str] = {}
+_message_type_cache: dict[int, MessageType] = {}
+
+
+def _format_mac(raw_mac: bytes) -> str:
+    mac = _mac_cache.get(raw_mac)
+    if mac is None:
+        mac = _mac_cache[raw_mac] = ":".join(f"{b:02x}" for b in raw_mac)
+    return mac
+
+
+def _message_type(value: int) -> MessageType:
+    message_type = _message_type_cache.get(value)
+    if message_type is None:
+        message_type = _message_type_cache[value] = MessageType(value)
+    return message_type
+
+
+def unpack_lifx_message(packed_message: bytes | memoryview) -> Message:
+    # Accepts a memoryview so receive buffers can be decoded in place; nothing
+    # in the returned message keeps a reference to it.
+    (size, flags, source_id, raw_mac, response_flags, seq_num, raw_type) = (
+        HEADER_STRUCT.unpack_from(packed_message)
+    )
+    message_type = _message_type(raw_type)
     data = {
-        "header_str": header_str,
-        "payload_str": payload_str,
-        "size": struct.unpack("H", header_str[0:2])[0],
+        "header_str": packed_message[0:HEADER_SIZE_BYTES],
+        "payload_str": packed_message[HEADER_SIZE_BYTES:],
+        "size": size,
         "flags": flags,
         "origin": (flags >> 14) & 3,
         "tagged": (flags >> 13) & 1,
         "addressable": (flags >> 12) & 1,
         "protocol": flags & 4095,
-        "source_id": struct.unpack("I", header_str[4:8])[0],
-        "target_addr": ":".join(
-            [(f"{b:02x}") for b in struct.unpack("B" * 6, header_str[8:14])]
-        ),
-        "ack_requested": response_flags & 2,
-        "response_requested": response_flags & 1,
-        "seq_num": struct.unpack("B", header_str[23:24])[0],
-        "message_type": struct.unpack("H", header_str[32:34])[0],
+        "source_id": source_id,
+        "target_addr": _format_mac(raw_mac),
+        "ack_requested": bool(response_flags & 2),
+        "response_requested": bool(response_flags & 1),
+        "seq_num": seq_num,
+        "message_type": raw_type,
         "response_flags": response_flags,
     }
     add_payload = payload_function_map.get(message_type)
     if add_payload is not None:
         add_payload(data=data)
-    message_class = MessageTypes[message_type]
-    return message_class.model_validate(data)
+    return MessageTypes[message_type].model_validate(data)
+
+
+def unpack_lifx_messages(
+    packed_messages: Iterable[bytes | memoryview],
+) -> list[Message | None]:
+    # Undecodable datagrams come back as None so results stay aligned with the
+    # batch they were received in; one bad reply must not cost the others.
+    return [_unpack_batched(packed_message) for packed_message in packed_messages]
+
+
+def _unpack_batched(packed_message: bytes | memoryview) -> Message | None:
+    try:
+        return unpack_lifx_message(packed_message)
+    except Exception:  # noqa: BLE001
+        return None
@@ -0,0 +1,173 @@
+import asyncio
+from pathlib import Path
+
+from aiolifx.fleet.bundle import StateBundleFetcher
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GroupPayload
+from aiolifx.models.message_types import LabelPayload
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePayload
+from aiolifx.models.message_types import LocationPayload
+from aiolifx.models.message_types import MessageType
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZonesPayload
+from aiolifx.models.message_types import StateGroup
+from aiolifx.models.message_types import StateHostFirmware
+from aiolifx.models.message_types import StateHostFirmwarePayload
+from aiolifx.models.message_types import StateLabel
+from aiolifx.models.message_types import StateLocation
+from aiolifx.models.message_types import StateVersion
+from aiolifx.models.message_types import StateVersionPayload
+from aiolifx.models.message_types import TileDevice
+from aiolifx.models.message_types import TileStateDeviceChain
+from aiolifx.models.message_types import TileStateDeviceChainPayload
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.unpack import unpack_lifx_message
+
+STRIP = "d0:73:d5:00:00:20"
+OLD_STRIP = "d0:73:d5:00:00:21"
+TILE = "d0:73:d5:00:00:22"
+# product 55 is the LIFX Tile, a matrix device
+TILE_VERSION = StateVersionPayload(vendor=1, product=55, version=0)
+# firmware 2.70, older than the 2.77 extended multizone minimum for the LIFX Z
+OLD_FIRMWARE = StateHostFirmwarePayload(
+    build=1532997580000000000, reserved1=0, version=(2 << 16) | 70
+)
+
+REPLIES: dict[MessageType, tuple[type[Message], object]] = {
+    MessageType.GetVersion: (
+        StateVersion,
+        StateVersionPayload(vendor=1, product=32, version=0),
+    ),
+    MessageType.GetHostFirmware: (
+        StateHostFirmware,
+        StateHostFirmwarePayload(
+            build=1665979694000000000, reserved1=0, version=(2 << 16) | 80
+        ),
+    ),
+    MessageType.GetLabel: (StateLabel, LabelPayload(label="Strip")),
+    MessageType.GetGroup: (
+        StateGroup,
+        GroupPayload(group=[1] * 16, label="Lounge", updated_at=1),
+    ),
+    MessageType.GetLocation: (
+        StateLocation,
+        LocationPayload(location=[2] * 16, label="Home", updated_at=1),
+    ),
+    MessageType.LightGet: (
+        LightState,
+        LightStatePayload(
+            color=[0, 0, 65535, 3500],
+            reserved1=0,
+            power_level=65535,
+            label=b"",
+            reserved2=0,
+        ),
+    ),
+    MessageType.MultiZoneGetExtendedColorZones: (
+        MultiZoneStateExtendedColorZones,
+        MultiZoneStateExtendedColorZonesPayload(
+            zones_count=2,
+            zone_index=0,
+            colors_count=2,
+            # the reply always has room for 82 colours
+            colors=[[0, 0, 0, 3500]] * 2 + [[0, 0, 0, 0]] * 80,
+        ),
+    ),
+    MessageType.TileGetDeviceChain: (
+        TileStateDeviceChain,
+        TileStateDeviceChainPayload(
+            start_index=0,
+            tile_devices=[
+                TileDevice(
+                    accel_meas_x=0,
+                    accel_meas_y=0,
+                    accel_meas_z=0,
+                    user_x=0.5,
+                    user_y=0.5,
+                    width=8,
+                    height=8,
+                    device_version_vendor=1,
+                    device_version_product=55,
+                    firmware_build=0,
+                    firmware_version_minor=50,
+                    firmware_version_major=3,
+                )
+            ],
+            tile_devices_count=1,
+        ),
+    ),
+}
+
+
+def test_bundle_pipelines_gets_by_capability(tmp_path: Path) -> None:
+    async def scenario() -> None:
+        bursts: list[list[MessageType]] = [[]]
+        engine: RetryEngine
+
+        def send(message: Message) -> None:
+            bursts[-1].append(message.message_type)
+            reply_type, payload = REPLIES[message.message_type]
+            if (
+                message.target_addr == OLD_STRIP
+                and message.message_type == MessageType.GetHostFirmware
+            ):
+                payload = OLD_FIRMWARE
+            if message.target_addr == TILE and message.message_type == (
+                MessageType.GetVersion
+            ):
+                payload = TILE_VERSION
+            # replies go over the wire format so their decoders are covered too
+            reply = unpack_lifx_message(
+                reply_type(
+                    source_id=message.source_id,
+                    target_addr=message.target_addr,
+                    seq_num=message.seq_num,
+                    payload=payload,
+                ).packed_message
+            )
+            asyncio.get_running_loop().call_soon(engine.handle_message, reply)
+
+        engine = RetryEngine(send, source_id=9)
+        registry = DeviceRegistry(tmp_path / "registry.json")
+        fetcher = StateBundleFetcher(engine, registry)
+
+        bundle = await fetcher.fetch(STRIP)
+        assert bundle.complete
+        assert bundle.round_trips == 2
+        assert bundle.extended_color_zones is not None
+        assert bundle.device_chain is None
+        assert len(set(bursts[0])) == 7
+        assert registry.devices[STRIP].label == "Strip"
+
+        # once the registry knows the product everything goes out in one burst
+        bursts.append([])
+        bundle = await fetcher.fetch(STRIP)
+        assert bundle.round_trips == 1
+        assert len(bursts[-1]) == 7
+        assert bundle.light is not None
+
+        # firmware below the product's minimum only gets the legacy Gets
+        bundle = await fetcher.fetch(OLD_STRIP)
+        assert bundle.complete
+        assert bundle.light is not None
+        assert bundle.extended_color_zones is None
+        bursts.append([])
+        bundle = await fetcher.fetch(OLD_STRIP)
+        assert bundle.round_trips == 1
+        assert MessageType.MultiZoneGetExtendedColorZones not in bursts[-1]
+
+        # matrix products also fetch their tile chain
+        bundle = await fetcher.fetch(TILE)
+        assert bundle.complete
+        assert bundle.missing == []
+        assert bundle.device_chain is not None
+        assert bundle.device_chain.payload.tile_devices[0].width == 8
+        assert bundle.extended_color_zones is None
+        bursts.append([])
+        bundle = await fetcher.fetch(TILE)
+        assert bundle.round_trips == 1
+        assert MessageType.TileGetDeviceChain in bursts[-1]
+
+    asyncio.run(scenario())
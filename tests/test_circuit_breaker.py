@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import GetService
+from aiolifx.transport.circuit_breaker import CircuitBreaker
+from aiolifx.transport.circuit_breaker import CircuitBreakerPolicy
+from aiolifx.transport.circuit_breaker import CircuitOpenError
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.retry import RetryPolicy
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def test_breaker_trips_and_half_opens() -> None:
+    changes: list[tuple[str, CircuitState]] = []
+    breaker = CircuitBreaker(
+        TARGET,
+        CircuitBreakerPolicy(failure_threshold=2, reset_timeout=10),
+        on_state_change=lambda target, state: changes.append((target, state)),
+    )
+    breaker.record_failure(now=0)
+    assert breaker.allow_request(now=0)
+    breaker.record_failure(now=1)
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request(now=5)
+    assert breaker.allow_request(now=11)
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request(now=11)
+    breaker.record_failure(now=12)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.allow_request(now=22)
+    breaker.record_success()
+    assert [state for _, state in changes] == [
+        CircuitState.OPEN,
+        CircuitState.HALF_OPEN,
+        CircuitState.OPEN,
+        CircuitState.HALF_OPEN,
+        CircuitState.CLOSED,
+    ]
+
+
+def test_open_circuit_fails_fast() -> None:
+    sent: list[Message] = []
+    offline: list[str] = []
+
+    def on_change(target: str, state: CircuitState) -> None:
+        if state == CircuitState.OPEN:
+            offline.append(target)
+
+    async def run() -> None:
+        engine = RetryEngine(
+            sent.append,
+            source_id=7,
+            policy=RetryPolicy(max_attempts=2, initial_rto=0.01, min_rto=0.01),
+            circuit_breaker=CircuitBreakerPolicy(failure_threshold=1),
+        )
+        engine.circuit_listeners.append(on_change)
+        message = GetService(
+            source_id=7, target_addr=TARGET, seq_num=1, ack_requested=True
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await engine.request(message)
+        with pytest.raises(CircuitOpenError):
+            await engine.request(message)
+
+    asyncio.run(run())
+    assert len(sent) == 2
+    assert offline == [TARGET]
+
+
+def test_cancelled_request_leaves_circuit_closed() -> None:
+    async def run() -> None:
+        engine = RetryEngine(
+            lambda _: None,
+            source_id=7,
+            circuit_breaker=CircuitBreakerPolicy(failure_threshold=1),
+        )
+        message = GetService(
+            source_id=7, target_addr=TARGET, seq_num=1, response_requested=True
+        )
+        task = asyncio.create_task(engine.request(message))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        breaker = engine.breaker(TARGET)
+        assert breaker is not None
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failures == 0
+
+    asyncio.run(run())
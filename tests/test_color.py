@@ -0,0 +1,119 @@
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from aiolifx.color.convert import blend_kelvin
+from aiolifx.color.convert import hsbk_to_rgb
+from aiolifx.color.convert import hsbk_to_rgb_one
+from aiolifx.color.convert import kelvin_to_rgb
+from aiolifx.color.convert import rgb_to_hsbk
+from aiolifx.color.convert import rgb_to_hsbk_one
+from aiolifx.color.difference import color_difference
+from aiolifx.color.difference import perceptible
+from aiolifx.color.difference import skip_imperceptible
+from aiolifx.color.normalize import distinct_colors
+from aiolifx.color.normalize import normalize_colors
+from aiolifx.color.normalize import normalize_scene
+from aiolifx.fleet.registry import DeviceRecord
+
+# five tiles of 8x8 pixels
+FRAME_PIXELS = 5 * 64
+
+
+def random_rgb(count: int) -> np.ndarray:
+    return np.random.default_rng(1).integers(0, 256, size=(count, 3), dtype=np.uint8)
+
+
+def test_vectorized_conversion_matches_scalar_path() -> None:
+    rgb = random_rgb(FRAME_PIXELS)
+    hsbk = rgb_to_hsbk(rgb, kelvin=4000)
+    assert hsbk.dtype == np.uint16
+    assert hsbk.tolist() == [
+        rgb_to_hsbk_one(*color, kelvin=4000) for color in rgb.tolist()
+    ]
+    back = hsbk_to_rgb(hsbk)
+    assert back.tolist() == [list(hsbk_to_rgb_one(*color)) for color in hsbk.tolist()]
+    # saturated colours survive the round trip whatever the kelvin
+    assert rgb_to_hsbk([[255, 0, 0], [0, 0, 255]]).tolist() == [
+        [0, 65535, 65535, 3500],
+        [43690, 65535, 65535, 3500],
+    ]
+    assert hsbk_to_rgb([0, 65535, 65535, 9000]).tolist() == [255, 0, 0]
+
+
+def test_white_takes_the_kelvin_tint() -> None:
+    warm, cool = kelvin_to_rgb([2500, 9000])
+    assert warm[0] > warm[2]
+    assert cool[2] > cool[0]
+    assert hsbk_to_rgb([0, 0, 65535, 6600]).tolist() == [255, 255, 255]
+    blended = blend_kelvin([[0, 0, 65535, 2500]] * 2, [9000, 2500], 0.5)
+    assert blended[:, 3].tolist() == [5750, 2500]
+
+
+def test_vectorized_conversion_beats_scalar_loop() -> None:
+    rgb = random_rgb(FRAME_PIXELS)
+    colors = rgb.tolist()
+
+    def best_of(run: Callable[[], object], repeat: int = 5) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    vectorized = best_of(lambda: hsbk_to_rgb(rgb_to_hsbk(rgb)))
+    scalar = best_of(
+        lambda: [hsbk_to_rgb_one(*rgb_to_hsbk_one(*color)) for color in colors]
+    )
+    assert vectorized < scalar
+
+
+def test_scene_is_normalized_per_product() -> None:
+    devices = [
+        DeviceRecord(mac="d0:73:d5:00:00:01", product_id=27),
+        DeviceRecord(mac="d0:73:d5:00:00:02", product_id=10),
+        DeviceRecord(mac="d0:73:d5:00:00:03", product_id=31),
+        DeviceRecord(mac="d0:73:d5:00:00:04", product_id=10),
+        DeviceRecord(mac="d0:73:d5:00:00:05"),
+    ]
+    scene = [[21845.4, 65535, 70000, 1500]] * len(devices)
+    normalized = normalize_scene(devices, scene)
+    assert normalized.dtype == np.uint16
+    assert normalized.tolist() == [
+        [21845, 65535, 65535, 1500],
+        # white only: no hue or saturation, kelvin within 2700..6500
+        [0, 0, 65535, 2700],
+        [21845, 65535, 65535, 2500],
+        [0, 0, 65535, 2700],
+        [21845, 65535, 65535, 1500],
+    ]
+    unique, inverse = distinct_colors(normalized)
+    assert len(unique) == 3
+    assert (unique[inverse] == normalized).all()
+
+
+def test_zone_frames_are_normalized_per_device() -> None:
+    frames = np.full((2, 80, 4), [100, 200, 300, 9000], dtype=np.uint16)
+    normalized = normalize_colors([10, 31], frames)
+    assert (normalized[0] == [0, 0, 300, 6500]).all()
+    assert (normalized[1] == [100, 200, 300, 9000]).all()
+
+
+def test_color_difference_follows_what_the_eye_sees() -> None:
+    red = np.array([0, 65535, 65535, 3500], dtype=np.uint16)
+    colors = np.array(
+        [[0, 65535, 65300, 3500], [21845, 65535, 65535, 3500], [21845, 65535, 0, 3500]],
+        dtype=np.uint16,
+    )
+    reference = np.array([red, red, [0, 65535, 0, 3500]], dtype=np.uint16)
+    # a slight dimming and a hue turn in the dark are invisible, green is not
+    assert perceptible(colors, reference).tolist() == [False, True, False]
+    assert color_difference(red, red) == 0
+    kept = skip_imperceptible(reference, colors)
+    assert kept.tolist() == [
+        reference[0].tolist(),
+        colors[1].tolist(),
+        reference[2].tolist(),
+    ]
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from aiolifx.emulator import EmulatedFleet
+from aiolifx.fleet.discovery import Discovery
+from aiolifx.fleet.discovery import DiscoveryPolicy
+from aiolifx.fleet.discovery import SweepResult
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import StateService
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.udp import Address
+from aiolifx.transport.udp import UdpTransport
+from aiolifx.unpack import unpack_lifx_message
+from tests.data import packets
+
+
+def state_service_replies() -> list[Message]:
+    messages = [unpack_lifx_message(packet) for packet in packets]
+    return [message for message in messages if isinstance(message, StateService)]
+
+
+def test_sweeps_deduplicate_and_back_off() -> None:
+    sent: list[tuple[Message, Address]] = []
+    replies = state_service_replies()
+
+    def send_to(message: Message, address: Address) -> None:
+        sent.append((message, address))
+        for reply in replies:
+            loop.call_soon(discovery.handle_message, reply, ("192.168.1.20", 56700))
+
+    async def run() -> list[SweepResult]:
+        nonlocal loop
+        loop = asyncio.get_running_loop()
+        first = await discovery.sweep()
+        second = await discovery.sweep()
+        forced = await discovery.sweep(broadcast=True)
+        return [first, second, forced]
+
+    loop: asyncio.AbstractEventLoop
+    discovery = Discovery(send_to, source_id=7, policy=DiscoveryPolicy(reply_window=0.01))
+    first, second, forced = asyncio.run(run())
+
+    macs = {reply.target_addr for reply in replies}
+    assert set(discovery.devices) == macs
+    assert first.broadcast
+    assert first.replies == len(replies)
+    assert first.duplicates == len(replies) - len(
+        {(r.target_addr, r.payload.service) for r in replies}
+    )
+    assert sorted(first.new) == sorted(macs)
+    # nothing is missing, so the incremental sweep sends nothing
+    assert not second.broadcast
+    assert second.probed == 0
+    assert forced.new == []
+    assert discovery.broadcast_interval == 2 * DiscoveryPolicy().min_broadcast_interval
+    assert len(sent) == 2
+    assert all(message.tagged for message, _ in sent)
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_discovered_devices_can_be_unicast_to(*, batched: bool) -> None:
+    async def scenario() -> list[Message]:
+        fleet = EmulatedFleet(3)
+        await fleet.start()
+
+        def on_message(message: Message, addr: Address) -> None:
+            if not discovery.handle_message(message, addr):
+                engine.handle_message(message)
+
+        transport = UdpTransport(on_message, batched=batched)
+        await transport.open(("127.0.0.1", 0))
+
+        def send_to(message: Message, address: Address) -> None:
+            # loopback has no broadcast, so a tagged GetService goes to each device
+            addresses = fleet.addresses.values() if message.tagged else [address]
+            for device_address in addresses:
+                transport.send_to(message, device_address)
+
+        discovery = Discovery(
+            send_to, source_id=7, policy=DiscoveryPolicy(reply_window=0.1)
+        )
+        engine = RetryEngine(transport.send, source_id=7)
+        await discovery.sweep(broadcast=True)
+        replies = await asyncio.gather(
+            *(
+                engine.request(
+                    LightGet(
+                        source_id=7,
+                        target_addr=mac,
+                        seq_num=engine.next_seq_num(mac),
+                        response_requested=True,
+                    )
+                )
+                for mac in discovery.devices
+            )
+        )
+        transport.close()
+        fleet.close()
+        assert set(discovery.devices) == set(fleet.devices)
+        assert transport.addresses == fleet.addresses
+        return replies
+
+    replies = asyncio.run(scenario())
+    assert len(replies) == 3
+    assert all(isinstance(reply, LightState) for reply in replies)
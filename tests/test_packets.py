@@ -1,3 +1,13 @@
+from aiolifx.models.message_types import GroupPayload
+from aiolifx.models.message_types import LabelPayload
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePayload
+from aiolifx.models.message_types import LocationPayload
+from aiolifx.models.message_types import SetColorPayload
+from aiolifx.models.message_types import StateGroup
+from aiolifx.models.message_types import StateLabel
+from aiolifx.models.message_types import StateLocation
 from aiolifx.unpack import unpack_lifx_message
 from tests.data import packets
 
@@ -9,3 +19,52 @@ def test_messages() -> None:
         # print(packet)
         message = unpack_lifx_message(packet)
         print(message)
+
+
+def test_pack_unpack_round_trip() -> None:
+    mac = "d0:73:d5:00:00:01"
+    messages = [
+        StateLabel(
+            source_id=1, seq_num=2, target_addr=mac, payload=LabelPayload(label="Hi")
+        ),
+        StateGroup(
+            source_id=1,
+            seq_num=3,
+            target_addr=mac,
+            payload=GroupPayload(group=[1] * 16, label="Lounge", updated_at=5),
+        ),
+        StateLocation(
+            source_id=1,
+            seq_num=4,
+            target_addr=mac,
+            payload=LocationPayload(location=[2] * 16, label="Home", updated_at=6),
+        ),
+        LightSetColor(
+            source_id=1,
+            seq_num=5,
+            target_addr=mac,
+            payload=SetColorPayload(color=[1, 2, 3, 3500], duration=5),
+        ),
+        LightState(
+            source_id=1,
+            seq_num=6,
+            target_addr=mac,
+            payload=LightStatePayload(
+                color=[1, 2, 3, 3500],
+                reserved1=0,
+                power_level=65535,
+                label=b"Lamp",
+                reserved2=0,
+            ),
+        ),
+    ]
+    for message in messages:
+        unpacked = unpack_lifx_message(message.packed_message)
+        assert type(unpacked) is type(message)
+        assert unpacked.seq_num == message.seq_num
+        expected = message.payload.model_dump()
+        actual = unpacked.payload.model_dump()
+        if "label" in actual:
+            padding = b"\0" if isinstance(actual["label"], bytes) else "\0"
+            actual["label"] = actual["label"].rstrip(padding)
+        assert actual == expected
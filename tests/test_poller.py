@@ -0,0 +1,118 @@
+import asyncio
+import errno
+
+from aiolifx.fleet.poller import FleetPoller
+from aiolifx.fleet.poller import PollerPolicy
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePayload
+from aiolifx.models.message_types import MessageType
+from aiolifx.transport.circuit_breaker import CircuitBreakerPolicy
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.retry import RetryPolicy
+
+STEADY = "d0:73:d5:00:00:01"
+CHANGING = "d0:73:d5:00:00:02"
+OFFLINE = "d0:73:d5:00:00:03"
+
+POLICY = PollerPolicy(
+    concurrency=2,
+    fast_interval=0.01,
+    slow_interval=0.2,
+    backoff_factor=2,
+    power_interval=3600,
+    host_info_interval=3600,
+    wifi_info_interval=3600,
+)
+
+
+def test_poller_adapts_intervals_and_pauses_open_circuits() -> None:
+    async def scenario() -> None:
+        sent: list[Message] = []
+        engine: RetryEngine
+        hue = 0
+
+        def send(message: Message) -> None:
+            nonlocal hue
+            sent.append(message)
+            if message.target_addr == OFFLINE:
+                return
+            if message.message_type != MessageType.LightGet:
+                return
+            if message.target_addr == CHANGING:
+                hue += 1
+            reply = LightState(
+                source_id=message.source_id,
+                target_addr=message.target_addr,
+                seq_num=message.seq_num,
+                payload=LightStatePayload(
+                    color=[hue if message.target_addr == CHANGING else 0, 0, 0, 3500],
+                    reserved1=0,
+                    power_level=65535,
+                    label=b"",
+                    reserved2=0,
+                ),
+            )
+            asyncio.get_running_loop().call_soon(engine.handle_message, reply)
+
+        engine = RetryEngine(
+            send,
+            source_id=7,
+            policy=RetryPolicy(max_attempts=1, initial_rto=0.1, min_rto=0.1),
+            circuit_breaker=CircuitBreakerPolicy(failure_threshold=1, reset_timeout=60),
+        )
+        poller = FleetPoller(engine, POLICY)
+        for mac in (STEADY, CHANGING, OFFLINE):
+            poller.add(mac)
+        task = asyncio.create_task(poller.run())
+        await asyncio.sleep(0.5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        polls = {
+            mac: sum(
+                message.target_addr == mac
+                and message.message_type == MessageType.LightGet
+                for message in sent
+            )
+            for mac in (STEADY, CHANGING, OFFLINE)
+        }
+        assert poller.devices[STEADY].interval == POLICY.slow_interval
+        assert poller.devices[CHANGING].interval == POLICY.fast_interval
+        assert polls[CHANGING] > 3 * polls[STEADY]
+        assert polls[OFFLINE] == 1
+        assert engine.breaker(OFFLINE).state == CircuitState.OPEN
+        assert poller.counters.paused > 0
+        assert poller.counters.changes > 0
+
+    asyncio.run(scenario())
+
+
+def test_poller_keeps_polling_when_sending_fails() -> None:
+    async def scenario() -> FleetPoller:
+        def send(_message: Message) -> None:
+            raise OSError(errno.ENETUNREACH, "Network is unreachable")
+
+        engine = RetryEngine(send, source_id=7)
+        poller = FleetPoller(
+            engine,
+            POLICY.model_copy(
+                update={
+                    "power_interval": 0.01,
+                    "host_info_interval": 0.01,
+                    "wifi_info_interval": 0.01,
+                }
+            ),
+        )
+        poller.add(STEADY)
+        task = asyncio.create_task(poller.run())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return poller
+
+    poller = asyncio.run(scenario())
+    # every kind keeps its place in the queue and each failure is counted
+    assert poller.counters.failures == poller.counters.sent > 4
+    assert poller.devices[STEADY].interval > POLICY.fast_interval
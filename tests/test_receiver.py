@@ -0,0 +1,167 @@
+import asyncio
+import socket
+
+import pytest
+
+from aiolifx.emulator import EmulatedFleet
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import BacklightColor
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import MessageType
+from aiolifx.models.message_types import SetButtonConfigPayload
+from aiolifx.models.message_types import StateButtonConfig
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.udp import Address
+from aiolifx.transport.udp import UdpTransport
+from aiolifx.unpack import payload_function_map
+from aiolifx.unpack import unpack_lifx_message
+from aiolifx.unpack import unpack_lifx_messages
+from tests.data import packets
+
+
+def test_batch_decoder_matches_single_decoder() -> None:
+    decoded = unpack_lifx_messages([*packets, b"not a lifx packet"])
+    assert decoded[:-1] == [unpack_lifx_message(packet) for packet in packets]
+    assert decoded[-1] is None
+
+
+def test_bad_datagram_does_not_cost_the_rest_of_the_batch(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    white = BacklightColor(hue=0, saturation=0, brightness=65535, kelvin=3500)
+    button = StateButtonConfig(
+        source_id=1,
+        seq_num=1,
+        target_addr="d0:73:d5:00:00:01",
+        payload=SetButtonConfigPayload(
+            haptic_duration_ms=20, backlight_on_color=white, backlight_off_color=white
+        ),
+    ).packed_message
+    assert unpack_lifx_message(button).payload.backlight_on_color == white
+
+    def broken(data: dict) -> None:
+        raise AttributeError(data["payload_str"])
+
+    # any failure inside a payload decoder, not just the struct/value ones
+    monkeypatch.setitem(payload_function_map, MessageType.StateButtonConfig, broken)
+    batch = [packets[0], button, packets[1]]
+    decoded = unpack_lifx_messages(batch)
+    assert decoded[1] is None
+    assert decoded[0] == unpack_lifx_message(packets[0])
+    assert decoded[2] == unpack_lifx_message(packets[1])
+
+    async def scenario() -> list[Message]:
+        received: list[Message] = []
+        done = asyncio.Event()
+
+        def on_message(message: Message, _addr: Address) -> None:
+            received.append(message)
+            if len(received) == len(batch) - 1:
+                done.set()
+
+        transport = UdpTransport(on_message, batched=True)
+        await transport.open(("127.0.0.1", 0))
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for packet in batch:
+                sender.sendto(packet, transport.local_address)
+            await asyncio.wait_for(done.wait(), 5)
+        transport.close()
+        return received
+
+    assert asyncio.run(scenario()) == [decoded[0], decoded[2]]
+
+
+def test_batched_transport_drains_socket_per_wakeup() -> None:
+    async def scenario() -> None:
+        received: list[tuple[Message, Address]] = []
+        done = asyncio.Event()
+
+        def on_message(message: Message, addr: Address) -> None:
+            received.append((message, addr))
+            if len(received) == len(packets):
+                done.set()
+
+        transport = UdpTransport(on_message, batched=True)
+        await transport.open(("127.0.0.1", 0))
+        receiver = transport.receiver
+        assert receiver is not None
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for packet in packets:
+                sender.sendto(packet, transport.local_address)
+            await asyncio.wait_for(done.wait(), 5)
+        transport.close()
+        assert [message for message, _ in received] == unpack_lifx_messages(packets)
+        assert receiver.counters.datagrams == len(packets)
+        assert receiver.counters.wakeups < len(packets)
+        assert transport.receiver is None
+
+    asyncio.run(scenario())
+
+
+def test_receiver_reports_kernel_drops() -> None:
+    async def scenario() -> None:
+        transport = UdpTransport(lambda _message, _addr: None, batched=True)
+        await transport.open(("127.0.0.1", 0))
+        receiver = transport.receiver
+        assert receiver is not None
+        if not receiver.track_overflow:
+            transport.close()
+            return
+        receiver.stop()
+        receiver.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+            for _ in range(200):
+                sender.sendto(packets[0], transport.local_address)
+            receiver.drain()
+            # the count rides on datagrams queued after the overflow
+            sender.sendto(packets[0], transport.local_address)
+            await asyncio.sleep(0.01)
+            receiver.drain()
+        transport.close()
+        assert receiver.counters.kernel_drops
+
+    asyncio.run(scenario())
+
+
+def test_batched_transport_resolves_requests_per_batch() -> None:
+    async def scenario() -> None:
+        fleet = EmulatedFleet(8)
+        await fleet.start()
+        unclaimed: list[Message] = []
+
+        def on_batch(batch: list[tuple[Message, Address]]) -> None:
+            claimed = engine.handle_batch([message for message, _ in batch])
+            unclaimed.extend(
+                message
+                for (message, _), is_reply in zip(batch, claimed, strict=True)
+                if not is_reply
+            )
+
+        transport = UdpTransport(
+            lambda _message, _addr: None, batched=True, on_batch=on_batch
+        )
+        await transport.open(("127.0.0.1", 0))
+        transport.addresses.update(fleet.addresses)
+        engine = RetryEngine(transport.send, source_id=9)
+        replies = await asyncio.gather(
+            *(
+                engine.request(
+                    LightGet(
+                        source_id=9,
+                        target_addr=mac,
+                        seq_num=engine.next_seq_num(mac),
+                        response_requested=True,
+                    )
+                )
+                for mac in fleet.devices
+            )
+        )
+        transport.close()
+        fleet.close()
+        assert all(isinstance(reply, LightState) for reply in replies)
+        assert [reply.target_addr for reply in replies] == list(fleet.devices)
+        assert unclaimed == []
+        assert transport.send_dropped == 0
+
+    asyncio.run(scenario())
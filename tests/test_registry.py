@@ -0,0 +1,114 @@
+from pathlib import Path
+
+from aiolifx.fleet.indexes import RegistryIndexes
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.fleet.registry import RegistryField
+from aiolifx.models.message_types import GroupPayload
+from aiolifx.models.message_types import LabelPayload
+from aiolifx.models.message_types import StateGroup
+from aiolifx.models.message_types import StateLabel
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.unpack import unpack_lifx_message
+from tests.data import packets
+
+MAC = "d0:73:d5:80:14:0f"
+
+
+def populated_registry(path: Path) -> DeviceRegistry:
+    registry = DeviceRegistry(path)
+    for packet in packets:
+        registry.apply(unpack_lifx_message(packet))
+    registry.update_address(MAC, "192.168.1.20")
+    return registry
+
+
+def test_registry_applies_state_messages(tmp_path: Path) -> None:
+    registry = populated_registry(tmp_path / "registry.json")
+    device = registry.get(MAC)
+    assert device is not None
+    assert device.label == "Mariah Light"
+    assert registry.group_label(device) == "Mariah Bedroom"
+    assert registry.location_label(device) == "My Home"
+    assert device.product_id == 176
+    assert device.firmware_components == (4, 2)
+    assert device.product is not None
+    registry.on_circuit_change(MAC, CircuitState.OPEN)
+    assert not device.online
+
+
+def test_registry_round_trips_through_disk(tmp_path: Path) -> None:
+    path = tmp_path / "registry.json"
+    registry = populated_registry(path)
+    registry.save()
+
+    loaded = DeviceRegistry.load(path)
+    assert len(loaded) == len(registry)
+    device = loaded.get(MAC)
+    assert device is not None
+    assert device.ip == "192.168.1.20"
+    assert device.label == "Mariah Light"
+    assert loaded.group_label(device) == "Mariah Bedroom"
+    assert {d.mac for d in loaded.unvalidated()} == set(registry.devices)
+    assert len(DeviceRegistry.load(tmp_path / "missing.json")) == 0
+
+    for corrupt in (b"{not json", b'{"version": 2, "devices": [{"ip": 1}]}'):
+        path.write_bytes(corrupt)
+        loaded = DeviceRegistry.load(path)
+        assert len(loaded) == 0
+        assert loaded.load_error is not None
+
+
+def test_group_updates_only_propagate_when_newer(tmp_path: Path) -> None:
+    registry = populated_registry(tmp_path / "registry.json")
+    changes: list[tuple[RegistryField, str, str | int | None]] = []
+    registry.listeners.append(lambda *change: changes.append(change))
+    device = registry.get(MAC)
+    assert device is not None
+    assert device.group_updated_at is not None
+
+    def state_group(label: str, updated_at: int) -> StateGroup:
+        return StateGroup(
+            source_id=0,
+            target_addr=MAC,
+            seq_num=0,
+            payload=GroupPayload(group=[1] * 16, label=label, updated_at=updated_at),
+        )
+
+    skipped = registry.skipped_updates
+    registry.apply(state_group("Ignored", device.group_updated_at))
+    assert registry.skipped_updates == skipped + 1
+    assert changes == []
+
+    previous_group = device.group_id
+    registry.apply(state_group("Guest Room", device.group_updated_at + 1))
+    registry.apply(state_group("Spare Room", device.group_updated_at + 1))
+    registry.apply(state_group("Spare Room", device.group_updated_at + 2))
+    assert changes == [
+        (RegistryField.GROUP, MAC, previous_group),
+        (RegistryField.GROUP_LABEL, "01" * 16, "Guest Room"),
+    ]
+    assert registry.group_label(device) == "Spare Room"
+
+
+def test_indexes_follow_registry_updates(tmp_path: Path) -> None:
+    registry = populated_registry(tmp_path / "registry.json")
+    indexes = RegistryIndexes(registry)
+    master_bath = indexes.in_group_labeled("Master Bath")
+    assert len(master_bath) == 4
+    assert indexes.labeled("Stairs Light 1")
+    assert indexes.in_location_labeled("My Home") == indexes.all
+    color_in_bath = indexes.intersection(master_bath, indexes.with_capability("color"))
+    assert color_in_bath == master_bath
+
+    registry.apply(
+        StateLabel(
+            source_id=0,
+            target_addr=MAC,
+            seq_num=0,
+            payload=LabelPayload(label="Reading Lamp"),
+        )
+    )
+    assert indexes.labeled("Reading Lamp") == {MAC}
+    assert MAC not in indexes.labeled("Mariah Light")
+    new_device = registry.record("d0:73:d5:00:00:99")
+    assert new_device.mac in indexes.all
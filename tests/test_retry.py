@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import Acknowledgement
+from aiolifx.models.message_types import EchoResponse
+from aiolifx.models.message_types import GetService
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import SetColorPayload
+from aiolifx.transport.hedging import HedgingPolicy
+from aiolifx.transport.redundancy import LossEstimator
+from aiolifx.transport.redundancy import RedundantSender
+from aiolifx.transport.retry import RetryEngine
+from aiolifx.transport.retry import RetryPolicy
+from aiolifx.transport.rtt import RttEstimator
+from aiolifx.unpack import unpack_lifx_message
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def test_rtt_estimator_converges() -> None:
+    estimator = RttEstimator(initial_rto=1.0, min_rto=0.01)
+    assert estimator.rto == 1.0
+    for i in range(50):
+        estimator.update(0.02, now=float(i))
+    assert estimator.srtt == pytest.approx(0.02)
+    assert estimator.rto < 0.05
+    assert estimator.updated_at == 49.0
+
+
+def test_retry_until_acknowledged() -> None:
+    sent: list[Message] = []
+
+    async def run() -> Message:
+        loop = asyncio.get_running_loop()
+
+        def send(message: Message) -> None:
+            sent.append(message)
+            if len(sent) < 3:
+                return
+            ack = Acknowledgement(
+                source_id=message.source_id,
+                target_addr=message.target_addr,
+                seq_num=message.seq_num,
+            )
+            loop.call_soon(engine.handle_message, ack)
+
+        engine = RetryEngine(
+            send, source_id=7, policy=RetryPolicy(initial_rto=0.01, min_rto=0.01)
+        )
+        message = GetService(
+            source_id=7, target_addr=TARGET, seq_num=1, ack_requested=True
+        )
+        return await engine.request(message)
+
+    reply = asyncio.run(run())
+    assert len(sent) == 3
+    assert isinstance(reply, Acknowledgement)
+
+
+def test_retry_gives_up() -> None:
+    async def run() -> None:
+        engine = RetryEngine(
+            lambda _: None,
+            source_id=7,
+            policy=RetryPolicy(max_attempts=3, initial_rto=0.01, min_rto=0.01),
+        )
+        message = GetService(
+            source_id=7, target_addr=TARGET, seq_num=1, ack_requested=True
+        )
+        await engine.request(message)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(run())
+
+
+def test_hedged_request_wins_over_lost_original() -> None:
+    sent: list[Message] = []
+
+    async def run() -> tuple[RetryEngine, Message]:
+        loop = asyncio.get_running_loop()
+
+        def send(message: Message) -> None:
+            sent.append(message)
+            if len(sent) == 1:
+                return
+            ack = Acknowledgement(
+                source_id=message.source_id,
+                target_addr=message.target_addr,
+                seq_num=message.seq_num,
+            )
+            loop.call_soon(engine.handle_message, ack)
+
+        engine = RetryEngine(
+            send,
+            source_id=7,
+            policy=RetryPolicy(min_rto=0.2),
+            hedging=HedgingPolicy(min_samples=1),
+        )
+        engine.estimator(TARGET).update(0.005, now=loop.time())
+        message = LightGet(source_id=7, target_addr=TARGET, seq_num=1, ack_requested=True)
+        return engine, await engine.request(message)
+
+    engine, reply = asyncio.run(run())
+    assert [message.seq_num for message in sent] == [1, 0]
+    assert reply.seq_num == 0
+    assert engine.hedging_counters.hedges_sent == 1
+    assert engine.hedging_counters.hedge_wins == 1
+
+
+def test_echo_probe_updates_estimate() -> None:
+    async def run() -> RetryEngine:
+        loop = asyncio.get_running_loop()
+
+        def send(message: Message) -> None:
+            request = unpack_lifx_message(message.packed_message)
+            response = EchoResponse(
+                source_id=request.source_id,
+                target_addr=TARGET,
+                seq_num=request.seq_num,
+                payload=request.payload,
+            )
+            loop.call_later(0.005, engine.handle_message, response)
+
+        engine = RetryEngine(send, source_id=7)
+        assert engine.idle_targets(idle_after=60) == []
+        await engine.probe(TARGET)
+        assert engine.idle_targets(idle_after=60) == []
+        return engine
+
+    engine = asyncio.run(run())
+    assert engine.estimator(TARGET).samples == 1
+
+
+def test_redundant_copies_follow_estimated_loss() -> None:
+    sent: list[Message] = []
+    estimator = LossEstimator(min_samples=1)
+
+    async def run() -> list[int]:
+        sender = RedundantSender(sent.append, estimator)
+        message = LightSetColor(
+            source_id=7,
+            target_addr=TARGET,
+            seq_num=3,
+            payload=SetColorPayload(color=[0, 0, 65535, 3500], duration=0),
+        )
+        copies = [sender.send(message)]
+        for _ in range(20):
+            estimator.record(TARGET, delivered=False)
+            estimator.record(TARGET, delivered=True)
+        copies.append(sender.send(message))
+        await asyncio.sleep(0.05)
+        return copies
+
+    copies = asyncio.run(run())
+    assert copies[0] == 1
+    assert copies[1] > 1
+    assert len(sent) == sum(copies)
+    assert {message.seq_num for message in sent} == {3}
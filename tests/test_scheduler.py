@@ -0,0 +1,70 @@
+import asyncio
+
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightSetPower
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZonesPayload
+from aiolifx.models.message_types import SetPowerPayload
+from aiolifx.transport.scheduler import PriorityClass
+from aiolifx.transport.scheduler import SchedulerPolicy
+from aiolifx.transport.scheduler import SendScheduler
+from aiolifx.transport.scheduler import default_priority
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def frame(seq_num: int) -> MultiZoneSetExtendedColorZones:
+    return MultiZoneSetExtendedColorZones(
+        source_id=7,
+        target_addr=TARGET,
+        seq_num=seq_num,
+        payload=MultiZoneSetExtendedColorZonesPayload(
+            duration=0, apply=1, zone_index=0, colors_count=1, colors=[[0, 0, 0, 3500]]
+        ),
+    )
+
+
+def test_control_preempts_bulk() -> None:
+    sent: list[Message] = []
+    power_off = LightSetPower(
+        source_id=7,
+        target_addr=TARGET,
+        seq_num=200,
+        payload=SetPowerPayload(power_level=0, duration=0),
+    )
+    assert default_priority(power_off) == PriorityClass.CONTROL
+    assert default_priority(frame(0)) == PriorityClass.BULK
+
+    async def run() -> SendScheduler:
+        scheduler = SendScheduler(
+            sent.append, SchedulerPolicy(rate=200, burst=1, max_bulk_age=10)
+        )
+        for seq_num in range(10):
+            scheduler.submit(frame(seq_num))
+        await asyncio.sleep(0)
+        scheduler.submit(power_off)
+        await asyncio.sleep(0.1)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert [message.seq_num for message in sent[:2]] == [0, 200]
+    assert scheduler.counters.sent == 11
+
+
+def test_stale_bulk_frames_are_coalesced_and_dropped() -> None:
+    sent: list[Message] = []
+
+    async def run() -> SendScheduler:
+        scheduler = SendScheduler(
+            sent.append, SchedulerPolicy(rate=20, burst=1, max_bulk_age=0.01)
+        )
+        for seq_num in range(5):
+            scheduler.submit(frame(seq_num), coalesce_key="frame")
+        scheduler.submit(frame(5))
+        await asyncio.sleep(0.1)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert [message.seq_num for message in sent] == [4]
+    assert scheduler.counters.coalesced == 4
+    assert scheduler.counters.dropped_stale == 1
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from aiolifx.fleet.indexes import RegistryIndexes
+from aiolifx.fleet.registry import DeviceRegistry
+from aiolifx.fleet.selector import Node
+from aiolifx.fleet.selector import SelectorEngine
+from aiolifx.fleet.selector import SelectorSyntaxError
+from aiolifx.fleet.selector import compile_selector
+from aiolifx.models.message_types import LabelPayload
+from aiolifx.models.message_types import StateLabel
+from aiolifx.unpack import unpack_lifx_message
+from tests.data import packets
+
+
+def engine(tmp_path: Path) -> SelectorEngine:
+    registry = DeviceRegistry(tmp_path / "registry.json")
+    for packet in packets:
+        registry.apply(unpack_lifx_message(packet))
+    return SelectorEngine(RegistryIndexes(registry))
+
+
+def label_of(selectors: SelectorEngine, mac: str) -> str | None:
+    device = selectors.indexes.registry.get(mac)
+    return None if device is None else device.label
+
+
+def test_selector_expressions(tmp_path: Path) -> None:
+    selectors = engine(tmp_path)
+    bath = selectors.select('group:"Master Bath" and cap:color')
+    assert sorted(label_of(selectors, mac) or "" for mac in bath) == [
+        "Master Bath 2",
+        "Master Bath 3",
+        "Master Bath 4",
+        "Master Bath 6",
+    ]
+    not_stairs = selectors.select("not label:Stairs* and location:My*")
+    stairs = selectors.select("label:Stairs*")
+    assert len(stairs) == 1
+    assert not_stairs == selectors.indexes.all - stairs
+    either = selectors.select('(group:Stairs or group:"Dining Room") and not cap:matrix')
+    assert len(either) == 2
+
+
+def test_selector_cache_is_invalidated_precisely(tmp_path: Path) -> None:
+    selectors = engine(tmp_path)
+    stairs = selectors.select("label:Stairs*")
+    selectors.select('group:"Master Bath"')
+    (mac,) = stairs
+
+    def relabel(label: str) -> None:
+        selectors.indexes.registry.apply(
+            StateLabel(
+                source_id=0, target_addr=mac, seq_num=0, payload=LabelPayload(label=label)
+            )
+        )
+
+    relabel("Stairs Light 2")
+    assert selectors.invalidations == 1
+    assert selectors.select("label:Stairs*") == stairs
+    assert selectors.select('group:"Master Bath"')
+    assert selectors.hits == 1
+
+    relabel("Landing")
+    assert selectors.select("label:Stairs*") == frozenset()
+    assert selectors.select("label:Landing") == stairs
+
+
+def test_selector_syntax_errors() -> None:
+    for expression in ("group:", "cap:rainbow", "label:a and", "(label:a", "colour:red"):
+        with pytest.raises(SelectorSyntaxError):
+            compile_selector(expression)
+
+
+def test_nodes_must_implement_evaluation() -> None:
+    class Partial(Node):
+        def evaluate(self, indexes: RegistryIndexes) -> set[str]:
+            return set(indexes.all)
+
+    with pytest.raises(TypeError, match="affected_by"):
+        Partial()  # type: ignore[abstract]
@@ -0,0 +1,87 @@
+import asyncio
+import socket
+
+import pytest
+
+from aiolifx.emulator import EmulatedFleet
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import SetColorPayload
+from aiolifx.transport.sharded import ShardedTransport
+from aiolifx.transport.sharded import ShardWorkerError
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT is not available"
+)
+
+
+def test_sharded_transport_against_emulated_fleet() -> None:
+    async def scenario() -> None:
+        fleet = EmulatedFleet(12)
+        await fleet.start()
+        transport = ShardedTransport(workers=2, source_id=0x1234)
+        await transport.open(("127.0.0.1", 0))
+        try:
+            assert {transport.shard(mac) for mac in fleet.devices} == {0, 1}
+            replies = await asyncio.gather(
+                *(
+                    transport.request(
+                        LightGet(
+                            source_id=0x1234,
+                            target_addr=mac,
+                            seq_num=1,
+                            response_requested=True,
+                        ),
+                        fleet.addresses[mac],
+                    )
+                    for mac in fleet.devices
+                )
+            )
+            for mac, reply in zip(fleet.devices, replies, strict=True):
+                assert isinstance(reply, LightState)
+                assert reply.target_addr == mac
+                assert (
+                    reply.payload.label.rstrip(b"\0") == fleet.devices[mac].label.encode()
+                )
+
+            mac = next(iter(fleet.devices))
+            await transport.request(
+                LightSetColor(
+                    source_id=0x1234,
+                    target_addr=mac,
+                    seq_num=2,
+                    ack_requested=True,
+                    payload=SetColorPayload(color=[100, 200, 300, 4000], duration=0),
+                ),
+                fleet.addresses[mac],
+            )
+            assert fleet.devices[mac].color == [100, 200, 300, 4000]
+
+            counters = await transport.counters()
+            assert sum(counter.requests for counter in counters) == 13
+            assert min(counter.requests for counter in counters) > 0
+            assert sum(counter.forwarded for counter in counters) == sum(
+                counter.adopted for counter in counters
+            )
+
+            # a dead worker fails its calls instead of leaving them pending
+            process = transport._processes[1]  # noqa: SLF001
+            process.kill()
+            await asyncio.get_running_loop().run_in_executor(None, process.join)
+            mac = next(mac for mac in fleet.devices if transport.shard(mac) == 1)
+            with pytest.raises(ShardWorkerError):
+                await transport.request(
+                    LightGet(
+                        source_id=0x1234,
+                        target_addr=mac,
+                        seq_num=3,
+                        response_requested=True,
+                    ),
+                    fleet.addresses[mac],
+                )
+        finally:
+            await transport.close()
+            fleet.close()
+
+    asyncio.run(scenario())
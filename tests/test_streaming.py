@@ -0,0 +1,286 @@
+import asyncio
+
+import numpy as np
+
+from aiolifx.models.message_types import LightSetPower
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZonesPayload
+from aiolifx.models.message_types import SetPowerPayload
+from aiolifx.streaming.diff import FrameDiffPolicy
+from aiolifx.streaming.diff import PerceptualFilter
+from aiolifx.streaming.diff import PerceptualPolicy
+from aiolifx.streaming.diff import changed_tile_rects
+from aiolifx.streaming.diff import tile_messages
+from aiolifx.streaming.multizone import EXTENDED_HEADER_STRUCT
+from aiolifx.streaming.multizone import EXTENDED_ZONES_PER_PACKET
+from aiolifx.streaming.multizone import ExtendedZonesEncoder
+from aiolifx.streaming.multizone import MultiZoneStream
+from aiolifx.streaming.multizone import StreamPolicy
+from aiolifx.streaming.multizone import extended_pages
+from aiolifx.streaming.segments import plan_zone_segments
+from aiolifx.streaming.segments import segment_messages
+from aiolifx.transport.scheduler import SchedulerPolicy
+from aiolifx.transport.scheduler import SendScheduler
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def gradient(zones_count: int, offset: int = 0) -> np.ndarray:
+    frame = np.zeros((zones_count, 4), dtype=np.uint16)
+    frame[:, 0] = (np.arange(zones_count) * 600 + offset) % 65536
+    frame[:, 1] = 65535
+    frame[:, 2] = 32768
+    frame[:, 3] = 3500
+    return frame
+
+
+def test_encoder_matches_message_encoding() -> None:
+    frame = gradient(100)
+    encoder = ExtendedZonesEncoder(7, TARGET, 2)
+    packets = encoder.encode(frame, extended_pages(100), duration=50)
+    assert len(packets) == 2
+    for index, (start, count) in enumerate(extended_pages(100)):
+        colors = frame[start : start + count].tolist()
+        colors += [[0, 0, 0, 0]] * (EXTENDED_ZONES_PER_PACKET - count)
+        expected = MultiZoneSetExtendedColorZones(
+            source_id=7,
+            target_addr=TARGET,
+            seq_num=index + 1,
+            payload=MultiZoneSetExtendedColorZonesPayload(
+                duration=50,
+                apply=int(index == 1),
+                zone_index=start,
+                colors_count=count,
+                colors=colors,
+            ),
+        )
+        assert bytes(encoder.stamp(index, index + 1)) == expected.packed_message
+
+
+def test_stream_keeps_rate_budget_and_drops_stale_frames() -> None:
+    sent: list[bytes] = []
+
+    async def scenario() -> tuple[MultiZoneStream, float]:
+        loop = asyncio.get_running_loop()
+        stream = MultiZoneStream(
+            lambda data: sent.append(bytes(data)),
+            7,
+            TARGET,
+            120,
+            StreamPolicy(fps=50, rate=40, burst=2),
+        )
+        started = loop.time()
+        task = loop.create_task(stream.run())
+        # frames arrive faster than two packets per frame can be sent
+        for i in range(30):
+            stream.submit(gradient(120, i))
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return stream, loop.time() - started
+
+    stream, elapsed = asyncio.run(scenario())
+    counters = stream.counters
+    assert counters.submitted == 30
+    assert counters.packets == len(sent) == 2 * counters.sent
+    assert counters.sent + counters.dropped_stale == counters.submitted
+    # however long a loaded machine took, 40 packets/s plus the initial burst
+    assert len(sent) <= elapsed * 40 + 2
+    assert counters.dropped_stale > 0
+    # the newest frame is the last one sent, with only the final page applying
+    assert sent[-2][36 + 4] == 0
+    assert sent[-1][36 + 4] == 1
+    last = np.frombuffer(sent[-2][44:], dtype="<u2").reshape(82, 4)
+    assert (last == gradient(120, 29)[:82]).all()
+
+
+def test_segment_planner_paints_runs_with_one_packet_each() -> None:
+    red = [0, 65535, 65535, 3500]
+    blue = [43690, 65535, 65535, 3500]
+    white = [0, 0, 65535, 4000]
+    frame = np.array([red] * 30 + [blue] * 20 + [white] * 30, dtype=np.uint16)
+    segments = plan_zone_segments(frame)
+    assert [(s.start_index, s.end_index) for s in segments] == [
+        (0, 29),
+        (30, 49),
+        (50, 79),
+    ]
+    messages = segment_messages(segments, 7, TARGET, seq_num=255, duration=100)
+    assert [m.seq_num for m in messages] == [255, 0, 1]
+    assert [m.payload.apply for m in messages] == [0, 0, 1]
+    assert messages[1].payload.color == blue
+
+    # a shimmer within tolerance collapses into the run it belongs to
+    noisy = frame.copy()
+    noisy[::2, 2] -= 200
+    assert len(plan_zone_segments(noisy)) == 80
+    assert len(plan_zone_segments(noisy, tolerance=0.01)) == 3
+
+
+def test_stream_sends_only_changed_zones() -> None:
+    sent: list[bytes] = []
+
+    async def scenario() -> MultiZoneStream:
+        loop = asyncio.get_running_loop()
+        stream = MultiZoneStream(
+            lambda data: sent.append(bytes(data)),
+            7,
+            TARGET,
+            120,
+            StreamPolicy(fps=100, rate=1000, burst=10),
+        )
+        task = loop.create_task(stream.run())
+        frame = gradient(120)
+        stream.submit(frame)
+        await asyncio.sleep(0.02)
+        changed = frame.copy()
+        changed[[5, 10], 2] = 0
+        stream.submit(changed)
+        await asyncio.sleep(0.02)
+        stream.submit(changed)
+        await asyncio.sleep(0.02)
+        task.cancel()
+        return stream
+
+    stream = asyncio.run(scenario())
+    assert stream.counters.sent == 2
+    assert stream.counters.partial == 1
+    assert stream.counters.unchanged == 1
+    assert len(sent) == 3
+    _, apply, zone_index, colors_count = EXTENDED_HEADER_STRUCT.unpack_from(sent[-1], 36)
+    assert (apply, zone_index, colors_count) == (1, 5, 6)
+
+
+def test_tile_diff_sends_changed_rectangles() -> None:
+    previous = np.zeros((5, 8, 8, 4), dtype=np.uint16)
+    current = previous.copy()
+    current[2, 3:5, 1:7, 2] = 65535
+    policy = FrameDiffPolicy()
+    assert changed_tile_rects(None, current, policy) is None
+    rects = changed_tile_rects(previous, current, policy)
+    assert rects is not None
+    assert [(r.tile_index, r.x, r.y, r.width, r.height) for r in rects] == [
+        (2, 1, 3, 6, 2)
+    ]
+    (message,) = tile_messages(current, rects, 7, TARGET, seq_num=1)
+    assert (message.payload.x, message.payload.y, message.payload.width) == (1, 3, 6)
+    assert message.payload.colors[:12] == [[0, 0, 65535, 0]] * 12
+    # rows 5 to 7 are rewritten with what they already show, the rest is off the tile
+    assert message.payload.colors[12:30] == current[2, 5:8, 1:7].reshape(-1, 4).tolist()
+    assert message.payload.colors[30:] == [[0, 0, 0, 0]] * 34
+    current[2, 6, 3] = [1, 2, 3, 4]
+    (message,) = tile_messages(current, rects, 7, TARGET, seq_num=1)
+    assert message.payload.colors[12 + 6 + 2] == [1, 2, 3, 4]
+    current[:, 0, 0, 0] = 1
+    assert changed_tile_rects(previous, current, policy) is None
+
+
+def test_stream_skips_changes_too_small_to_see() -> None:
+    sent: list[bytes] = []
+    now = 0.0
+
+    async def settle() -> None:
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    async def scenario() -> MultiZoneStream:
+        nonlocal now
+        loop = asyncio.get_running_loop()
+        stream = MultiZoneStream(
+            lambda data: sent.append(bytes(data)),
+            7,
+            TARGET,
+            120,
+            StreamPolicy(
+                fps=1,
+                rate=1000,
+                burst=10,
+                max_frame_age=10,
+                diff=None,
+                perceptual=PerceptualPolicy(keyframe_interval=10),
+            ),
+            clock=lambda: now,
+        )
+        task = loop.create_task(stream.run())
+        frame = gradient(120)
+        stream.submit(frame)
+        await settle()
+        # each step is invisible but they add up against what was sent
+        shifted = frame.copy()
+        for _ in range(3):
+            now += 1
+            shifted[:, 0] += 40
+            stream.submit(shifted)
+            await settle()
+        now += 1
+        shifted[:, 0] += 2000
+        stream.submit(shifted)
+        await settle()
+        # the keyframe carries the true frame even when nothing visible changed
+        now += 10
+        shifted[:, 2] += 1
+        stream.submit(shifted)
+        await settle()
+        task.cancel()
+        return stream
+
+    stream = asyncio.run(scenario())
+    assert stream.counters.unchanged == 3
+    assert stream.counters.sent == 3
+    assert len(sent) == 6
+    last = np.frombuffer(sent[-2][44:], dtype="<u2").reshape(82, 4)
+    assert (last[:, 2] == 32769).all()
+
+
+def test_stream_shares_the_scheduler_budget() -> None:
+    events: list[str] = []
+    power_off = LightSetPower(
+        source_id=7,
+        target_addr=TARGET,
+        seq_num=200,
+        payload=SetPowerPayload(power_level=0, duration=0),
+    )
+
+    async def scenario() -> tuple[MultiZoneStream, SendScheduler, int, float]:
+        loop = asyncio.get_running_loop()
+        scheduler = SendScheduler(
+            lambda _message: events.append("power"), SchedulerPolicy(rate=40, burst=2)
+        )
+        stream = MultiZoneStream(
+            lambda _data: events.append("zones"),
+            7,
+            TARGET,
+            120,
+            StreamPolicy(fps=50, burst=100, rate=1000),
+            scheduler=scheduler,
+        )
+        started = loop.time()
+        task = loop.create_task(stream.run())
+        for i in range(20):
+            stream.submit(gradient(120, i))
+            if i == 10:
+                power_at = len(events)
+                scheduler.submit(power_off)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await scheduler.close()
+        return stream, scheduler, power_at, loop.time() - started
+
+    stream, scheduler, power_at, elapsed = asyncio.run(scenario())
+    # the power change overtakes the frames still waiting for budget
+    assert events[power_at] == "power"
+    assert scheduler.counters.reserved == stream.counters.packets
+    # one budget for both: the stream's own 1000/s never applies
+    assert len(events) <= elapsed * 40 + 2 + 2
+
+
+def test_perceptual_filter_for_single_colour_streams() -> None:
+    flicker = PerceptualFilter(PerceptualPolicy(keyframe_interval=1.0))
+    color = [0, 65535, 40000, 3500]
+    assert flicker.admit(color, 0.0)
+    assert not flicker.admit([0, 65535, 40100, 3500], 0.1)
+    assert flicker.admit([10000, 65535, 40000, 3500], 0.2)
+    assert not flicker.admit([10000, 65535, 40000, 3500], 0.3)
+    assert flicker.admit([10000, 65535, 40000, 3500], 1.1)
+    assert flicker.skipped == 2
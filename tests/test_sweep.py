@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from aiolifx.fleet.discovery import DiscoveredDevice
+from aiolifx.fleet.discovery import Discovery
+from aiolifx.fleet.sweep import WindowedSweeper
+from aiolifx.fleet.sweep import WindowedSweepPolicy
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import LightGet
+from aiolifx.models.message_types import LightState
+from aiolifx.models.message_types import LightStatePayload
+from aiolifx.models.message_types import LightStatePower
+from aiolifx.models.message_types import PowerPayload
+from aiolifx.transport.circuit_breaker import CircuitBreaker
+from aiolifx.transport.circuit_breaker import CircuitBreakerPolicy
+from aiolifx.transport.circuit_breaker import CircuitState
+from aiolifx.transport.udp import Address
+
+RECEIVE_CAPACITY = 20
+
+
+def light_state(request: Message, seq_num: int | None = None) -> LightState:
+    return LightState(
+        source_id=request.source_id,
+        target_addr=request.target_addr,
+        seq_num=request.seq_num if seq_num is None else seq_num,
+        payload=LightStatePayload(
+            color=[0, 0, 0, 3500], reserved1=0, power_level=0, label=b"", reserved2=0
+        ),
+    )
+
+
+def add_devices(discovery: Discovery, count: int, last_seen: float) -> list[str]:
+    macs = [f"d0:73:d5:00:01:{i:02x}" for i in range(count)]
+    for i, mac in enumerate(macs):
+        discovery.devices[mac] = DiscoveredDevice(
+            mac=mac, ip=f"10.0.1.{i}", first_seen=0, last_seen=last_seen
+        )
+    return macs
+
+
+def test_windowed_sweep_adapts_to_receive_capacity() -> None:
+    async def scenario() -> None:
+        loop = asyncio.get_running_loop()
+        queued = 0
+        sweeper: WindowedSweeper
+
+        def deliver(reply: Message, addr: Address) -> None:
+            nonlocal queued
+            queued -= 1
+            sweeper.handle_message(reply, addr)
+
+        def send_to(message: Message, addr: Address) -> None:
+            nonlocal queued
+            # replies beyond the receive buffer are dropped, like a full socket
+            if queued >= RECEIVE_CAPACITY:
+                return
+            queued += 1
+            loop.call_later(0.01, deliver, light_state(message), addr)
+
+        discovery = Discovery(send_to, source_id=5)
+        add_devices(discovery, 100, time.monotonic())
+        sweeper = WindowedSweeper(
+            discovery,
+            send_to,
+            WindowedSweepPolicy(initial_window=64, spread=0, reply_window=0.05),
+        )
+
+        first = await sweeper.sweep(discover=False)
+        assert first.sent == 100
+        assert first.dropped > 0
+        assert first.discovery is None
+        assert sweeper.window < 64
+        second = await sweeper.sweep(discover=False)
+        assert second.drop_rate < first.drop_rate
+
+    asyncio.run(scenario())
+
+
+def test_windowed_sweep_skips_offline_devices_and_foreign_replies() -> None:
+    async def scenario() -> None:
+        sent: list[Message] = []
+        sweeper: WindowedSweeper
+
+        def send_to(message: Message, addr: Address) -> None:
+            sent.append(message)
+            if message.target_addr == macs[1]:
+                # a late reply to an earlier request, then the wrong reply type
+                sweeper.handle_message(
+                    light_state(message, (message.seq_num + 1) % 256), addr
+                )
+                power = LightStatePower(
+                    source_id=message.source_id,
+                    target_addr=message.target_addr,
+                    seq_num=message.seq_num,
+                    payload=PowerPayload(power_level=0),
+                )
+                sweeper.handle_message(power, addr)
+                return
+            sweeper.handle_message(light_state(message), addr)
+
+        discovery = Discovery(send_to, source_id=5)
+        macs = add_devices(discovery, 4, time.monotonic())
+        discovery.devices[macs[2]].last_seen = 0
+        tripped = CircuitBreaker(macs[3], CircuitBreakerPolicy())
+        tripped.state = CircuitState.OPEN
+        sweeper = WindowedSweeper(
+            discovery,
+            send_to,
+            WindowedSweepPolicy(spread=0, reply_window=0.05),
+            breaker=lambda mac: tripped if mac == macs[3] else None,
+            receive_drops=lambda: 0,
+        )
+
+        report = await sweeper.sweep(discover=False)
+        assert all(isinstance(message, LightGet) for message in sent)
+        assert [message.target_addr for message in sent] == macs[:2]
+        assert report.skipped == macs[2:]
+        assert report.replies == 1
+        assert report.receive_drops == 0
+        # an unanswered request without socket drops is not congestion
+        assert sweeper.window == WindowedSweepPolicy().initial_window
+
+    asyncio.run(scenario())
@@ -0,0 +1,171 @@
+import asyncio
+
+import numpy as np
+
+from aiolifx.fleet.tiles import TileSnapshot
+from aiolifx.fleet.tiles import TileSnapshotReader
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import TileDevice
+from aiolifx.models.message_types import TileGet64
+from aiolifx.models.message_types import TileSet64
+from aiolifx.models.message_types import TileSet64Payload
+from aiolifx.models.message_types import TileState64
+from aiolifx.models.message_types import TileState64Payload
+from aiolifx.models.message_types import TileStateDeviceChain
+from aiolifx.models.message_types import TileStateDeviceChainPayload
+from aiolifx.resources.const import HEADER_SIZE_BYTES
+from aiolifx.streaming.tiles import TileCanvas
+from aiolifx.streaming.tiles import chain_geometry
+from aiolifx.streaming.tiles import sampling_index
+from aiolifx.unpack import unpack_lifx_message
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def tile(user_x: float, user_y: float, width: int = 8, height: int = 8) -> TileDevice:
+    return TileDevice(
+        accel_meas_x=0,
+        accel_meas_y=0,
+        accel_meas_z=0,
+        user_x=user_x,
+        user_y=user_y,
+        width=width,
+        height=height,
+        device_version_vendor=1,
+        device_version_product=55,
+        firmware_build=0,
+        firmware_version_minor=50,
+        firmware_version_major=3,
+    )
+
+
+def test_canvas_is_sampled_per_tile_position() -> None:
+    # two tiles side by side, the second one higher up
+    chain = [tile(0.5, 0.5), tile(1.5, 1.5)]
+    canvas = np.zeros((16, 16, 4), dtype=np.uint16)
+    canvas[:, :, 0] = np.arange(16)[None, :]
+    canvas[:, :, 1] = np.arange(16)[:, None]
+    pipeline = TileCanvas(7, TARGET, chain)
+    pixels = pipeline.sample(canvas).reshape(2, 8, 8, 4)
+    # the first tile covers the bottom left quarter, the second the top right
+    assert pixels[0, 0, 0, :2].tolist() == [0, 8]
+    assert pixels[0, 7, 7, :2].tolist() == [7, 15]
+    assert pixels[1, 0, 0, :2].tolist() == [8, 0]
+
+    packets = pipeline.encode(canvas, duration=40)
+    expected = TileSet64(
+        source_id=7,
+        target_addr=TARGET,
+        seq_num=3,
+        payload=TileSet64Payload(
+            tile_index=1,
+            length=1,
+            x=0,
+            y=0,
+            width=8,
+            duration=40,
+            colors=pixels[1].reshape(64, 4).tolist(),
+        ),
+    )
+    assert len(packets) == 2
+    assert bytes(pipeline.stamp(1, 3)) == expected.packed_message
+
+    # the index map is computed once per layout and canvas size
+    sampling_index.cache_clear()
+    pipeline.sample(canvas)
+    pipeline.sample(canvas)
+    assert sampling_index.cache_info().hits == 1
+    assert chain_geometry(chain) == pipeline.geometry
+
+
+def test_canvas_takes_its_layout_from_the_device_chain_reply() -> None:
+    chain = [tile(0.5, 0.5), tile(1.5, 1.5), tile(-0.5, 0.25)]
+    packed = TileStateDeviceChain(
+        source_id=7,
+        seq_num=1,
+        target_addr=TARGET,
+        payload=TileStateDeviceChainPayload(
+            start_index=0, tile_devices=chain, tile_devices_count=len(chain)
+        ),
+    ).packed_message
+    # the chain always carries 16 tile slots of 55 bytes
+    assert len(packed) == HEADER_SIZE_BYTES + 1 + 16 * 55 + 1
+    reply = unpack_lifx_message(packed)
+    assert isinstance(reply, TileStateDeviceChain)
+    assert reply.payload.tile_devices == chain
+    canvas = np.arange(16 * 24 * 4, dtype=np.uint16).reshape(16, 24, 4)
+    pipeline = TileCanvas(7, TARGET, reply.payload.tile_devices)
+    assert pipeline.geometry == chain_geometry(chain)
+    expected = TileCanvas(7, TARGET, chain).sample(canvas)
+    assert (pipeline.sample(canvas) == expected).all()
+
+
+def test_large_tiles_are_split_into_row_bands() -> None:
+    pipeline = TileCanvas(7, TARGET, [tile(0.5, 0.5, width=16, height=8)])
+    assert [(p.y, p.count) for p in pipeline.packets] == [(0, 64), (4, 64)]
+
+
+def test_rgb_canvas_is_converted_after_sampling() -> None:
+    pipeline = TileCanvas(7, TARGET, [tile(0.5, 0.5)])
+    canvas = np.zeros((4, 4, 3), dtype=np.uint8)
+    canvas[..., 2] = 255
+    pixels = pipeline.sample(canvas, kelvin=5000)
+    assert pixels.shape == (64, 4)
+    assert (pixels == [43690, 65535, 65535, 5000]).all()
+
+
+def test_only_visibly_changed_tile_packets_are_resent() -> None:
+    pipeline = TileCanvas(7, TARGET, [tile(0.5, 0.5), tile(1.5, 0.5), tile(2.5, 0.5)])
+    canvas = np.zeros((8, 24, 4), dtype=np.uint16)
+    canvas[..., 1:3] = 65535
+    assert pipeline.encode_changes(canvas) == [0, 1, 2]
+    canvas[:, :8, 2] -= 100
+    canvas[2, 20, 0] = 30000
+    assert pipeline.encode_changes(canvas) == [2]
+    assert pipeline.colors[2].reshape(8, 8, 4)[2, 4, 0] == 30000
+    # the dimmed first tile only goes out again with a keyframe
+    assert pipeline.encode_changes(canvas) == []
+    assert pipeline.encode_changes(canvas, keyframe=True) == [0, 1, 2]
+    assert (pipeline.colors[0][:, 2] == 65435).all()
+
+
+def test_chain_snapshot_in_one_burst_with_retry_for_lost_tiles() -> None:
+    requests: list[TileGet64] = []
+
+    async def scenario() -> TileSnapshot:
+        loop = asyncio.get_running_loop()
+
+        def send(request: Message) -> None:
+            assert isinstance(request, TileGet64)
+            requests.append(request)
+            first = request.payload.tile_index
+            for tile_index in range(first, first + request.payload.length):
+                # the first reply from tile 3 is lost
+                if tile_index == 3 and len(requests) == 1:
+                    continue
+                reply = TileState64(
+                    source_id=request.source_id,
+                    target_addr=TARGET,
+                    seq_num=request.seq_num,
+                    payload=TileState64Payload(
+                        tile_index=tile_index,
+                        x=0,
+                        y=0,
+                        width=8,
+                        colors=[[tile_index, i, 0, 3500] for i in range(64)],
+                    ),
+                )
+                loop.call_soon(reader.handle_message, reply)
+
+        reader = TileSnapshotReader(send, source_id=7, retry_interval=0.02)
+        return await reader.fetch(TARGET, tiles=5, timeout=5)
+
+    snapshot = asyncio.run(scenario())
+    assert snapshot.complete
+    assert [(r.payload.tile_index, r.payload.length) for r in requests] == [
+        (0, 5),
+        (3, 1),
+    ]
+    assert snapshot.pixels.shape == (5, 8, 8, 4)
+    assert snapshot.pixels[3, 7, 7].tolist() == [3, 63, 0, 3500]
+    assert snapshot.pixels[4, 1, 0].tolist() == [4, 8, 0, 3500]
@@ -0,0 +1,106 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from aiolifx.models.message_types import LightSetColor
+from aiolifx.models.message_types import LightSetWaveform
+from aiolifx.models.message_types import MultiZoneSetExtendedColorZones
+from aiolifx.models.message_types import TileSet64
+from aiolifx.models.message_types import Waveform
+from aiolifx.streaming.segments import zone_distance
+from aiolifx.streaming.transitions import fit_waveform
+from aiolifx.streaming.transitions import interpolate
+from aiolifx.streaming.transitions import plan_keyframes
+from aiolifx.streaming.transitions import transition_messages
+
+MAC = "d0:73:d5:00:00:01"
+
+
+def test_linear_fade_needs_one_transition() -> None:
+    times = np.linspace(0, 2, 101)
+    colors = interpolate([60000, 65535, 0, 3500], [5000, 65535, 65535, 3500], times / 2)
+    messages = transition_messages(times, colors, 1, MAC)
+    assert len(messages) * 10 <= len(times)
+    assert all(isinstance(message, LightSetColor) for _, message in messages)
+    at, last = messages[-1]
+    assert at == 0.0
+    assert last.payload.duration == 2000
+    assert last.payload.color == [5000, 65535, 65535, 3500]
+
+
+def test_keyframes_stay_within_tolerance() -> None:
+    times = np.linspace(0, 3, 91)
+    brightness = np.where(times < 1, times, np.where(times < 2, 1.0, 3 - times))
+    colors = np.zeros((len(times), 4))
+    colors[:, 1] = 65535
+    colors[:, 2] = brightness * 65535
+    colors[:, 3] = 3500
+    keyframes = plan_keyframes(times, colors, tolerance=0.01)
+    assert [keyframe.index for keyframe in keyframes] == [0, 30, 60, 90]
+    for previous, keyframe in itertools.pairwise(keyframes):
+        assert keyframe.at == times[previous.index]
+        span = times[previous.index : keyframe.index + 1]
+        predicted = interpolate(
+            colors[previous.index],
+            colors[keyframe.index],
+            (span - span[0]) / (span[-1] - span[0]),
+        )
+        error = zone_distance(colors[previous.index : keyframe.index + 1], predicted)
+        assert error.max() <= 0.01
+
+
+def test_periodic_trajectory_becomes_waveform() -> None:
+    times = np.linspace(0, 3, 91)
+    weights = (1 - np.cos(2 * np.pi * times)) / 2
+    colors = interpolate([0, 65535, 10000, 3500], [0, 65535, 60000, 3500], weights)
+    fit = fit_waveform(times, colors)
+    assert fit is not None
+    assert fit.waveform == Waveform.SINE
+    assert fit.cycles == 3
+    assert fit.period == 1000
+    messages = transition_messages(times, colors, 1, MAC)
+    assert len(messages) == 2
+    _, waveform = messages[1]
+    assert isinstance(waveform, LightSetWaveform)
+    assert waveform.payload.waveform == Waveform.SINE.value
+    assert abs(waveform.payload.color[2] - 60000) < 100
+    waveform.packed_message  # noqa: B018
+
+
+def test_aperiodic_trajectory_has_no_waveform() -> None:
+    times = np.linspace(0, 2, 61)
+    colors = interpolate([0, 0, 0, 3500], [0, 0, 65535, 3500], (times / 2) ** 2)
+    assert fit_waveform(times, colors) is None
+
+
+def test_zone_and_tile_fades_use_their_own_keyframe_messages() -> None:
+    times = np.linspace(0, 1, 51)
+    start = np.zeros((100, 4))
+    start[:, 2] = np.linspace(0, 65535, 100)
+    start[:, 3] = 3500
+    end = start.copy()
+    end[:, 2] = 65535 - start[:, 2]
+    strip = interpolate(start, end, times)
+    messages = transition_messages(times, strip, 1, MAC, seq_num=10)
+    # two keyframes of two pages each, only the last page of each applying
+    assert len(messages) == 4
+    assert all(
+        isinstance(message, MultiZoneSetExtendedColorZones) for _, message in messages
+    )
+    assert [message.payload.apply for _, message in messages] == [0, 1, 0, 1]
+    assert [message.seq_num for _, message in messages] == [10, 11, 12, 13]
+    _, last = messages[-1]
+    assert last.payload.duration == 1000
+    assert (last.payload.zone_index, last.payload.colors_count) == (82, 18)
+    assert last.payload.colors[0][2] == round(end[82, 2])
+
+    chain = np.zeros((len(times), 2, 8, 8, 4))
+    chain[..., 2] = (times * 65535)[:, None, None, None]
+    messages = transition_messages(times, chain, 1, MAC)
+    assert len(messages) == 4
+    assert all(isinstance(message, TileSet64) for _, message in messages)
+    assert messages[-1][1].payload.colors[0][2] == 65535
+
+    with pytest.raises(ValueError, match="got"):
+        transition_messages(times, np.zeros((len(times), 3)), 1, MAC)
@@ -0,0 +1,77 @@
+import asyncio
+
+from aiolifx.fleet.zones import ZoneAssembler
+from aiolifx.models.message import Message
+from aiolifx.models.message_types import MultiZoneGetExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZones
+from aiolifx.models.message_types import MultiZoneStateExtendedColorZonesPayload
+from aiolifx.models.message_types import MultiZoneStateMultiZone
+from aiolifx.models.message_types import MultiZoneStateMultiZonePayload
+
+TARGET = "d0:73:d5:00:00:01"
+
+
+def zone_color(index: int) -> list[int]:
+    return [index * 100, 65535, 65535, 3500]
+
+
+def test_extended_pages_assemble_into_one_buffer() -> None:
+    async def scenario() -> None:
+        loop = asyncio.get_running_loop()
+
+        def send(request: Message) -> None:
+            assert isinstance(request, MultiZoneGetExtendedColorZones)
+            for zone_index in (82, 0):
+                count = min(82, 120 - zone_index)
+                reply = MultiZoneStateExtendedColorZones(
+                    source_id=request.source_id,
+                    target_addr=TARGET,
+                    seq_num=request.seq_num,
+                    payload=MultiZoneStateExtendedColorZonesPayload(
+                        zones_count=120,
+                        zone_index=zone_index,
+                        colors_count=count,
+                        colors=[zone_color(zone_index + i) for i in range(count)]
+                        + [[0, 0, 0, 0]] * (82 - count),
+                    ),
+                )
+                loop.call_soon(assembler.handle_message, reply)
+
+        assembler = ZoneAssembler(send, source_id=7)
+        buffer = await assembler.fetch(TARGET, extended=True, timeout=5)
+        assert buffer.complete
+        assert buffer.zones_count == 120
+        assert buffer.colors[119].tolist() == zone_color(119)
+
+    asyncio.run(scenario())
+
+
+def test_legacy_replies_time_out_with_missing_zones() -> None:
+    async def scenario() -> None:
+        loop = asyncio.get_running_loop()
+
+        def send(request: Message) -> None:
+            # the reply for zones 8-15 is lost, and one answers another request
+            for index, seq_num in ((0, request.seq_num), (16, request.seq_num), (8, 99)):
+                reply = MultiZoneStateMultiZone(
+                    source_id=request.source_id,
+                    target_addr=TARGET,
+                    seq_num=seq_num,
+                    payload=MultiZoneStateMultiZonePayload(
+                        count=20,
+                        index=index,
+                        color=[zone_color(index + i) for i in range(8)],
+                    ),
+                )
+                loop.call_soon(assembler.handle_message, reply)
+
+        assembler = ZoneAssembler(send, source_id=7)
+        buffer = await assembler.fetch(
+            TARGET, extended=False, zones_count=16, timeout=0.05
+        )
+        assert not buffer.complete
+        assert buffer.zones_count == 20
+        assert buffer.missing() == list(range(8, 16))
+        assert buffer.colors[19].tolist() == zone_color(19)
+
+    asyncio.run(scenario())